@@ -6,7 +6,7 @@ import os
 from pathlib import Path
 import re
 import shutil
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from app.data.category import Categories, CategorizedCatalog
 from app.data.database import (ai, constants, difficulty_modes, equations,
@@ -32,6 +32,10 @@ class Database(object):
 
     def __init__(self):
         self.current_proj_dir = None
+        # Absolute path of each file serialize has written or checked:
+        # (compact JSON of its contents, mtime in ns, size)
+        # So the next serialize can skip files that would not change
+        self._saved_files: Dict[str, Tuple[str, int, int]] = {}
 
         self.constants = constants.constants
         self.teams = teams.TeamCatalog()
@@ -111,8 +115,43 @@ class Database(object):
             # logging.info("Time taken: %s ms" % time2)
         return to_save
 
+    def _save_if_changed(self, save_loc: Path, value) -> bool:
+        """
+        Writes value to save_loc unless the file there already holds it.
+        Returns whether it had to write
+        """
+        key = os.path.normcase(os.path.abspath(save_loc))
+        encoded = json.dumps(value)
+        try:
+            stat = os.stat(save_loc)
+        except FileNotFoundError:
+            stat = None
+        if stat:
+            record = self._saved_files.get(key)
+            if record and record[1:] == (stat.st_mtime_ns, stat.st_size):
+                # Nothing else has touched the file since we last saw it
+                unchanged = record[0] == encoded
+            else:
+                # First time seeing this file, or it changed under us
+                try:
+                    unchanged = json.dumps(load_json(save_loc)) == encoded
+                except Exception:
+                    unchanged = False
+            if unchanged:
+                self._saved_files[key] = (encoded, stat.st_mtime_ns, stat.st_size)
+                return False
+        save_json(save_loc, value)
+        stat = os.stat(save_loc)
+        self._saved_files[key] = (encoded, stat.st_mtime_ns, stat.st_size)
+        return True
+
+    def _remove_saved_file(self, save_loc: Path):
+        os.remove(save_loc)
+        self._saved_files.pop(os.path.normcase(os.path.abspath(save_loc)), None)
+
     def serialize(self, proj_dir, as_chunks:bool=False) -> bool:
         # Returns whether we were successful
+        # Only files whose contents changed since they were last saved are written
 
         data_dir = os.path.join(proj_dir, 'game_data')
         if not os.path.exists(data_dir):
@@ -123,26 +162,32 @@ class Database(object):
         start = time.perf_counter() * 1000
 
         to_save = self.save()
-        # This section is what takes so long!
+        num_written = 0
         try:
             for key, value in to_save.items():
                 # divide save data into chunks based on key value
                 if key in self.save_as_chunks and as_chunks:
                     save_dir = os.path.join(data_dir, key)
-                    if os.path.exists(save_dir):
-                        shutil.rmtree(save_dir)
-                    os.mkdir(save_dir)
+                    if not os.path.isdir(save_dir):
+                        os.mkdir(save_dir)
                     orderkeys: List[str] = []
+                    chunks: Dict[str, Any] = {}
                     for idx, subvalue in enumerate(value):
                         # ordering
                         name = subvalue['nid']
                         name = re.sub(r'[\\/*?:"<>|]', "", name)
                         name = name.replace(' ', '_')
                         orderkeys.append(name)
+                        chunks[name] = subvalue
+                    for name, subvalue in chunks.items():
                         save_loc = Path(save_dir, name + '.json')
                         # logging.info("Serializing %s to %s" % ('%s/%s.json' % (key, name), save_loc))
-                        save_json(save_loc, [subvalue])
-                    save_json(Path(save_dir, '.orderkeys'), orderkeys)
+                        num_written += self._save_if_changed(save_loc, [subvalue])
+                    # Clean up anything that was renamed or deleted
+                    for fname in os.listdir(save_dir):
+                        if fname.endswith('.json') and fname[:-len('.json')] not in chunks:
+                            self._remove_saved_file(Path(save_dir, fname))
+                    num_written += self._save_if_changed(Path(save_dir, '.orderkeys'), orderkeys)
                 else:  # Save as a single file
                     # Which means deleting the old directory
                     save_dir = Path(data_dir, key)
@@ -150,7 +195,7 @@ class Database(object):
                         shutil.rmtree(save_dir)
                     save_loc = Path(data_dir, key + '.json')
                     # logging.info("Serializing %s to %s" % (key, save_loc))
-                    save_json(save_loc, value)
+                    num_written += self._save_if_changed(save_loc, value)
 
         except OSError as e:  # In case we ran out of memory
             logging.error("Editor was unable to save your project. Free up memory in your hard drive or try saving somewhere else, otherwise progress will be lost when the editor is closed.")
@@ -158,6 +203,7 @@ class Database(object):
             return False
 
         end = time.perf_counter() * 1000
+        logging.info("Wrote %d changed files", num_written)
         logging.info("Total Time Taken for Database: %s ms" % (end - start))
         logging.info("Done serializing!")
         return True
@@ -1,6 +1,7 @@
 from typing import Dict
 from app.data.serialization.loaders.loader_base import LoaderBase
 from app.data.serialization.migration import migrate_db, migrate_resources
+from app.data.serialization import project_cache
 from app.data.serialization.versions import CURRENT_SERIALIZATION_VERSION
 from app.utilities.typing import NestedPrimitiveDict
 from app.data.serialization.loaders import loader0
@@ -23,7 +24,7 @@ def _dispatch_load_database(data_dir: str, version: int) -> NestedPrimitiveDict:
         version -= 1
     return LOADERS[version].load_database(data_dir)
 
-def load_database(data_dir: str, version: int) -> NestedPrimitiveDict:
+def _load_database(data_dir: str, version: int) -> NestedPrimitiveDict:
     current_version = CURRENT_SERIALIZATION_VERSION
     loaded = _dispatch_load_database(data_dir, version)
     while version < current_version:
@@ -31,10 +32,20 @@ def load_database(data_dir: str, version: int) -> NestedPrimitiveDict:
         version += 1
     return loaded
 
-def load_resources(data_dir: str, version: int) -> NestedPrimitiveDict:
+def _load_resources(data_dir: str, version: int) -> NestedPrimitiveDict:
     current_version = CURRENT_SERIALIZATION_VERSION
     loaded = _dispatch_load_resources(data_dir, version)
     while version < current_version:
         loaded = migrate_resources(loaded, version)
         version += 1
-    return loaded
\ No newline at end of file
+    return loaded
+
+def load_database(data_dir: str, version: int, use_cache: bool = True) -> NestedPrimitiveDict:
+    if use_cache:
+        return project_cache.load_cached(data_dir, version, lambda: _load_database(data_dir, version))
+    return _load_database(data_dir, version)
+
+def load_resources(data_dir: str, version: int, use_cache: bool = True) -> NestedPrimitiveDict:
+    if use_cache:
+        return project_cache.load_cached(data_dir, version, lambda: _load_resources(data_dir, version))
+    return _load_resources(data_dir, version)
@@ -1,7 +1,9 @@
+import functools
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterable, List, Optional
 from app.data.database import database
 from app.data.resources import resources
 from app.data.serialization.loaders.loader_base import LoaderBase
@@ -9,33 +11,64 @@ from app.utilities.data_order import parse_order_keys_file
 from app.utilities.serialization import load_json
 from app.utilities.typing import NestedPrimitiveDict
 
+# Categories are independent, so they can be loaded on a few threads at once
+# with Loader0(max_workers=4), say. That can only overlap waiting on the disk
+# (a cold cache or a network drive): parsing JSON holds the GIL, so categories
+# are never parsed in parallel. With a warm cache the threads only cost time,
+# so categories are loaded one after another on the calling thread by default
+MAX_WORKERS = 1
+
 class Loader0(LoaderBase):
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+
     def load_database(self, data_dir: Path) -> NestedPrimitiveDict:
-        return _load_as_dict(data_dir)
+        return _load_as_dict(data_dir, self.max_workers)
 
     def load_resources(self, resource_dir: Path) -> NestedPrimitiveDict:
-        as_dict = {}
-        for key in resources.Resources.save_data_types:
-            if not (resource_dir / key).exists():
-                raise FileNotFoundError(
-                    f"Resource directory {resource_dir / key} does not exist!\n"
-                    f"Please do the following steps:\n\n"
-                    f"1. Navigate to the `lt-maker/default.ltproj/resources` folder.\n"
-                    f"2. Copy the missing folder: `{key}`.\n"
-                    f"3. Navigate to `your_project.ltproj/resources folder`.\n"
-                    f"4. Paste the missing folder."
-                )
-            if key == 'combat_palettes': # special case
-                as_dict[key] = _json_load(resource_dir / key, 'palette_data')
-                if Path(resource_dir / key, key + resources.CATEGORY_SUFFIX + '.json').exists():
-                    as_dict[key + resources.CATEGORY_SUFFIX] = _json_load(resource_dir / key, key + resources.CATEGORY_SUFFIX)
-            elif key == 'tilemaps': # special case
-                as_dict[key] = _json_load(resource_dir / key, 'tilemap_data')
-            else:
-                as_dict[key] = _load_manifest_or_prefabs(resource_dir, key)
-                if Path(resource_dir / key, key + resources.CATEGORY_SUFFIX + '.json').exists():
-                    as_dict[key + resources.CATEGORY_SUFFIX] = _json_load(resource_dir / key, key + resources.CATEGORY_SUFFIX)
-        return as_dict
+        return _load_categories(resources.Resources.save_data_types,
+                                functools.partial(_load_resource_category, resource_dir), self.max_workers)
+
+def _load_categories(keys: Iterable[str], load_category: Callable[[str], NestedPrimitiveDict],
+                     max_workers: Optional[int] = None) -> NestedPrimitiveDict:
+    """
+    Merges what load_category returns for each key, in the order of keys
+    no matter which category finishes loading first
+    """
+    max_workers = max_workers or MAX_WORKERS
+    as_dict = {}
+    if max_workers <= 1:
+        for key in keys:
+            as_dict.update(load_category(key))
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # map returns in order, and raises the error of the first category in order that failed
+            for loaded in pool.map(load_category, keys):
+                as_dict.update(loaded)
+    return as_dict
+
+def _load_resource_category(resource_dir: Path, key: str) -> NestedPrimitiveDict:
+    as_dict = {}
+    if not (resource_dir / key).exists():
+        raise FileNotFoundError(
+            f"Resource directory {resource_dir / key} does not exist!\n"
+            f"Please do the following steps:\n\n"
+            f"1. Navigate to the `lt-maker/default.ltproj/resources` folder.\n"
+            f"2. Copy the missing folder: `{key}`.\n"
+            f"3. Navigate to `your_project.ltproj/resources folder`.\n"
+            f"4. Paste the missing folder."
+        )
+    if key == 'combat_palettes': # special case
+        as_dict[key] = _json_load(resource_dir / key, 'palette_data')
+        if Path(resource_dir / key, key + resources.CATEGORY_SUFFIX + '.json').exists():
+            as_dict[key + resources.CATEGORY_SUFFIX] = _json_load(resource_dir / key, key + resources.CATEGORY_SUFFIX)
+    elif key == 'tilemaps': # special case
+        as_dict[key] = _json_load(resource_dir / key, 'tilemap_data')
+    else:
+        as_dict[key] = _load_manifest_or_prefabs(resource_dir, key)
+        if Path(resource_dir / key, key + resources.CATEGORY_SUFFIX + '.json').exists():
+            as_dict[key + resources.CATEGORY_SUFFIX] = _json_load(resource_dir / key, key + resources.CATEGORY_SUFFIX)
+    return as_dict
 
 def _load_manifest_or_prefabs(resource_dir: Path, key: str):
     manifest_path = Path(resource_dir / key, key + '.json')
@@ -44,23 +77,26 @@ def _load_manifest_or_prefabs(resource_dir: Path, key: str):
     else:
         return _json_load(resource_dir, key)
 
-def _load_as_dict(data_dir: Path) -> NestedPrimitiveDict:
+def _load_as_dict(data_dir: Path, max_workers: Optional[int] = None) -> NestedPrimitiveDict:
+    return _load_categories(database.Database.save_data_types,
+                            functools.partial(_load_database_category, data_dir), max_workers)
+
+def _load_database_category(data_dir: Path, key: str) -> NestedPrimitiveDict:
     as_dict = {}
     category_suffix = database.CATEGORY_SUFFIX
-    for key in database.Database.save_data_types:
-        as_dict[key] = _json_load(data_dir, key)
-        if as_dict[key] is None:
-            raise FileNotFoundError(
-                f"Data directory {data_dir / key} does not exist!\n"
-                f"Please do the following steps:\n\n"
-                f"1. Navigate to the `lt-maker/default.ltproj/game_data` folder.\n"
-                f"2. Copy the missing file: `{key}.json`.\n"
-                f"3. Navigate to `your_project.ltproj/game_data` folder.\n"
-                f"4. Paste the missing file."
-            )
-        # Load any of the categories we need
-        if Path(data_dir, key + category_suffix + '.json').exists():
-            as_dict[key + category_suffix] = _json_load(data_dir, key + category_suffix)
+    as_dict[key] = _json_load(data_dir, key)
+    if as_dict[key] is None:
+        raise FileNotFoundError(
+            f"Data directory {data_dir / key} does not exist!\n"
+            f"Please do the following steps:\n\n"
+            f"1. Navigate to the `lt-maker/default.ltproj/game_data` folder.\n"
+            f"2. Copy the missing file: `{key}.json`.\n"
+            f"3. Navigate to `your_project.ltproj/game_data` folder.\n"
+            f"4. Paste the missing file."
+        )
+    # Load any of the categories we need
+    if Path(data_dir, key + category_suffix + '.json').exists():
+        as_dict[key + category_suffix] = _json_load(data_dir, key + category_suffix)
     return as_dict
 
 def _json_load(data_dir: str, key: str):
@@ -71,7 +107,8 @@ def _json_load(data_dir: str, key: str):
         if '.orderkeys' in data_fnames:
             ordering = parse_order_keys_file(Path(data_dir, key, '.orderkeys'))
         data_fnames: List[Path] = [Path(data_dir, key, fname) for fname in data_fnames if fname.endswith('.json')]
-        data_fnames = sorted(data_fnames, key=lambda fname: ordering.index(fname.stem) if fname.stem in ordering else 99999)
+        order_idx = {stem: idx for idx, stem in reversed(list(enumerate(ordering)))}
+        data_fnames = sorted(data_fnames, key=lambda fname: order_idx.get(fname.stem, 99999))
         full_data = []
         for fname in data_fnames:
             full_data += load_json(fname)
@@ -0,0 +1,116 @@
+"""
+Binary snapshot of a project's loaded (and migrated) data, stored in the
+project's .cache folder, so starting up does not have to parse every JSON
+file in the project again when nothing has changed.
+
+A snapshot is only used if the serialization versions match and every
+source file is the same as when it was made. Files whose size and mtime
+match are trusted, anything else is compared by hash, so a project that was
+copied somewhere else (which changes the mtimes) can still use it.
+"""
+import hashlib
+import logging
+import marshal
+import os
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from app.data.serialization.versions import CURRENT_SERIALIZATION_VERSION
+from app.utilities.typing import NestedPrimitiveDict
+
+CACHE_VERSION = 1
+CACHE_DIR = '.cache'
+MAGIC = b'LTPC'
+
+# Relative path: (size, mtime in ns, sha1 hex digest)
+Fingerprint = Dict[str, Tuple[int, int, str]]
+
+def get_cache_path(data_dir: Path) -> Path:
+    return Path(data_dir).parent / CACHE_DIR / (Path(data_dir).name + '.bin')
+
+def _is_source_file(fname: str) -> bool:
+    return fname.endswith('.json') or fname == '.orderkeys'
+
+def _stat_source_files(data_dir: Path) -> Dict[str, os.stat_result]:
+    stats = {}
+    prefix_len = len(os.path.join(data_dir, ''))
+    for root, dirs, files in os.walk(data_dir):
+        for fname in files:
+            if _is_source_file(fname):
+                full_path = os.path.join(root, fname)
+                stats[full_path[prefix_len:]] = os.stat(full_path)
+    return stats
+
+def _hash_file(path: str) -> str:
+    with open(path, 'rb') as fp:
+        return hashlib.sha1(fp.read()).hexdigest()
+
+def make_fingerprint(data_dir: Path) -> Fingerprint:
+    return {rel_path: (stat.st_size, stat.st_mtime_ns, _hash_file(os.path.join(data_dir, rel_path)))
+            for rel_path, stat in _stat_source_files(data_dir).items()}
+
+def check_fingerprint(data_dir: Path, fingerprint: Fingerprint) -> Optional[Fingerprint]:
+    """
+    Returns None if the source files no longer match the fingerprint.
+    Otherwise returns the fingerprint, updated with any new mtimes
+    """
+    stats = _stat_source_files(data_dir)
+    if stats.keys() != fingerprint.keys():
+        return None
+    current = {}
+    for rel_path, stat in stats.items():
+        size, mtime, digest = fingerprint[rel_path]
+        if stat.st_size != size:
+            return None
+        if stat.st_mtime_ns != mtime and _hash_file(os.path.join(data_dir, rel_path)) != digest:
+            return None
+        current[rel_path] = (size, stat.st_mtime_ns, digest)
+    return current
+
+def _read_cache(cache_path: Path):
+    try:
+        with open(cache_path, 'rb') as fp:
+            if fp.read(len(MAGIC)) != MAGIC:
+                return None
+            # Much faster than marshal.load, which reads the file bit by bit
+            return marshal.loads(fp.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError):
+        logging.warning("Could not read project cache %s", cache_path)
+        return None
+
+def _write_cache(cache_path: Path, header: tuple, fingerprint: Fingerprint, data: NestedPrimitiveDict):
+    temp_path = cache_path.parent / (cache_path.name + '.tmp')
+    try:
+        payload = marshal.dumps((header, fingerprint, data))
+        cache_path.parent.mkdir(exist_ok=True)
+        with open(temp_path, 'wb') as fp:
+            fp.write(MAGIC)
+            fp.write(payload)
+        os.replace(temp_path, cache_path)
+    except (OSError, ValueError) as e:
+        # Read only project or unmarshallable data, just go without
+        logging.warning("Could not write project cache %s: %s", cache_path, e)
+
+def load_cached(data_dir: Path, version: int, load: Callable[[], NestedPrimitiveDict]) -> NestedPrimitiveDict:
+    """
+    Returns what load() returns for the data in data_dir, from the snapshot
+    if it is still good. Otherwise calls load() and makes a new snapshot
+    """
+    cache_path = get_cache_path(data_dir)
+    header = (CACHE_VERSION, CURRENT_SERIALIZATION_VERSION, version)
+    cached = _read_cache(cache_path)
+    if isinstance(cached, tuple) and len(cached) == 3 and cached[0] == header:
+        _, fingerprint, data = cached
+        current = check_fingerprint(data_dir, fingerprint)
+        if current is not None:
+            logging.info("Loaded %s from project cache", data_dir)
+            if current != fingerprint:
+                _write_cache(cache_path, header, current, data)
+            return data
+    # Taken before loading, so a file changed mid load makes the snapshot stale
+    fingerprint = make_fingerprint(data_dir)
+    data = load()
+    _write_cache(cache_path, header, fingerprint, data)
+    return data
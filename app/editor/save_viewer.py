@@ -8,6 +8,7 @@ except ImportError:
 from PyQt5.QtWidgets import QVBoxLayout, QDialog, QTextEdit
 from PyQt5.QtGui import QTextCursor
 from app.extensions.custom_gui import PropertyBox, ComboBox, Dialog
+from app.engine import save_container
 
 import logging
 
@@ -39,8 +40,7 @@ class SaveViewer(Dialog):
         try:
             save_loc = self.save_box.edit.currentText()
             meta_loc = save_loc + 'meta'
-            with open(save_loc, 'rb') as fp:
-                s_dict = pickle.load(fp)
+            s_dict = save_container.read_save(save_loc)
             with open(meta_loc, 'rb') as fp:
                 meta_dict = pickle.load(fp)
         except Exception as e:
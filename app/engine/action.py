@@ -15,7 +15,9 @@ from app.events import triggers
 from app.data.resources.resources import RESOURCES
 from app.engine import (aura_funcs, banner, equations, item_funcs, item_system,
                         particles, skill_system, unit_funcs, animations)
+from app.engine.component_system.utils import invalidate_hook_indices
 from app.engine.game_state import game
+from app.engine.utils import ltcache
 from app.engine.objects.item import ItemObject
 from app.engine.objects.skill import SkillObject
 from app.engine.objects.unit import UnitObject
@@ -27,9 +29,9 @@ from app.engine.source_type import SourceType
 
 def alters_game_state(func):
     @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        func(*args, **kwargs)
-        game.on_alter_game_state()
+    def wrapper(self, *args, **kwargs):
+        func(self, *args, **kwargs)
+        game.on_alter_game_state(self.invalidates)
     return wrapper
 
 def wrap_do_exec_reverse(_cls):
@@ -42,6 +44,9 @@ def wrap_do_exec_reverse(_cls):
 
 class Action():
     persist_through_menu_cancel = False
+    # Which parts of the game state (ltcache dependency tags) this action can change
+    # None means it could change anything
+    invalidates: Optional[Tuple[str, ...]] = None
 
     def __init_subclass__(cls, **kwargs):
         return wrap_do_exec_reverse(_cls=cls)
@@ -169,6 +174,7 @@ class Move(Action):
     """
     A basic, user-directed move
     """
+    invalidates = (ltcache.BOARD, ltcache.UNIT_STATE)
 
     def __init__(self, unit, new_pos, path=None, event=False, follow=True, speed=0, silent=False):
         self.unit: UnitObject = unit
@@ -254,6 +260,8 @@ class ForcedMovement(SimpleMove):
 
 
 class Swap(Action):
+    invalidates = (ltcache.BOARD,)
+
     def __init__(self, unit1: UnitObject, unit2: UnitObject):
         self.unit1: UnitObject = unit1
         self.unit2: UnitObject = unit2
@@ -329,6 +337,8 @@ class QuickArrive(Action):
     """
     Similar to ArriveOnMap, but doesn't do the Fog of War changes
     """
+    invalidates = (ltcache.BOARD,)
+
     def __init__(self, unit: UnitObject, pos: Pos, test: bool = False):
         self.unit: UnitObject = unit
         self.pos: Pos = pos
@@ -344,6 +354,8 @@ class QuickLeave(Action):
     """
     Similar to LeaveMap, but doesn't do the Fog of War changes
     """
+    invalidates = (ltcache.BOARD,)
+
     def __init__(self, unit: UnitObject, test: bool = False, keep_position: bool = False):
         self.unit: UnitObject = unit
         self.old_pos: Pos = self.unit.position
@@ -363,6 +375,8 @@ class ArriveOnMap(Action):
     """
     Puts the unit onto the map from not being on the map
     """
+    invalidates = (ltcache.BOARD,)
+
     def __init__(self, unit: UnitObject, pos: Pos):
         self.unit: UnitObject = unit
         self.pos: Pos = pos
@@ -416,6 +430,8 @@ class LeaveMap(Action):
     """
     Removes the unit from the map.
     """
+    invalidates = (ltcache.BOARD,)
+
     def __init__(self, unit: UnitObject):
         self.unit: UnitObject = unit
         self.old_pos: Pos = self.unit.position
@@ -557,6 +573,8 @@ class SetLevelVar(Action):
 
     def _update_fog_of_war(self):
         if self.nid in self.fog_nids:
+            if game.board:
+                game.board.bump_version()
             for unit in game.units:
                 if unit.position:
                     UpdateFogOfWar(unit).execute()
@@ -571,6 +589,8 @@ class SetLevelVar(Action):
         self._update_fog_of_war()
 
 class SetMovementLeft(Action):
+    invalidates = (ltcache.UNIT_STATE,)
+
     def __init__(self, unit, val):
         self.unit = unit
         self.val = val
@@ -583,6 +603,8 @@ class SetMovementLeft(Action):
         self.unit.movement_left = self.old_val
 
 class Wait(Action):
+    invalidates = (ltcache.UNIT_STATE,)
+
     def __init__(self, unit):
         self.unit = unit
         self.action_state = self.unit.get_action_state()
@@ -646,6 +668,8 @@ class UpdateFogOfWar(Action):
 
 
 class ResetUnitVars(Action):
+    invalidates = (ltcache.STATS,)
+
     def __init__(self, unit):
         self.unit = unit
         self.old_current_hp = self.unit.get_hp()
@@ -661,6 +685,8 @@ class ResetUnitVars(Action):
 
 
 class SetPreviousPosition(Action):
+    invalidates = (ltcache.UNIT_STATE,)
+
     def __init__(self, unit):
         self.unit = unit
         self.old_previous_position = self.unit.previous_position
@@ -683,6 +709,8 @@ class SetPersistent(Action):
         self.unit.persistent = self.old_persistent
 
 class Reset(Action):
+    invalidates = (ltcache.UNIT_STATE,)
+
     def __init__(self, unit):
         self.unit = unit
         self.movement_left = self.unit.movement_left
@@ -698,6 +726,8 @@ class Reset(Action):
 
 
 class ResetAll(Action):
+    invalidates = (ltcache.UNIT_STATE,)
+
     def __init__(self, units):
         self.actions = [Reset(unit) for unit in units]
 
@@ -1271,6 +1301,8 @@ class TradeItemWithConvoy(Action):
 
 
 class GiveItem(Action):
+    invalidates = (ltcache.ITEMS,)
+
     def __init__(self, unit, item):
         self.unit = unit
         self.item = item
@@ -1286,6 +1318,8 @@ class GiveItem(Action):
             self.unit.remove_item(self.item)
 
 class DropItem(Action):
+    invalidates = (ltcache.ITEMS,)
+
     def __init__(self, unit, item):
         self.unit = unit
         self.item = item
@@ -1333,6 +1367,7 @@ class SetDroppable(Action):
 
 class StoreItem(Action):
     persist_through_menu_cancel = True
+    invalidates = (ltcache.ITEMS,)
 
     def __init__(self, unit, item):
         self.unit = unit
@@ -1361,6 +1396,7 @@ class RemoveItem(StoreItem):
 
 class EquipItem(Action):
     persist_through_menu_cancel = True
+    invalidates = (ltcache.ITEMS,)
 
     def __init__(self, unit, item):
         self.unit = unit
@@ -1380,6 +1416,8 @@ class EquipItem(Action):
 
 
 class UnequipItem(Action):
+    invalidates = (ltcache.ITEMS,)
+
     def __init__(self, unit, item):
         self.unit = unit
         self.item = item
@@ -1408,6 +1446,7 @@ class BringToTopItem(Action):
     Assumes item is in inventory
     """
     persist_through_menu_cancel = True
+    invalidates = (ltcache.ITEMS,)
 
     def __init__(self, unit, item):
         self.unit = unit
@@ -1422,6 +1461,8 @@ class BringToTopItem(Action):
 
 
 class TradeItem(Action):
+    invalidates = (ltcache.ITEMS,)
+
     def __init__(self, unit1, unit2, item1, item2):
         self.unit1 = unit1
         self.unit2 = unit2
@@ -1452,6 +1493,8 @@ class TradeItem(Action):
         recalc_unit(self.unit2)
 
 class RepairItem(Action):
+    invalidates = (ltcache.ITEMS,)
+
     def __init__(self, item):
         self.item = item
         self.old_uses = self.item.data.get('uses')
@@ -1546,6 +1589,8 @@ class RemoveItemFromMultiItem(Action):
             game.boundary.recalculate_unit(unit)
 
 class AddItemComponent(Action):
+    invalidates = (ltcache.ITEMS,)
+
     def __init__(self, item, component_nid, component_value):
         self.item = item
         self.component_nid = component_nid
@@ -1560,6 +1605,7 @@ class AddItemComponent(Action):
             logging.error("AddItemComponent: Couldn't find item component with nid %s", self.component_nid)
             return
         self.item.components.append(component)
+        invalidate_hook_indices()
         self.item.__dict__[self.component_nid] = component
         # Assign parent to component
         component.item = self.item
@@ -1570,10 +1616,13 @@ class AddItemComponent(Action):
     def reverse(self):
         if self._did_add:
             self.item.components.remove_key(self.component_nid)
+            invalidate_hook_indices()
             del self.item.__dict__[self.component_nid]
             self._did_add = False
 
 class ModifyItemComponent(Action):
+    invalidates = (ltcache.ITEMS,)
+
     def __init__(self, item, component_nid, new_component_value, component_property=None, additive: bool = False):
         self.item: ItemObject = item
         self.component_nid = component_nid
@@ -1610,6 +1659,8 @@ class ModifyItemComponent(Action):
                 component.value = self.prev_component_value
 
 class RemoveItemComponent(Action):
+    invalidates = (ltcache.ITEMS,)
+
     def __init__(self, item, component_nid):
         self.item = item
         self.component_nid = component_nid
@@ -1622,6 +1673,7 @@ class RemoveItemComponent(Action):
             component = self.item.components.get(self.component_nid)
             self.component_value = component.value
             self.item.components.remove_key(self.component_nid)
+            invalidate_hook_indices()
             del self.item.__dict__[self.component_nid]
             self._did_remove = True
         else:
@@ -1632,12 +1684,15 @@ class RemoveItemComponent(Action):
         if self._did_remove:
             component = ICA.restore_component((self.component_nid, self.component_value))
             self.item.components.append(component)
+            invalidate_hook_indices()
             self.item.__dict__[self.component_nid] = component
             # Assign parent to component
             component.item = self.item
             self._did_remove = False
 
 class AddSkillComponent(Action):
+    invalidates = (ltcache.SKILLS,)
+
     def __init__(self, skill, component_nid, component_value):
         self.skill = skill
         self.component_nid = component_nid
@@ -1652,6 +1707,7 @@ class AddSkillComponent(Action):
             logging.error("AddSkillComponent: Couldn't find skill component with nid %s", self.component_nid)
             return
         self.skill.components.append(component)
+        invalidate_hook_indices()
         self.skill.__dict__[self.component_nid] = component
         # Assign parent to component
         component.skill = self.skill
@@ -1662,10 +1718,13 @@ class AddSkillComponent(Action):
     def reverse(self):
         if self._did_add:
             self.skill.components.remove_key(self.component_nid)
+            invalidate_hook_indices()
             del self.skill.__dict__[self.component_nid]
             self._did_add = False
 
 class ModifySkillComponent(Action):
+    invalidates = (ltcache.SKILLS,)
+
     def __init__(self, skill, component_nid, new_component_value, component_property=None, additive: bool = False):
         self.skill: SkillObject = skill
         self.component_nid = component_nid
@@ -1701,6 +1760,8 @@ class ModifySkillComponent(Action):
                 component.value = self.prev_component_value
 
 class RemoveSkillComponent(Action):
+    invalidates = (ltcache.SKILLS,)
+
     def __init__(self, skill, component_nid):
         self.skill = skill
         self.component_nid = component_nid
@@ -1713,6 +1774,7 @@ class RemoveSkillComponent(Action):
             component = self.skill.components.get(self.component_nid)
             self.component_value = component.value
             self.skill.components.remove_key(self.component_nid)
+            invalidate_hook_indices()
             del self.skill.__dict__[self.component_nid]
             self._did_remove = True
         else:
@@ -1723,6 +1785,7 @@ class RemoveSkillComponent(Action):
         if self._did_remove:
             component = SCA.restore_component((self.component_nid, self.component_value))
             self.skill.components.append(component)
+            invalidate_hook_indices()
             self.skill.__dict__[self.component_nid] = component
             # Assign parent to component
             component.skill = self.skill
@@ -1807,6 +1870,8 @@ class GiveBexp(Action):
 
 
 class GainExp(Action):
+    invalidates = (ltcache.STATS,)
+
     def __init__(self, unit, exp_gain):
         self.unit = unit
         self.old_exp = self.unit.exp
@@ -2211,6 +2276,8 @@ class SetWexp(Action):
 
 
 class ChangeHP(Action):
+    invalidates = (ltcache.STATS,)
+
     def __init__(self, unit, num):
         self.unit = unit
         self.num = num
@@ -2292,6 +2359,8 @@ class SetNid(Action):
                 game.arrive(self.unit, orig_pos)
 
 class SetHP(Action):
+    invalidates = (ltcache.STATS,)
+
     def __init__(self, unit, new_hp):
         self.unit = unit
         self.new_hp = new_hp
@@ -2304,6 +2373,8 @@ class SetHP(Action):
         self.unit.set_hp(self.old_hp)
 
 class ChangeMana(Action):
+    invalidates = (ltcache.STATS,)
+
     def __init__(self, unit, num):
         self.unit = unit
         self.num = num
@@ -2316,6 +2387,8 @@ class ChangeMana(Action):
         self.unit.set_mana(self.old_mana)
 
 class SetMana(Action):
+    invalidates = (ltcache.STATS,)
+
     def __init__(self, unit, new_mana):
         self.unit = unit
         self.new_mana = new_mana
@@ -3514,6 +3587,8 @@ class MoveInInitiative(Action):
         game.initiative.insert_at(self.unit, self.old_idx)
 
 class AddSkill(Action):
+    invalidates = (ltcache.SKILLS,)
+
     def __init__(self, unit, skill, initiator=None, source=None, source_type=SourceType.DEFAULT):
         self.unit = unit
         self.initiator = initiator
@@ -3602,6 +3677,8 @@ class AddSkill(Action):
         self.reset_action.reverse()
 
 class RemoveSkill(Action):
+    invalidates = (ltcache.SKILLS,)
+
     def __init__(self, unit, skill, count=-1, source=None, source_type=SourceType.DEFAULT):
         self.unit = unit
         self.skill = skill  # Skill obj or skill nid str
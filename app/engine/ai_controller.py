@@ -1,7 +1,7 @@
 import logging
 import functools
 import math
-from typing import Collection, List
+from typing import Collection, Dict, List, Tuple
 
 from app.constants import FRAMERATE
 from app.data.database.database import DB
@@ -349,6 +349,12 @@ class AIController():
         return SecondaryAI(self.unit, self.behaviour)
 
 class PrimaryAI():
+    """
+    Scores every (item, target, position) choice and keeps the best one.
+    Choices are scored by actually moving the unit to the position and
+    equipping the item, since terrain, region and aura skills only reach
+    the combat calcs once game.arrive has given them to the unit.
+    """
     def __init__(self, unit: UnitObject, valid_moves, behaviour):
         self.max_tp = 0
 
@@ -386,7 +392,6 @@ class PrimaryAI():
 
         self.item_index = 0
         self.move_index = 0
-        self.target_index = 0
 
         self.valid_moves = list(valid_moves)
         logging.debug(f"Valid Moves: {self.valid_moves}")
@@ -394,6 +399,7 @@ class PrimaryAI():
         self.best_target = None
         self.best_position = None
         self.best_item = None
+        self.best_order = None
 
         self.item_setup()
 
@@ -404,7 +410,8 @@ class PrimaryAI():
             if self.unit.can_equip(item):
                 action.do(action.EquipItem(self.unit, item))
             self.get_all_valid_targets()
-            self.possible_moves = self.get_possible_moves()
+            self.targets_by_move = self.get_targets_by_move()
+            self.possible_moves = list(self.targets_by_move)
             logging.info(self.possible_moves)
 
     def get_all_valid_targets(self):
@@ -417,16 +424,38 @@ class PrimaryAI():
             self.valid_targets = list(set(self.valid_targets))  # Only uniques
         logging.info("Valid Targets: %s", self.valid_targets)
 
-    def get_possible_moves(self) -> List[Pos]:
+    def get_possible_moves(self, target) -> List[Pos]:
         """Given an item and a target, find all positions in valid_moves that I can strike the target at."""
-        if self.target_index < len(self.valid_targets) and self.item_index < len(self.items):
+        if self.item_index < len(self.items):
             item = self.items[self.item_index]
-            target = self.valid_targets[self.target_index]
             moves: List[Pos] = game.target_system.get_possible_attack_positions(self.unit, target, self.valid_moves, item)
             return moves
         else:
             return []
 
+    def get_targets_by_move(self) -> Dict[Pos, List[Tuple[Pos, Tuple[int, int]]]]:
+        """
+        For the current item, groups every target by the positions I can strike it from,
+        so each position only needs to be tested once no matter how many targets it reaches.
+        Each target is stored with the order it would be tried in target by target,
+        which breaks ties between equally good choices.
+        """
+        targets_by_move: Dict[Pos, List[Tuple[Pos, Tuple[int, int]]]] = {}
+        # If too many legal targets, just try for the best move first
+        # Otherwise it spends way too long trying every possible position to strike from
+        too_many_targets = len(self.valid_targets) > 10
+        if too_many_targets:
+            enemy_positions = {u.position for u in game.units if u.position and skill_system.check_enemy(self.unit, u)}
+        for target_index, target in enumerate(self.valid_targets):
+            moves = self.get_possible_moves(target)
+            if too_many_targets:
+                best_move = utils.farthest_away_pos(self.orig_pos, moves, enemy_positions)
+                if best_move:
+                    moves = [best_move]
+            for move_index, move in enumerate(moves):
+                targets_by_move.setdefault(move, []).append((target, (target_index, move_index)))
+        return targets_by_move
+
     def quick_move(self, move):
         action.QuickLeave(self.unit, True).do()
         action.QuickArrive(self.unit, move, True).do()
@@ -438,55 +467,42 @@ class PrimaryAI():
                 action.do(action.EquipItem(self.unit, self.orig_item))
             return (True, self.best_target, self.best_position, self.best_item)
 
-        elif self.target_index >= len(self.valid_targets):
-            self.target_index = 0
-            self.item_index += 1
-            self.item_setup()
-
         elif self.move_index >= len(self.possible_moves):
             self.move_index = 0
-            self.target_index += 1
-            self.possible_moves = self.get_possible_moves()
+            self.item_index += 1
+            self.item_setup()
 
         else:
-            target = self.valid_targets[self.target_index]
             item = self.items[self.item_index]
-            # If too many legal targets, just try for the best move first
-            # Otherwise it spends way too long trying every possible position to strike from
-            if len(self.valid_targets) > 10:
-                enemy_positions = {u.position for u in game.units if u.position and skill_system.check_enemy(self.unit, u)}
-                move = utils.farthest_away_pos(self.orig_pos, self.possible_moves, enemy_positions)
-                if not move:
-                    move = self.possible_moves[self.move_index]
-            else:
-                move = self.possible_moves[self.move_index]
+            move = self.possible_moves[self.move_index]
 
+            # Only need to move once to test every target reachable from this position
             if self.unit.position != move:
                 self.quick_move(move)
 
-            # Check line of sight
-            line_of_sight_flag = True
-            if DB.constants.value('line_of_sight') and not item_system.ignore_line_of_sight(self.unit, item):
+            check_line_of_sight = DB.constants.value('line_of_sight') and not item_system.ignore_line_of_sight(self.unit, item)
+            if check_line_of_sight:
                 item_range = item_funcs.get_range(self.unit, item)
-                if item_range:
-                    max_item_range = max(item_range)
-                    valid_targets = line_of_sight.line_of_sight([move], [target], max_item_range)
-                    if not valid_targets:
+            for target, order in self.targets_by_move[move]:
+                # Check line of sight
+                line_of_sight_flag = True
+                if check_line_of_sight:
+                    if item_range:
+                        max_item_range = max(item_range)
+                        valid_targets = line_of_sight.line_of_sight([move], [target], max_item_range)
+                        if not valid_targets:
+                            line_of_sight_flag = False
+                    else:
                         line_of_sight_flag = False
-                else:
-                    line_of_sight_flag = False
 
-            if line_of_sight_flag:
-                self.determine_utility(move, target, item)
+                if line_of_sight_flag:
+                    self.determine_utility(move, target, item, order)
             self.move_index += 1
-            # If too many legal targets, do not bother with every possible move
-            if len(self.valid_targets) > 10:
-                self.move_index = len(self.possible_moves)
 
         # Not done yet
         return (False, self.best_target, self.best_position, self.best_item)
 
-    def determine_utility(self, move, target_pos, item):
+    def determine_utility(self, move, target_pos, item, order=(0, 0)):
         tp = 0
         assert self.unit.position == move
         if game.target_system.check_target_from_position(self.unit, item, target_pos):
@@ -505,10 +521,13 @@ class PrimaryAI():
                 return
 
         logging.info("Choice %.5f - Weapon: %s, Position: %s, Target: %s, Target Position: %s", tp, item, move, target.nid if target else '--', target_pos)
-        if tp > self.max_tp:
+        # Within an item, ties go to the choice that would have been tried first target by target
+        if tp > self.max_tp or \
+                (tp == self.max_tp and item is self.best_item and self.best_order is not None and order < self.best_order):
             self.best_target = target_pos
             self.best_position = move
             self.best_item = item
+            self.best_order = order
             self.max_tp = tp
 
     def compute_priority(self, main_target_pos, splash, move, item) -> float:
@@ -716,10 +735,8 @@ class SecondaryAI():
         self.single_move = self.zero_move + equations.parser.movement(self.unit)
         self.double_move = self.single_move + equations.parser.movement(self.unit)
 
-        movement_group = movement_funcs.get_movement_group(self.unit)
-        self.grid = game.board.get_movement_grid(movement_group)
-        self.pathfinder = \
-            pathfinding.AStar(self.unit.position, None, self.grid)
+        self.movement_group = movement_funcs.get_movement_group(self.unit)
+        self.grid = game.board.get_movement_grid(self.movement_group)
 
         self.widen_flag = False  # Determines if we've widened our search
         self.reset()
@@ -784,8 +801,6 @@ class SecondaryAI():
         return False, None
 
     def get_path(self, goal_pos):
-        self.pathfinder.set_goal_pos(goal_pos)
-
         if self.behaviour.target == 'Event':
             adj_good_enough = False
         elif self.behaviour.target == 'Position' and not game.board.get_unit(goal_pos):
@@ -798,12 +813,17 @@ class SecondaryAI():
         limit = self.get_limit()
         if skill_system.pass_through(self.unit):
             can_move_through = lambda adj: True
+            blocking = None
         else:
             can_move_through = functools.partial(game.board.can_move_through, self.unit.team)
+            blocking = self.unit.team
         max_movement_limit = equations.parser.movement(self.unit)
-        path = self.pathfinder.process(can_move_through, adj_good_enough=adj_good_enough, limit=limit, max_movement_limit=max_movement_limit)
-        self.pathfinder.reset()
-        return path
+        # One search answers every target, and is shared with any unit
+        # starting from here that moves and is blocked the same way
+        field = pathfinding.DISTANCE_FIELDS.get(
+            (game.board, game.board.version), (self.movement_group, blocking), self.unit.position, self.grid,
+            can_move_through, max_distance=limit, max_movement_limit=max_movement_limit)
+        return field.get_path(goal_pos, adj_good_enough=adj_good_enough, limit=limit)
 
     def default_priority(self, enemy):
         hp_max = equations.parser.hitpoints(enemy)
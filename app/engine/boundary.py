@@ -1,6 +1,6 @@
 from app.engine.objects.unit import UnitObject
 from app.utilities.typing import Color3, NID, Point
-from typing import Dict, Tuple
+from typing import Dict, Set, Tuple
 from app.constants import TILEWIDTH, TILEHEIGHT
 
 from app.data.database.database import DB
@@ -10,6 +10,18 @@ from app.engine.game_state import game
 
 from app.utilities import utils
 
+class VisibleGrid():
+    """
+    Read-only view of one of the boundary grids that leaves out
+    the units the player can't see through fog of war
+    """
+    def __init__(self, grid, visible_nids: Set[NID]):
+        self.grid = grid
+        self.visible_nids = visible_nids
+
+    def __getitem__(self, idx) -> set:
+        return self.grid[idx] & self.visible_nids
+
 class BoundaryInterface():
     draw_order = ('all_spell', 'all_attack', 'spell', 'attack')
     enemy_teams = DB.teams.enemies
@@ -47,8 +59,15 @@ class BoundaryInterface():
         # Dict[(UnitNid, AuraSkillName)] => (AuraOrigin, AuraRadius, AuraColor)
         self.registered_auras: Dict[Tuple[NID, NID], Tuple[Point, int, Color3, float]] = {}
 
+        # Enemy units whose ranges have to be recalculated before the boundary is next drawn
+        self._pending_units: Set[NID] = set()
+        # Tiles whose boundary image may have changed since the surf was drawn
+        self._dirty_tiles: Set[Point] = set()
+
         self.surf = None
         self.fog_of_war_surf = None
+        # Fog of war config the fog of war surf was drawn with
+        self._fog_of_war_info = None
         self.aura_surf = None
         self.should_reset_surf: bool = False
         self.should_reset_aura_surf: bool = False
@@ -91,8 +110,11 @@ class BoundaryInterface():
         self.should_reset_surf = True
 
     def reset_fog_of_war(self):
+        """
+        Call when what the player can see has changed. The fog of war surf itself
+        is kept up to date from the tiles the board reports as changed
+        """
         self.reset_surf()  # Also needs to reset surf since the units you can see in fog of war may have changed
-        self.fog_of_war_surf = None
 
     def _set(self, positions, mode, nid):
         grid = self.grids[mode]
@@ -100,6 +122,8 @@ class BoundaryInterface():
         for pos in positions:
             grid[pos[0] * self.height + pos[1]].add(nid)
             self.dictionaries[mode][nid].add(pos)
+        if mode != 'movement':
+            self._dirty_tiles |= self.dictionaries[mode][nid]
 
     def clear(self, mode=None):
         if mode:
@@ -110,6 +134,8 @@ class BoundaryInterface():
             for x in range(self.width):
                 for y in range(self.height):
                     self.grids[m][x * self.height + y].clear()
+        if not mode:
+            self._pending_units.clear()
         self.reset_surf()
         self.reset_fog_of_war()
 
@@ -146,47 +172,56 @@ class BoundaryInterface():
         area_of_influence = {pos for pos in area_of_influence if game.board.check_bounds(pos)}
         self._set(area_of_influence, 'movement', unit.nid)
 
-        self.reset_surf()
-
     def _remove_unit(self, unit):
         for mode, grid in self.grids.items():
             if unit.nid in self.dictionaries[mode]:
                 for (x, y) in self.dictionaries[mode][unit.nid]:
                     grid[x * self.height + y].discard(unit.nid)
+                if mode != 'movement':
+                    self._dirty_tiles |= self.dictionaries[mode][unit.nid]
                 # del self.dictionaries[mode][unit.nid]
-        self.reset_surf()
+
+    def _queue_unit(self, unit):
+        """
+        Finding a unit's ranges takes a full valid moves and attackable positions pass,
+        so wait until the boundary is actually drawn. By then, every other unit that
+        was going to move this update has, so each unit is only recalculated once
+        """
+        self._pending_units.add(unit.nid)
+
+    def _add_pending_units(self):
+        pending_units, self._pending_units = self._pending_units, set()
+        for nid in pending_units:
+            unit = game.get_unit(nid)
+            if unit and unit.position:
+                self._add_unit(unit)
 
     def recalculate_unit(self, unit: UnitObject):
         if unit.team in self.enemy_teams:
             self._remove_unit(unit)
             if unit.position:
-                self._add_unit(unit)
+                self._queue_unit(unit)
 
     def leave(self, unit):
         if unit.team in self.enemy_teams:
             self._remove_unit(unit)
+            self._pending_units.discard(unit.nid)
 
         # Update ranges of other units that might be affected by my leaving
+        # They are recalculated later, once I'm no longer on the board
         if unit.position:
             x, y = unit.position
             other_units = {game.get_unit(nid) for nid in self.grids['movement'][x * self.height + y]}
             other_units = {other_unit for other_unit in other_units if unit.team not in DB.teams.get_allies(other_unit.team)}
 
-            # Set unit's position to non-existent for a brief momement
-            game.board.remove_unit(unit.position, unit)
-            unit.position = None
             for other_unit in other_units:
                 self._remove_unit(other_unit)
-            for other_unit in other_units:
-                if other_unit.position:
-                    self._add_unit(other_unit)
-            unit.position = (x, y)  # Reset it back for future
-            game.board.set_unit(unit.position, unit)
+                self._queue_unit(other_unit)
 
     def arrive(self, unit):
         if unit.position:
             if unit.team in self.enemy_teams:
-                self._add_unit(unit)
+                self._queue_unit(unit)
 
             # Update ranges of other units that might be affected by my arrival
             x, y = unit.position
@@ -196,16 +231,14 @@ class BoundaryInterface():
 
             for other_unit in other_units:
                 self._remove_unit(other_unit)
-            for other_unit in other_units:
-                if other_unit.position:
-                    self._add_unit(other_unit)
+                self._queue_unit(other_unit)
 
     # Called when map changes
     def reset(self):
         self.clear()
         for unit in game.units:
             if unit.position and unit.team in self.enemy_teams:
-                self._add_unit(unit)
+                self._queue_unit(unit)
 
     def toggle_all_enemy_attacks(self):
         if self.all_on_flag:
@@ -245,12 +278,60 @@ class BoundaryInterface():
         if not self.draw_flag:
             return surf
 
-        if self.should_reset_surf and not self.frozen:
-            self.surf = None
-            self.should_reset_surf = False
+        if not self.frozen or not self.surf:
+            self._add_pending_units()
+            if self.should_reset_surf or not self.surf:
+                self.should_reset_surf = False
+                self._dirty_tiles.clear()
+                if not self.surf:
+                    self.surf = engine.create_surface(full_size, transparent=True)
+                self.surf.fill((0, 0, 0, 0))
+                # Empty cells draw nothing, so only the tiles in someone's range need drawing
+                tiles = set()
+                for mode in ('attack', 'spell'):
+                    for positions in self.dictionaries[mode].values():
+                        tiles |= positions
+                self._draw_tiles(tiles)
+            elif self._dirty_tiles:
+                # A tile's image depends on its neighbours, so they need redrawing too
+                tiles = set()
+                for x, y in self._dirty_tiles:
+                    tiles.update(((x, y), (x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1)))
+                self._dirty_tiles.clear()
+                self._draw_tiles(tiles)
+
+        im = engine.subsurface(self.surf, cull_rect)
+        surf.blit(im, (0, 0))
+        return surf
+
+    def _get_draw_grids(self) -> dict:
+        attack_grid = self.grids['attack']
+        spell_grid = self.grids['spell']
+        # Remove all units that we shouldn't be able to see from the boundary
+        # Fog of War application
+        if game.get_current_fog_info().is_active or game.board.fog_region_set:
+            visible_nids = set()
+            for mode in ('attack', 'spell'):
+                for nid in self.dictionaries[mode]:
+                    unit = game.get_unit(nid)
+                    # Units that left the map keep their (now empty) entry
+                    if unit and unit.position and game.board.in_vision(unit.position):
+                        visible_nids.add(nid)
+            attack_grid = VisibleGrid(attack_grid, visible_nids)
+            spell_grid = VisibleGrid(spell_grid, visible_nids)
+        return {'all_attack': attack_grid, 'attack': attack_grid,
+                'all_spell': spell_grid, 'spell': spell_grid}
+
+    def _draw_tiles(self, tiles):
+        grids = self._get_draw_grids()
+        for x, y in tiles:
+            # Only make boundaries within game board bounds
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                continue
+            self.surf.fill((0, 0, 0, 0), (x * TILEWIDTH, y * TILEHEIGHT, TILEWIDTH, TILEHEIGHT))
+            if not game.board.check_bounds((x, y)):
+                continue
 
-        if not self.surf:
-            self.surf = engine.create_surface(full_size, transparent=True)
             for grid_name in self.draw_order:
                 # Check whether we can skip this boundary interface
                 if grid_name == 'attack' and not self.displaying_units:
@@ -262,51 +343,28 @@ class BoundaryInterface():
                 elif grid_name == 'all_spell' and not self.all_on_flag:
                     continue
 
-                if grid_name == 'all_attack' or grid_name == 'attack':
-                    grid = self.grids['attack']
-                else:
-                    grid = self.grids['spell']
-
-                # Remove all units that we shouldn't be able to see from the boundary
-                # Fog of War application
-                if game.get_current_fog_info().is_active or game.board.fog_region_set:
-                    new_grid = []
-                    for cell in grid:
-                        new_grid.append({nid for nid in cell if game.board.in_vision(game.get_unit(nid).position)})
-                else:
-                    new_grid = grid
-
-                for y in range(self.height):
-                    for x in range(self.width):
-                        # Only make boundaries within game board bounds
-                        if not game.board.check_bounds((x, y)):
-                            continue
-
-                        cell = new_grid[x * self.height + y]
-                        if cell:
-                            # Determine whether this tile should have a red display
-                            red_display = False
-                            for nid in cell:
-                                if nid in self.displaying_units:
-                                    red_display = True
-                                    break
-
-                            if grid_name == 'all_attack' and red_display:
-                                continue
-                            if grid_name == 'all_spell' and red_display:
-                                continue
-
-                            if grid_name == 'attack' and not red_display:
-                                continue
-                            if grid_name == 'spell' and not red_display:
-                                continue
-
-                            image = self.create_image(new_grid, x, y, grid_name)
-                            self.surf.blit(image, (x * TILEWIDTH, y * TILEHEIGHT))
-
-        im = engine.subsurface(self.surf, cull_rect)
-        surf.blit(im, (0, 0))
-        return surf
+                grid = grids[grid_name]
+                cell = grid[x * self.height + y]
+                if cell:
+                    # Determine whether this tile should have a red display
+                    red_display = False
+                    for nid in cell:
+                        if nid in self.displaying_units:
+                            red_display = True
+                            break
+
+                    if grid_name == 'all_attack' and red_display:
+                        continue
+                    if grid_name == 'all_spell' and red_display:
+                        continue
+
+                    if grid_name == 'attack' and not red_display:
+                        continue
+                    if grid_name == 'spell' and not red_display:
+                        continue
+
+                    image = self.create_image(grid, x, y, grid_name)
+                    self.surf.blit(image, (x * TILEWIDTH, y * TILEHEIGHT))
 
     def create_image(self, grid, x, y, grid_name):
         top_pos = (x, y - 1)
@@ -336,18 +394,31 @@ class BoundaryInterface():
         idx = top*8 + left*4 + right*2 + bottom  # Binary logis to get correct index
         return engine.subsurface(self.modes[grid_name], (idx * TILEWIDTH, 0, TILEWIDTH, TILEHEIGHT))
 
+    def _draw_fog_of_war_tile(self, pos: Point):
+        is_in_vision = game.board.in_vision(pos)
+        if not is_in_vision:
+            if game.board.terrain_known(pos, is_in_vision):
+                image = self.fog_of_war_tile1
+            else:
+                image = self.fog_of_war_tile2
+            self.fog_of_war_surf.blit(image, (pos[0] * TILEWIDTH, pos[1] * TILEHEIGHT))
+
     def draw_fog_of_war(self, surf, full_size, cull_rect):
-        if game.get_current_fog_info().is_active or game.board.fog_region_set:
-            if not self.fog_of_war_surf:
+        fog_info = game.get_current_fog_info()
+        if fog_info.is_active or game.board.fog_region_set:
+            changes = game.board.pop_vision_changes()
+            if not self.fog_of_war_surf or changes is None or fog_info != self._fog_of_war_info:
                 self.fog_of_war_surf = engine.create_surface(full_size, transparent=True)
+                self._fog_of_war_info = fog_info
                 for (y, x) in utils.itergrid(self.height, self.width):
-                    is_in_vision = game.board.in_vision((x, y))
-                    if not is_in_vision:
-                        if game.board.terrain_known((x, y), is_in_vision):
-                            image = self.fog_of_war_tile1
-                        else:
-                            image = self.fog_of_war_tile2
-                        self.fog_of_war_surf.blit(image, (x * TILEWIDTH, y * TILEHEIGHT))
+                    self._draw_fog_of_war_tile((x, y))
+            else:
+                # Only redraw the tiles whose visibility might have changed
+                for (x, y) in changes:
+                    if 0 <= x < self.width and 0 <= y < self.height:
+                        rect = (x * TILEWIDTH, y * TILEHEIGHT, TILEWIDTH, TILEHEIGHT)
+                        engine.fill(self.fog_of_war_surf, (0, 0, 0, 0), rect)
+                        self._draw_fog_of_war_tile((x, y))
 
             im = engine.subsurface(self.fog_of_war_surf, cull_rect)
             surf.blit(im, (0, 0))
@@ -123,23 +123,22 @@ def generate_item_hook_str(hook_name: str, hook_info: HookInfo):
     if hook_info.has_default_value:
         default_handling = "return result if values else Defaults.{hook_name}({args})".format(hook_name=hook_name, args=', '.join(args))
     if hook_info.inherits_parent:
-        inheritance_handling = """
-            if item.parent_item:
-                orig_item = item
-                item = item.parent_item
-                for component in item.components:
-                    if component.defines('{hook_name}'):
-                        values.append(component.{hook_name}({args}))
-                item = orig_item
+        inheritance_handling = """        if item.parent_item:
+            orig_item = item
+            item = item.parent_item
+            for component in item.components:
+                if component.defines('{hook_name}'):
+                    values.append(component.{hook_name}({args}))
+            item = orig_item
 """.format(hook_name=hook_name, args=', '.join(args))
 
     func_text = """
 def {hook_name}({func_signature}):
-    all_components = get_all_components(unit, item)
+    from app.engine import skill_system
+    override_components = [component for component in skill_system.item_override(unit, item) if component.defines('{hook_name}')]
     values = []
-    for component in all_components:
-        if component.defines('{hook_name}'):
-            values.append(component.{hook_name}({args}))
+    for component in get_item_hook_components(item, '{hook_name}') + override_components:
+        values.append(component.{hook_name}({args}))
 {inheritance_handling}
     result = utils.{policy_resolution}(values)
     {default_handling}
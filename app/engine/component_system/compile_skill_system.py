@@ -2,49 +2,50 @@ from __future__ import annotations
 from typing import Any, Dict
 from app.engine.codegen.codegen_utils import get_codegen_header
 from app.engine.component_system.utils import ARG_TYPE_MAP, HookInfo, ResolvePolicy
+from app.engine.utils.ltcache import BOARD, SKILLS
 
 SKILL_HOOKS: Dict[str, HookInfo] = {
     # true priority (set to False if result is False in any component, True if not defined)
     'available':                            HookInfo(['unit', 'item'], ResolvePolicy.ALL_DEFAULT_TRUE),
-    'can_counter':                          HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_TRUE),
+    'can_counter':                          HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_TRUE, is_cached=True, depends_on=(SKILLS,)),
     # false priority (set to False if result is False in any component, False if not defined)
-    'pass_through':                         HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'vantage':                              HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'desperation':                          HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'ignore_terrain':                       HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'crit_anyway':                          HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'ignore_region_status':                 HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'no_double':                            HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'def_double':                           HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'ignore_rescue_penalty':                HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'ignore_forced_movement':               HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'distant_counter':                      HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'ignore_fatigue':                       HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'no_attack_after_move':                 HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'has_dynamic_range':                    HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
+    'pass_through':                         HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'vantage':                              HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'desperation':                          HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'ignore_terrain':                       HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'crit_anyway':                          HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'ignore_region_status':                 HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'no_double':                            HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'def_double':                           HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'ignore_rescue_penalty':                HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'ignore_forced_movement':               HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'distant_counter':                      HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'ignore_fatigue':                       HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'no_attack_after_move':                 HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
+    'has_dynamic_range':                    HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
     'disvantage':                           HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'close_counter':                        HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
+    'close_counter':                        HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
     'attack_stance_double':                 HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
     'show_skill_icon':                      HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
     'hide_skill_icon':                      HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
     'ignore_dying_in_combat':               HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
-    'no_trade':                             HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE),
+    'no_trade':                             HookInfo(['unit'], ResolvePolicy.ALL_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
     # false priority, true if any (set to True if result is True in any component, False if not defined)
     'can_unlock':                           HookInfo(['unit', 'region'], ResolvePolicy.ANY_DEFAULT_FALSE),
     'has_canto':                            HookInfo(['unit', 'target'], ResolvePolicy.ANY_DEFAULT_FALSE),
-    'has_immune':                           HookInfo(['unit'], ResolvePolicy.ANY_DEFAULT_FALSE),
+    'has_immune':                           HookInfo(['unit'], ResolvePolicy.ANY_DEFAULT_FALSE, is_cached=True, depends_on=(SKILLS,)),
     # exclusive (returns last component value, returns None if not defined)
     'alternate_splash':                     HookInfo(['unit'], ResolvePolicy.UNIQUE),
     # exclusive (returns last component value, has default value if not defined)
     'can_select':                           HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True),
-    'movement_type':                        HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True),
-    'num_items_offset':                     HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True),
-    'num_accessories_offset':               HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True),
-    'change_variant':                       HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True),
-    'change_animation':                     HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True),
-    'change_ai':                            HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True),
+    'movement_type':                        HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True, is_cached=True, depends_on=(SKILLS,)),
+    'num_items_offset':                     HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True, is_cached=True, depends_on=(SKILLS,)),
+    'num_accessories_offset':               HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True, is_cached=True, depends_on=(SKILLS,)),
+    'change_variant':                       HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True, is_cached=True, depends_on=(SKILLS,)),
+    'change_animation':                     HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True, is_cached=True, depends_on=(SKILLS,)),
+    'change_ai':                            HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True, is_cached=True, depends_on=(SKILLS,)),
     'change_roam_ai':                       HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True),
-    'witch_warp':                           HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True, is_cached=True),
+    'witch_warp':                           HookInfo(['unit'], ResolvePolicy.UNIQUE, has_default_value=True, is_cached=True, depends_on=(SKILLS, BOARD)),
     # numeric accum (adds together all values. 0 if no values are defined)
     'sight_range':                          HookInfo(['unit'], ResolvePolicy.NUMERIC_ACCUM, has_default_value=True),
     # formula (as exclusive)
@@ -157,33 +158,42 @@ def generate_skill_hook_str(hook_name: str, hook_info: HookInfo):
 
     conditional_check = "condition(skill, unit)" if 'item' not in args else 'condition(skill, unit, item)'
     default_handling = "return result"
+    hook_names = "('{hook_name}',)".format(hook_name=hook_name)
+    hook_handling = """
+        if component.ignore_conditional or {conditional_check}:
+            values.append(component.{hook_name}({args}))""".format(hook_name=hook_name, conditional_check=conditional_check, args=', '.join(args))
     unconditional_handling = ""
     cache_handling = ""
     if hook_info.has_default_value:
         default_handling = "return result if values else Defaults.{hook_name}({args})".format(hook_name=hook_name, args=', '.join(args))
     if hook_info.has_unconditional:
+        # The dispatch index holds components defining either hook, so check which ones this component has
+        hook_names = "('{hook_name}', '{hook_name}_unconditional')".format(hook_name=hook_name)
+        hook_handling = """
+        if component.defines('{hook_name}'):
+            if component.ignore_conditional or {conditional_check}:
+                values.append(component.{hook_name}({args}))""".format(hook_name=hook_name, conditional_check=conditional_check, args=', '.join(args))
         unconditional_handling = """
-            if component.defines('{hook_name}_unconditional'):
-                values.append(component.{hook_name}_unconditional({args}))
-""".format(hook_name=hook_name, args=', '.join(args))
-    if hook_info.is_cached:
+        if component.defines('{hook_name}_unconditional'):
+            values.append(component.{hook_name}_unconditional({args}))""".format(hook_name=hook_name, args=', '.join(args))
+    if hook_info.is_cached and hook_info.depends_on:
+        cache_handling = """
+@ltcached(depends_on=({tags},))""".format(tags=', '.join('ltcache.%s' % tag.upper() for tag in hook_info.depends_on))
+    elif hook_info.is_cached:
         cache_handling = """
 @ltcached"""
 
     func_text = """{cache_handling}
 def {hook_name}({func_signature}):
     values = []
-    for skill in unit.skills[:]:
-        for component in skill.components:
-            if component.defines('{hook_name}'):
-                if component.ignore_conditional or {conditional_check}:
-                    values.append(component.{hook_name}({args}))
-{unconditional_handling}
+    for skill, component in get_skill_hook_components(unit, {hook_names}):{hook_handling}{unconditional_handling}
+
     result = utils.{policy_resolution}(values)
     {default_handling}
 """.format(hook_name=hook_name,
            func_signature=', '.join(func_signature),
-           conditional_check=conditional_check,
+           hook_names=hook_names,
+           hook_handling=hook_handling,
            args=', '.join(args),
            policy_resolution=hook_info.policy.value,
            default_handling=default_handling,
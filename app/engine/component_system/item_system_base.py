@@ -83,6 +83,24 @@ class Defaults():
     def weapon_triangle_override(unit: UnitObject, item: ItemObject):
         return None
 
+def get_item_hook_components(item: ItemObject, hook_name: str) -> list:
+    """
+    Returns the item's own components that define the hook, in order.
+    Cached on the item until any item's components change
+    """
+    if not item:
+        return []
+    components = item.components
+    index = getattr(item, '_hook_index', None)
+    if not isinstance(index, utils.HookIndex) or not index.is_valid(components):
+        index = utils.HookIndex(components)
+        item._hook_index = index
+    hook_components = index.hooks.get(hook_name)
+    if hook_components is None:
+        hook_components = [component for component in components if component.defines(hook_name)]
+        index.hooks[hook_name] = hook_components
+    return hook_components
+
 def get_all_components(unit: UnitObject, item: ItemObject) -> list:
     from app.engine import skill_system
     override_components = skill_system.item_override(unit, item)
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Tuple
 
 from app.engine.component_system import utils
+from app.engine.utils import ltcache
 from app.engine.utils.ltcache import ltcached
 
 if TYPE_CHECKING:
+    from app.data.database.skill_components import SkillComponent
     from app.engine.objects.item import ItemObject
+    from app.engine.objects.skill import SkillObject
     from app.engine.objects.unit import UnitObject
 
 class Defaults():
@@ -163,13 +166,40 @@ class Defaults():
     def thracia_critical_multiplier_formula(unit) -> str:
         return 'THRACIA_CRIT'
 
-@ltcached
+def get_skill_hook_components(unit: UnitObject, hook_names: Tuple[str, ...]) -> List[Tuple[SkillObject, SkillComponent]]:
+    """
+    Returns every (skill, component) pair on the unit whose component
+    defines any of the hook names, in skill then component order.
+    Cached on the unit until its skills or any skill's components change.
+    Marks the calls being cached as depending on the whole game state
+    if any of those components is not builtin
+    """
+    skills = unit.skills
+    index = getattr(unit, '_skill_hook_index', None)
+    if not isinstance(index, utils.HookIndex) or not index.is_valid(skills):
+        index = utils.HookIndex(skills)
+        unit._skill_hook_index = index
+    entries = index.hooks.get(hook_names)
+    if entries is None:
+        entries = [(skill, component) for skill in skills for component in skill.components
+                   if any(component.defines(hook_name) for hook_name in hook_names)]
+        index.hooks[hook_names] = entries
+        if not all(utils.is_builtin_component(component) for _, component in entries):
+            index.volatile.add(hook_names)
+    if hook_names in index.volatile:
+        # A custom component could read anything, so a cached hook can't trust its tags
+        ltcache.depends_on_game_state()
+    return entries
+
+@ltcached(depends_on=(ltcache.SKILLS,))
 def condition(skill, unit: UnitObject, item=None) -> bool:
     # print('Checking condition for', skill, unit, item)
     if not item:
         item = unit.equipped_weapon
     for component in skill.components:
         if component.defines('condition'):
+            # A condition could check anything about the game
+            ltcache.depends_on_game_state()
             if not component.condition(unit, item):
                 return False
     return True
@@ -182,30 +212,26 @@ def hidden(skill, unit) -> bool:
 
 def stat_change(unit, stat_nid) -> int:
     bonus = 0
-    for skill in unit.skills:
-        for component in skill.components:
-            if component.defines('stat_change'):
-                d = component.stat_change(unit)
-                d_bonus = d.get(stat_nid, 0)
-                if d_bonus == 0:
-                    continue
-                # Why did we write the component condition check after the evaluation of the bonus?
-                # Was there a good reason?
-                if component.ignore_conditional or condition(skill, unit):
-                    bonus += d_bonus
+    for skill, component in get_skill_hook_components(unit, ('stat_change',)):
+        d = component.stat_change(unit)
+        d_bonus = d.get(stat_nid, 0)
+        if d_bonus == 0:
+            continue
+        # Why did we write the component condition check after the evaluation of the bonus?
+        # Was there a good reason?
+        if component.ignore_conditional or condition(skill, unit):
+            bonus += d_bonus
     return bonus
 
 def subtle_stat_change(unit, stat_nid) -> int:
     bonus = 0
-    for skill in unit.skills:
-        for component in skill.components:
-            if component.defines('subtle_stat_change'):
-                d = component.subtle_stat_change(unit)
-                d_bonus = d.get(stat_nid, 0)
-                if d_bonus == 0:
-                    continue
-                if component.ignore_conditional or condition(skill, unit):
-                    bonus += d_bonus
+    for skill, component in get_skill_hook_components(unit, ('subtle_stat_change',)):
+        d = component.subtle_stat_change(unit)
+        d_bonus = d.get(stat_nid, 0)
+        if d_bonus == 0:
+            continue
+        if component.ignore_conditional or condition(skill, unit):
+            bonus += d_bonus
     return bonus
 
 def stat_change_contribution(unit, stat_nid) -> dict:
@@ -225,22 +251,20 @@ def stat_change_contribution(unit, stat_nid) -> dict:
 
 def growth_change(unit, stat_nid) -> int:
     bonus = 0
-    for skill in unit.skills:
-        for component in skill.components:
-            if component.defines('growth_change'):
-                if component.ignore_conditional or condition(skill, unit):
-                    d = component.growth_change(unit)
-                    bonus += d.get(stat_nid, 0)
+    for skill, component in get_skill_hook_components(unit, ('growth_change',)):
+        if component.ignore_conditional or condition(skill, unit):
+            d = component.growth_change(unit)
+            bonus += d.get(stat_nid, 0)
     return bonus
 
+@ltcached(depends_on=(ltcache.SKILLS,))
 def unit_sprite_flicker_tint(unit) -> list:
+    # Called every frame for every unit on the map
     flicker = []
-    for skill in unit.skills:
-        for component in skill.components:
-            if component.defines('unit_sprite_flicker_tint'):
-                if component.ignore_conditional or condition(skill, unit):
-                    d = component.unit_sprite_flicker_tint(unit, skill)
-                    flicker.append(d)
+    for skill, component in get_skill_hook_components(unit, ('unit_sprite_flicker_tint',)):
+        if component.ignore_conditional or condition(skill, unit):
+            d = component.unit_sprite_flicker_tint(unit, skill)
+            flicker.append(d)
     return flicker
 
 def should_draw_anim(unit) -> list:
@@ -499,21 +523,20 @@ def item_override(unit, item: ItemObject):
     components_so_far = set()
     if not unit or not item:
         return all_override_components
-    for skill in reversed(unit.skills):
-        for component in skill.components:
-            if component.nid == 'item_override':
-                # Conditions for item overrides might rely on e.g.
-                # what item is equipped, which would itself
-                # make an item override call on the same skill.
-                # Therefore, we simply assume - probably safely -
-                # that the skill cannot influence its own condition.
-                if skill.nid not in item_override_recursion_stack:
-                    item_override_recursion_stack.add(skill.nid)
-                    if condition(skill, unit):
-                        new_override_components = list(component.get_components(unit))
-                        new_override_components = [comp for comp in new_override_components if comp.nid not in components_so_far]
-                        components_so_far |= set([comp.nid for comp in new_override_components])
-                        all_override_components += new_override_components
-                    item_override_recursion_stack.remove(skill.nid)
-                break
+    # A skill can only have one item_override component
+    for skill, component in reversed(get_skill_hook_components(unit, ('get_components',))):
+        if component.nid == 'item_override':
+            # Conditions for item overrides might rely on e.g.
+            # what item is equipped, which would itself
+            # make an item override call on the same skill.
+            # Therefore, we simply assume - probably safely -
+            # that the skill cannot influence its own condition.
+            if skill.nid not in item_override_recursion_stack:
+                item_override_recursion_stack.add(skill.nid)
+                if condition(skill, unit):
+                    new_override_components = list(component.get_components(unit))
+                    new_override_components = [comp for comp in new_override_components if comp.nid not in components_so_far]
+                    components_so_far |= set([comp.nid for comp in new_override_components])
+                    all_override_components += new_override_components
+                item_override_recursion_stack.remove(skill.nid)
     return all_override_components
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Set, Tuple
 from functools import reduce
 import operator
 
@@ -37,6 +37,46 @@ class HookInfo():
     has_unconditional: bool = False
     inherits_parent: bool = False
     is_cached: bool = False
+    # If cached, the ltcache dependency tags the hook depends on. None means the whole game state
+    depends_on: Optional[Tuple[str, ...]] = None
+
+"""
+Dispatch indices go here
+"""
+
+# Bumped whenever a component is added to or removed from any skill or item
+# so every dispatch index built before then knows it is stale
+_component_generation: int = 0
+
+def invalidate_hook_indices():
+    global _component_generation
+    _component_generation += 1
+
+# Hooks marked is_cached only hold for the builtin components, which
+# return values that depend on nothing but the component itself.
+# A project's custom components make no such promise
+BUILTIN_COMPONENT_MODULES = ('app.engine.skill_components.', 'app.engine.item_components.')
+
+def is_builtin_component(component) -> bool:
+    return type(component).__module__.startswith(BUILTIN_COMPONENT_MODULES)
+
+class HookIndex():
+    """
+    Maps hook names to the components that define them, in the order
+    the hook visits them. Only valid for the exact skill list or component
+    Data it was built from, and only until the next invalidate_hook_indices
+    """
+    __slots__ = ['source', 'generation', 'hooks', 'volatile']
+
+    def __init__(self, source):
+        self.source = source
+        self.generation: int = _component_generation
+        self.hooks: Dict[Any, Any] = {}
+        # Hook names whose components are not all builtin
+        self.volatile: Set[Any] = set()
+
+    def is_valid(self, source) -> bool:
+        return self.source is source and self.generation == _component_generation
 
 
 """
@@ -12,6 +12,7 @@ from app.engine.objects.unit import UnitObject
 from app.engine.sound import get_sound_thread
 from app.engine.sprites import SPRITES
 from app.engine.state import MapState
+from app.engine.utils import ltcache
 from app.events import event_commands
 from app.events.triggers import GenericTrigger
 from app.utilities.enums import HAlignment
@@ -70,6 +71,9 @@ class DebugState(MapState):
             get_sound_thread().play_sfx('Select 4')
             game.state.back()
             return
+        if command == 'cache_stats':
+            ltcache.log_cache_stats()
+            return
 
         event_command, error_loc = event_commands.parse_text_to_command(command)
         if not event_command:
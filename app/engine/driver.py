@@ -9,6 +9,7 @@ from app.utilities import file_utils
 
 from app.constants import WINWIDTH, WINHEIGHT, VERSION, FPS
 from app.engine import engine
+from app.engine.frame_profiler import PROFILER
 
 import app.engine.config as cf
 
@@ -46,6 +47,10 @@ def start(title, from_editor=False):
     # because they could have changed.
     battle_animation.battle_anim_registry.clear()
 
+    from app.events.python_eventing import compiler
+    # Keep compiled python events between sessions
+    compiler.COMPILED_EVENT_CACHE.set_cache_dir('saves/event_cache')
+
     # Hack to get icon to show up in windows
     try:
         import ctypes
@@ -92,6 +97,23 @@ def draw_fps(surf, fps_records):
     FONT['small-white'].blit(str(fps), surf, (surf.get_width() - 20, 0))
     FONT['small-white'].blit(str(min_fps), surf, (surf.get_width() - 20, 12))
 
+def draw_profiler(surf):
+    from app.engine.fonts import FONT
+    avg_frame, max_frame = PROFILER.get_frame_times()
+    lines = ['frame %.1f / %.1f' % (avg_frame, max_frame)]
+    lines += ['%s %.1f' % (label, ms) for label, ms in PROFILER.get_breakdown()[:8]]
+    # Right aligned, to the left of the fps counter
+    for idx, line in enumerate(lines):
+        FONT['small-white'].blit(line, surf, (surf.get_width() - 24 - FONT['small-white'].width(line), idx * 12))
+
+def handle_profiler_keys(raw_events: list):
+    for e in raw_events:
+        if e.type == engine.KEYDOWN and e.key == engine.key_map['f11']:
+            PROFILER.set_enabled(not PROFILER.enabled)
+        elif e.type == engine.KEYDOWN and e.key == engine.key_map['f10'] and PROFILER.frames:
+            path = PROFILER.export()
+            logging.info("Wrote frame profile to %s", path)
+
 def draw_soft_reset(surf, remaining_time: int):
     from app.engine.fonts import FONT
     FONT['chapter-yellow'].blit(str(remaining_time), surf, (surf.get_width()//2 - 4, surf.get_height()//2 - 4))
@@ -121,8 +143,11 @@ def run(game):
     _error_msg = ''
     _soft_reset_start_time: int = None  # UTC time.time()
     SOFT_RESET_TIME = 3  # seconds
+    if _profile:
+        PROFILER.set_enabled(True)
     while True:
         start = time.perf_counter_ns()
+        PROFILER.begin_frame()
 
         engine.update_time()
         fps_records.append(engine.get_delta())
@@ -167,6 +192,8 @@ def run(game):
 
                 if cf.SETTINGS['display_fps']:
                     draw_fps(surf, fps_records)
+                if PROFILER.enabled:
+                    draw_profiler(surf)
                 if _soft_reset_start_time:
                     draw_soft_reset(surf, math.ceil(SOFT_RESET_TIME - (time.time() - _soft_reset_start_time)))
             except Exception as e:
@@ -178,13 +205,21 @@ def run(game):
                 if cf.SETTINGS['debug']:
                     raise e
 
+        start_time = PROFILER.mark()
         get_sound_thread().update(raw_events)
+        PROFILER.record('sound', '', start_time)
 
+        start_time = PROFILER.mark()
         engine.push_display(surf, engine.get_screensize(), engine.DISPLAYSURF)
+        PROFILER.record('push_display', '', start_time)
 
         save_screenshot(raw_events, surf)
+        handle_profiler_keys(raw_events)
 
+        start_time = PROFILER.mark()
         engine.update_display()
+        PROFILER.record('update_display', '', start_time)
+        PROFILER.end_frame()
 
         end = time.perf_counter_ns()
         ms_elapsed = (end - start) / 1e6
@@ -245,6 +245,8 @@ key_map = {"enter": pygame.K_RETURN,
            "tab": pygame.K_TAB,
            "backspace": pygame.K_BACKSPACE,
            "pageup": pygame.K_PAGEUP,
+           "f10": pygame.K_F10,
+           "f11": pygame.K_F11,
            "f12": pygame.K_F12,
            "`": pygame.K_BACKQUOTE,
            "1": pygame.K_1,
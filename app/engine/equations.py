@@ -10,6 +10,8 @@ class Parser():
                 self.equations[equation.nid] = self.tokenize(equation.expression)
 
         self.replacement_dict = self.create_replacement_dict()
+        # Expression: compiled code, for get_expression
+        self.expressions = {}
 
         for nid in list(self.equations.keys()):
             expression = self.equations[nid]
@@ -45,18 +47,22 @@ class Parser():
             return self.equations[lhs](self.equations, unit)
         return 0
 
+    def compile_expression(self, expr):
+        tokens = self.tokenize(expr)
+        tokens = [self.replacement_dict.get(n, n) for n in tokens]
+        rhs = ''.join(tokens)
+        if 'float' in rhs:
+            pass  # Don't need to convert if you are turning it into a float
+        else:
+            rhs = 'int(%s)' % rhs
+        return compile(rhs, '<string>', 'eval')
+
     def get_expression(self, expr, unit):
         # For one time use
         # Can't seem to be used with any sub equations
-        expr = self.tokenize(expr)
-        expr = [self.replacement_dict.get(n, n) for n in expr]
-        expr = ''.join(expr)
-        if 'float' in expr:
-            pass  # Don't need to convert if you are turning it into a float
-        else:
-            expr = 'int(%s)' % expr
-        equations = self.equations
-        return eval(expr)
+        if expr not in self.expressions:
+            self.expressions[expr] = self.compile_expression(expr)
+        return eval(self.expressions[expr], globals(), {'equations': self.equations, 'unit': unit})
 
     def get_mana(self, unit):
         if hasattr(self, 'mana'):
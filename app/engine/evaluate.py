@@ -1,6 +1,8 @@
+import functools
 import logging
 import math, random, re
-from typing import Any, Dict
+from collections import ChainMap
+from typing import Any, Dict, Optional
 
 from app.utilities import utils, static_random
 from app.data.database.database import DB
@@ -11,12 +13,44 @@ from app.engine.persistent_records import RECORDS
 from app.engine import engine, item_funcs, item_system, skill_system, \
     combat_calcs, unit_funcs
 from app.engine.movement import movement_funcs
+from app.engine.utils import ltcache
 
 """
 Essentially just a repository that imports a lot of different things so that many different eval calls
 will be accepted
 """
 
+class EvalNamespace(dict):
+    """
+    Namespace for evaling expressions. Holds only the names specific to one call,
+    and looks up everything else (this module's imports, the query functions)
+    in a base namespace that is shared between calls instead of copied for each one
+    """
+    def __init__(self, base: ChainMap, local_names: Dict):
+        super().__init__(local_names)
+        self.base = base
+
+    def __missing__(self, key):
+        return self.base[key]
+
+# The query engine's func_dict the base namespace was built from, and the base namespace
+_base_namespace: Optional[tuple] = None
+
+def get_base_namespace(game) -> ChainMap:
+    global _base_namespace
+    func_dict = game.query_engine.func_dict if game else {}
+    if _base_namespace is None or _base_namespace[0] is not func_dict:
+        _base_namespace = (func_dict, ChainMap(func_dict, globals()))
+    return _base_namespace[1]
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(string: str):
+    """
+    Expressions are mostly the same few event and component conditions
+    evaluated over and over, so only parse each one once
+    """
+    return compile(string.strip(), '<string>', 'eval')
+
 def get_context(unit1=None, unit2=None, position=None,
                 local_args: Dict = None, game=None) -> Dict:
     """
@@ -47,8 +81,7 @@ def get_context(unit1=None, unit2=None, position=None,
         else:
             return False
 
-    temp_globals = globals().copy()
-    temp_globals.update({
+    local_names = {
         'unit1': unit1,
         'unit': unit1,
         'unit2': unit2,
@@ -58,15 +91,14 @@ def get_context(unit1=None, unit2=None, position=None,
         'check_default': check_default,
         'game': game,
         'target_system': game.target_system,
-    })
-    if game:
-        temp_globals.update(game.query_engine.func_dict)
+    }
     if local_args:
-        temp_globals.update(local_args)
-    return temp_globals
+        local_names.update(local_args)
+    return EvalNamespace(get_base_namespace(game), local_names)
 
 def evaluate(string: str, unit1=None, unit2=None, position=None,
              local_args: Dict = None, game=None) -> Any:
+    # A user expression could read any part of the game state
+    ltcache.depends_on_game_state()
     context = get_context(unit1, unit2, position, local_args, game)
-    string = string.strip()
-    return eval(string, context)
+    return eval(compile_expression(string), context)
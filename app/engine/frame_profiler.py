@@ -0,0 +1,117 @@
+"""
+Per frame timings of the engine loop, broken down by state machine phase.
+
+Off unless LT_PROFILE is set or it is toggled on in game with F11.
+While on, the last several seconds of frames are kept in a ring buffer and
+the slowest phases are drawn beside the fps counter. F10 writes the buffer
+out as Chrome trace events, which chrome://tracing or ui.perfetto.dev can open.
+"""
+import collections
+import json
+import os
+import time
+from datetime import datetime
+from typing import Deque, Dict, List, NamedTuple, Tuple
+
+from app.constants import FPS
+
+class Span(NamedTuple):
+    name: str  # State nid, or the part of the engine loop
+    phase: str  # start, begin, take_input, update, draw, end, or empty for engine loop parts
+    start: int  # In ns, from time.perf_counter_ns
+    end: int
+
+    @property
+    def label(self) -> str:
+        return '%s.%s' % (self.name, self.phase) if self.phase else self.name
+
+class Frame(NamedTuple):
+    start: int
+    end: int
+    spans: List[Span]
+
+class FrameProfiler():
+    def __init__(self, max_frames: int = FPS * 10):
+        self.enabled: bool = False
+        self.frames: Deque[Frame] = collections.deque(maxlen=max_frames)
+        self._frame_start: int = 0
+        self._spans: List[Span] = []
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        self.frames.clear()
+        self._frame_start = 0
+        self._spans = []
+
+    def mark(self) -> int:
+        """
+        Call before the work to time, and pass what it returns to record
+        """
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def record(self, name: str, phase: str, start: int):
+        if self.enabled and start:
+            self._spans.append(Span(name, phase, start, time.perf_counter_ns()))
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter_ns()
+            self._spans = []
+
+    def end_frame(self):
+        # Skips the frame it was turned on in the middle of
+        if self.enabled and self._frame_start:
+            self.frames.append(Frame(self._frame_start, time.perf_counter_ns(), self._spans))
+            self._spans = []
+
+    def get_breakdown(self, num_frames: int = FPS) -> List[Tuple[str, float]]:
+        """
+        Returns the average ms per frame spent in each span over the last num_frames frames,
+        slowest first
+        """
+        frames = list(self.frames)[-num_frames:]
+        if not frames:
+            return []
+        totals: Dict[str, int] = collections.defaultdict(int)
+        for frame in frames:
+            for span in frame.spans:
+                totals[span.label] += span.end - span.start
+        breakdown = [(label, total / len(frames) / 1e6) for label, total in totals.items()]
+        return sorted(breakdown, key=lambda x: x[1], reverse=True)
+
+    def get_frame_times(self, num_frames: int = FPS) -> Tuple[float, float]:
+        """
+        Returns the average and longest frame in ms over the last num_frames frames
+        """
+        frames = list(self.frames)[-num_frames:]
+        if not frames:
+            return 0, 0
+        frame_times = [(frame.end - frame.start) / 1e6 for frame in frames]
+        return sum(frame_times) / len(frame_times), max(frame_times)
+
+    def to_chrome_trace(self) -> dict:
+        events = []
+        pid = os.getpid()
+        for frame_num, frame in enumerate(self.frames):
+            # Chrome trace timestamps are in microseconds
+            events.append({'name': 'frame', 'cat': 'frame', 'ph': 'X', 'pid': pid, 'tid': 0,
+                           'ts': frame.start / 1e3, 'dur': (frame.end - frame.start) / 1e3,
+                           'args': {'frame': frame_num}})
+            for span in frame.spans:
+                events.append({'name': span.label, 'cat': span.phase or 'engine', 'ph': 'X', 'pid': pid, 'tid': 0,
+                               'ts': span.start / 1e3, 'dur': (span.end - span.start) / 1e3})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, directory: str = 'profiles') -> str:
+        """
+        Writes the frames to a Chrome trace file in directory and returns its path
+        """
+        if not os.path.isdir(directory):
+            os.mkdir(directory)
+        current_time = str(datetime.now()).replace(' ', '_').replace(':', '.')
+        path = os.path.join(directory, 'LT_%s.json' % current_time)
+        with open(path, 'w') as fp:
+            json.dump(self.to_chrome_trace(), fp)
+        return path
+
+PROFILER = FrameProfiler()
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+from array import array
 from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
 
 from app.data.database.database import DB
-from app.engine import line_of_sight
-from app.engine.pathfinding.node import Node
+from app.engine import line_of_sight, skill_system
+from app.engine.pathfinding.cost_grid import CostGrid
 from app.engine.game_state import game
 from app.engine.fog_of_war import FogOfWarType
 from app.engine.objects.unit import UnitObject
@@ -19,7 +20,15 @@ class GameBoard(object):
         self.width: int = tilemap.width
         self.height: int = tilemap.height
         self.bounds: Tuple[int, int, int, int] = (0, 0, self.width - 1, self.height - 1)
-        self.mcost_grids: Dict[NID, Grid[Node]] = {}
+        self.mcost_grids: Dict[NID, CostGrid] = {}
+        # Bumped whenever terrain, occupancy, or vision on the board changes
+        # so anything cached off of the board's state knows it is stale
+        self.version: int = 0
+        # Bumped only when the opacity grid changes, for line of sight caches
+        self.opacity_version: int = 0
+        # Positions whose fog of war state (for the player) might have changed
+        # since the fog of war overlay last looked. None means anywhere
+        self.vision_changes: Optional[Set[Pos]] = None
 
         self.reset_tile_grids(tilemap)
 
@@ -33,9 +42,16 @@ class GameBoard(object):
         for team in DB.teams:
             self.fog_of_war_grids[team.nid] = self.init_set_grid()
         self.fow_vantage_point = {}  # Unit: Position where the unit is that's looking
+        # Unit nid: (Team whose grid it was added to, Set of positions the unit currently sees)
+        # So moving a unit only touches the tiles it leaves and enters
+        self.fow_footprints: Dict[NID, Tuple[NID, Set[Pos]]] = {}
+        # Unit nid: (Position, Range) the unit's line of sight reached from, with fog_los
+        self.fow_los_footprints: Dict[NID, Tuple[Pos, int]] = {}
         self.fog_regions = self.init_set_grid()
         self.fog_region_set: Set[NID] = set()  # Set of Fog region nids so we can tell how many fog regions exist at all times
+        self.fog_region_footprints: Dict[NID, Set[Pos]] = {}  # Region nid: Set of positions it covers
         self.vision_regions = self.init_set_grid()
+        self.vision_region_footprints: Dict[NID, Set[Pos]] = {}  # Region nid: Set of positions it covers
         self.previously_visited_tiles: Set[Pos] = set()  # Used for Hybrid Fog to mark where we have seen in the past
 
         # For Auras
@@ -46,8 +62,12 @@ class GameBoard(object):
         # For opacity
         self.opacity_grid = self.init_opacity_grid(tilemap)
 
+    def bump_version(self):
+        self.version += 1
+
     def set_bounds(self, min_x: int, min_y: int, max_x: int, max_y: int):
         self.bounds = (min_x, min_y, max_x, max_y)
+        self.bump_version()
 
     def check_bounds(self, pos: Pos) -> bool:
         return self.bounds[0] <= pos[0] <= self.bounds[2] and self.bounds[1] <= pos[1] <= self.bounds[3]
@@ -57,6 +77,20 @@ class GameBoard(object):
 
     def set_previously_visited_tiles(self, val: Set[Pos]):
         self.previously_visited_tiles = val
+        self.vision_changes = None
+
+    def _mark_vision_changed(self, positions: Set[Pos]):
+        if self.vision_changes is not None:
+            self.vision_changes |= positions
+
+    def pop_vision_changes(self) -> Optional[Set[Pos]]:
+        """
+        Returns the positions whose fog of war state might have changed since
+        the last call, or None if it could have changed anywhere
+        """
+        changes = self.vision_changes
+        self.vision_changes = set()
+        return changes
 
     def reset_tile_grids(self, tilemap):
         # For each movement type
@@ -68,9 +102,19 @@ class GameBoard(object):
                 if not terrain:
                     terrain = DB.terrain[0]
                 mtype_grid.append(terrain.mtype)
+        # Movement groups with identical cost tables share a single cost grid
+        self.mcost_grids.clear()
+        shared_grids: Dict[Tuple, CostGrid] = {}
         for mode in DB.mcost.unit_types:
-            self.mcost_grids[mode] = self.init_movement_grid(mode, tilemap, mtype_grid)
+            cost_table = self._get_cost_table(mode)
+            key = tuple(sorted(cost_table.items()))
+            if key not in shared_grids:
+                shared_grids[key] = self.init_movement_grid(cost_table, mtype_grid)
+            self.mcost_grids[mode] = shared_grids[key]
         self.opacity_grid = self.init_opacity_grid(tilemap)
+        self.opacity_version += 1
+        self.vision_changes = None
+        self.bump_version()
 
     def reset_pos(self, tilemap, pos: Pos):
         terrain_nid = game.get_terrain_nid(tilemap, pos)
@@ -80,35 +124,41 @@ class GameBoard(object):
         mtype = terrain.mtype
 
         # Movement reset
+        # Shared cost grids only need to be updated once
+        updated: Set[int] = set()
         for movement_group in DB.mcost.unit_types:
-            mcost_grid = self.mcost_grids[movement_group]        
+            mcost_grid = self.mcost_grids[movement_group]
+            if id(mcost_grid) in updated:
+                continue
+            updated.add(id(mcost_grid))
             if mtype:
                 tile_cost = DB.mcost.get_mcost(movement_group, mtype)
             else:
                 tile_cost = 1
-            mcost_grid.insert(pos, Node(*pos, tile_cost < 99, tile_cost))
+            mcost_grid.set_cost(pos, tile_cost)
 
         # Opacity reset
         if terrain:
             self.opacity_grid.insert(pos, terrain.opaque)
         else:
             self.opacity_grid.insert(pos, False)
+        self.opacity_version += 1
+        # Line of sight through this tile could change what is visible anywhere
+        self.vision_changes = None
+        self.bump_version()
 
     # For movement
-    def init_movement_grid(self, movement_group: NID, tilemap, mtype_grid: Grid[NID]) -> Grid[Node]:
-        grid = Grid[Node]((self.width, self.height))
-        for x in range(self.width):
-            for y in range(self.height):
-                mtype = mtype_grid.get((x, y))
-                if mtype:
-                    tile_cost = DB.mcost.get_mcost(movement_group, mtype)
-                else:
-                    tile_cost = 1
-                grid.append(Node(x, y, tile_cost < 99, tile_cost))
+    def _get_cost_table(self, movement_group: NID) -> Dict[NID, float]:
+        """Returns the movement cost of each terrain movement type for this movement group"""
+        cidx = DB.mcost.unit_types.index(movement_group)
+        return {mtype: DB.mcost.get((cidx, ridx)) for ridx, mtype in enumerate(DB.mcost.terrain_types)}
 
-        return grid
+    def init_movement_grid(self, cost_table: Dict[NID, float], mtype_grid: Grid[NID]) -> CostGrid:
+        # Tiles without a movement type always cost 1
+        costs = array('d', (cost_table[mtype] if mtype else 1 for mtype in mtype_grid.cells()))
+        return CostGrid((self.width, self.height), costs)
 
-    def get_movement_grid(self, movement_group: NID) -> BoundedGrid[Node]:
+    def get_movement_grid(self, movement_group: NID) -> CostGrid:
         return self.mcost_grids[movement_group].apply_bounds(self.bounds)
 
     def initialize_list_grid(self) -> Grid[List]:
@@ -122,11 +172,13 @@ class GameBoard(object):
         if unit not in self.unit_grid.get(pos):
             self.unit_grid.get(pos).append(unit)
             self.team_grid.get(pos).append(unit.team)
+            self.bump_version()
 
     def remove_unit(self, pos: Pos, unit: UnitObject):
         if unit in self.unit_grid.get(pos):
             self.unit_grid.get(pos).remove(unit)
             self.team_grid.get(pos).remove(unit.team)
+            self.bump_version()
 
     def get_unit(self, pos: Pos) -> Optional[UnitObject]:
         if not pos:
@@ -172,19 +224,45 @@ class GameBoard(object):
     # === Fog of War ===
     def update_fow(self, pos: Optional[Pos], unit: UnitObject, sight_range: int):
         """Modifies the state of the fog of war game board to reflect the unit moving to the pos"""
-        grid: Grid[List[UnitObject]] = self.fog_of_war_grids[unit.team]
-        # Remove the old vision
+        grid: Grid[Set[NID]] = self.fog_of_war_grids[unit.team]
+        self.bump_version()
+        old_team, old_positions = self.fow_footprints.pop(unit.nid, (unit.team, set()))
+        if old_team != unit.team:
+            # Unit changed teams, so its old vision lives on a different grid
+            old_grid = self.fog_of_war_grids[old_team]
+            for position in old_positions:
+                old_grid.get(position).discard(unit.nid)
+            self._mark_vision_changed(old_positions)
+            old_positions = set()
         self.fow_vantage_point[unit.nid] = None
-        for cell in grid.cells():
-            cell.discard(unit.nid)
-        # Add new vision
         if pos:
             self.fow_vantage_point[unit.nid] = pos
             positions = game.target_system.find_manhattan_spheres(range(sight_range + 1), *pos)
             positions = {pos for pos in positions if 0 <= pos[0] < self.width and 0 <= pos[1] < self.height}
-            for position in positions:
-                grid.get(position).add(unit.nid)
+        else:
+            positions = set()
+        # Remove the old vision
+        for position in old_positions - positions:
+            grid.get(position).discard(unit.nid)
+        # Add new vision
+        for position in positions - old_positions:
+            grid.get(position).add(unit.nid)
+        if positions:
+            self.fow_footprints[unit.nid] = (unit.team, positions)
             self._update_previously_visited(positions, unit.team)
+        self._mark_vision_changed(old_positions ^ positions)
+        if DB.constants.value('fog_los'):
+            # Line of sight for the player uses its own range, so anywhere
+            # the unit could see from where it was or is might have changed
+            los_range = game.get_current_fog_info().default_radius + skill_system.sight_range(unit)
+            if unit.nid in self.fow_los_footprints:
+                old_pos, old_range = self.fow_los_footprints.pop(unit.nid)
+                # The fog radius may have changed since
+                old_range = max(old_range, los_range)
+                self._mark_vision_changed(game.target_system.find_manhattan_spheres(range(old_range + 1), *old_pos))
+            if pos:
+                self.fow_los_footprints[unit.nid] = (pos, los_range)
+                self._mark_vision_changed(game.target_system.find_manhattan_spheres(range(los_range + 1), *pos))
 
     def change_sight_range(self, unit: UnitObject, new_sight_range: int):
         """Modifies the state of the fog of war game board 
@@ -217,6 +295,7 @@ class GameBoard(object):
                     self.previously_visited_tiles.add(position)
 
     def add_fog_region(self, region):
+        self.bump_version()
         if region.position:
             self.fog_region_set.add(region.nid)
             fog_range = int(region.sub_nid) if region.sub_nid else 0
@@ -226,13 +305,19 @@ class GameBoard(object):
             positions = {pos for pos in positions if 0 <= pos[0] < self.width and 0 <= pos[1] < self.height}
             for position in positions:
                 self.fog_regions.get(position).add(region.nid)
+            self.fog_region_footprints.setdefault(region.nid, set()).update(positions)
+            self._mark_vision_changed(positions)
 
     def remove_fog_region(self, region):
         self.fog_region_set.discard(region.nid)
-        for cell in self.fog_regions.cells():
-            cell.discard(region.nid)
+        self.bump_version()
+        positions = self.fog_region_footprints.pop(region.nid, set())
+        for position in positions:
+            self.fog_regions.get(position).discard(region.nid)
+        self._mark_vision_changed(positions)
 
     def add_vision_region(self, region):
+        self.bump_version()
         if region.position:
             vision_range = int(region.sub_nid) if region.sub_nid else 0
             positions = set()
@@ -243,10 +328,15 @@ class GameBoard(object):
                 self.vision_regions.get(position).add(region.nid)
                 # Anyone can see a vision region
                 self.previously_visited_tiles.add(position)
+            self.vision_region_footprints.setdefault(region.nid, set()).update(positions)
+            self._mark_vision_changed(positions)
 
     def remove_vision_region(self, region):
-        for cell in self.vision_regions.cells():
-            cell.discard(region.nid)
+        self.bump_version()
+        positions = self.vision_region_footprints.pop(region.nid, set())
+        for position in positions:
+            self.vision_regions.get(position).discard(region.nid)
+        self._mark_vision_changed(positions)
 
     def in_vision(self, pos: Tuple[int, int], team: NID = 'player') -> bool:
         # Anybody can see things in vision regions no matter what
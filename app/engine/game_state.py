@@ -159,8 +159,12 @@ class GameState():
 
         self.clear()
 
-    def on_alter_game_state(self):
-        ltcache.alter_state()
+    def on_alter_game_state(self, tags: Optional[Tuple[str, ...]] = None):
+        """
+        Call whenever the game state changes. If tags are given,
+        only those parts of the game state changed (see ltcache)
+        """
+        ltcache.alter_state(tags)
 
     def clear(self):
         self.game_vars = PrimitiveCounter()
@@ -336,6 +340,7 @@ class GameState():
         """
         self.boundary = None
         self.generic()
+        self.on_alter_game_state()
         logging.debug("Starting Level %s", level_nid)
 
         from app.engine.level_cursor import LevelCursor
@@ -461,6 +466,8 @@ class GameState():
         from app.events import event_manager, speak_style
 
         logging.info("Loading Game...")
+        # Cached results refer to the units and skills being replaced
+        self.on_alter_game_state()
         self.game_vars = PrimitiveCounter(s_dict.get('game_vars', {}))
         static_random.set_seed(self.game_vars.get('_random_seed', 0))
         self.level_vars = PrimitiveCounter(s_dict.get('level_vars', {}))
@@ -1672,11 +1679,8 @@ def load_level(level_nid, save_loc):
         game = GameState()
     else:
         game.clear()
-    import pickle
-
-    from app.engine import save
-    with open(save_loc, 'rb') as fp:
-        s_dict = pickle.load(fp)
+    from app.engine import save, save_container
+    s_dict = save_container.read_save(save_loc)
     game.load_states(['start_level_asset_loading'])
     game.build_new()
     game.load(s_dict)
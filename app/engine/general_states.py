@@ -245,6 +245,8 @@ class PhaseChangeState(MapState):
         if game.turncount == 1 and game.phase.get_current() == 'player':
             # The turnwheel will not be able to go before this moment
             game.action_log.set_first_free_action()
+        # Nothing before the first free action can be reached anymore
+        game.action_log.compact()
 
     def save_state(self):
         GAME_NID = str(DB.constants.value('game_nid'))
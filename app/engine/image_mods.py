@@ -4,10 +4,42 @@ from app.utilities.typing import Color3
 from app.engine import engine
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional, Tuple
+
+import pygame
+
+# NumPy is optional. When it is installed, the per pixel operations below
+# work on whole arrays of pixels at once instead of looping in Python
+try:
+    import numpy
+    from pygame import surfarray
+except ImportError:
+    numpy = None
+
+def _can_vectorize(image) -> bool:
+    # surfarray.pixels3d can reference 24 and 32 bit surfaces
+    return numpy is not None and image.get_bitsize() in (24, 32)
+
+def _can_vectorize_mapped(image) -> bool:
+    # surfarray.pixels2d cannot reference 24 bit surfaces, since their pixels
+    # are not whole ints, so those fall back to the PixelArray
+    return numpy is not None and image.get_bitsize() == 32
+
+def _color_convert_vectorized(image, conversion_dict):
+    """
+    Same as replacing each color in turn with a PixelArray,
+    but comparing whole arrays of mapped pixels at a time
+    """
+    px_array = surfarray.pixels2d(image)
+    for old_color, new_color in conversion_dict.items():
+        px_array[px_array == image.map_rgb(old_color)] = image.map_rgb(new_color)
+    del px_array  # Unlocks the surface
 
 def color_convert(image, conversion_dict):
     image = image.convert()
+    if conversion_dict and _can_vectorize_mapped(image):
+        _color_convert_vectorized(image, conversion_dict)
+        return image
     px_array = engine.make_pixel_array(image)
     for old_color, new_color in conversion_dict.items():
         px_array.replace(old_color, new_color)
@@ -24,8 +56,21 @@ def color_convert_alpha(image, conversion_dict):
 def invert_surface(image):
     # Using px_array is about 2x as fast as native
     # Using Cython invert is about >200x faster than native
+    if _can_vectorize(image):
+        rgb = surfarray.pixels3d(image)
+        has_alpha = bool(image.get_flags() & pygame.SRCALPHA)
+        alpha = surfarray.pixels_alpha(image) if has_alpha else None
+        # Only an opaque pixel of exactly the colorkey is left alone
+        to_invert = numpy.any(rgb != COLORKEY, axis=2)
+        if has_alpha:
+            to_invert |= alpha != 255
+            alpha[to_invert] = 255
+        rgb[to_invert] = 255 - rgb[to_invert]
+        del rgb, alpha  # Unlocks the surface
+        return
     px_array = engine.make_pixel_array(image)
-    colorkey = image.map_rgb(COLORKEY)
+    # map_rgb is signed when the alpha bits are set, PixelArray values never are
+    colorkey = image.map_rgb(COLORKEY) & 0xFFFFFFFF
     for x in range(image.get_width()):
         for y in range(image.get_height()):
             if px_array[x, y] != colorkey:
@@ -33,7 +78,23 @@ def invert_surface(image):
                 px_array[x, y] = (255 - color[0], 255 - color[1], 255 - color[2])
     px_array.close()
 
+def _make_gray_vectorized(image, skip_color: Optional[Color3] = None):
+    rgb = surfarray.pixels3d(image)
+    if image.get_flags() & pygame.SRCALPHA:
+        to_gray = surfarray.pixels_alpha(image) != 0
+    else:
+        to_gray = numpy.ones(rgb.shape[:2], dtype=bool)
+    if skip_color:
+        to_gray &= numpy.any(rgb != skip_color[:3], axis=2)
+    # Same weights and truncation as the per pixel version
+    gray = (rgb[..., 0] * 0.298 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114).astype(numpy.uint8)
+    rgb[to_gray] = gray[to_gray][:, numpy.newaxis]
+    del rgb  # Unlocks the surface
+    return image
+
 def make_gray(image):
+    if _can_vectorize(image):
+        return _make_gray_vectorized(image)
     for row in range(image.get_width()):
         for col in range(image.get_height()):
             color = image.get_at((row, col))
@@ -44,6 +105,8 @@ def make_gray(image):
 
 
 def make_gray_colorkey(image):
+    if _can_vectorize(image):
+        return _make_gray_vectorized(image, COLORKEY)
     for row in range(image.get_width()):
         for col in range(image.get_height()):
             color = image.get_at((row, col))
@@ -54,6 +117,8 @@ def make_gray_colorkey(image):
 
 def make_anim_gray(image):
     # Different because animations have a small box of green around them
+    if _can_vectorize(image):
+        return _make_gray_vectorized(image, (128, 160, 128))
     for row in range(image.get_width()):
         for col in range(image.get_height()):
             color = image.get_at((row, col))
@@ -216,7 +281,13 @@ class FlickerTint():
     width: int      # milliseconds, actual time with tint applied
     add: bool       # whether to use blend_add or blend_sub
 
-def draw_flicker_tint(image: engine.Surface, time: int, tints: List[FlickerTint]) -> engine.Surface:
+def get_flicker_tint_colors(time: int, tints: List[FlickerTint], steps: int = 0) -> List[Tuple[Color3, bool]]:
+    """
+    Returns the color of each tint at the given time,
+    and whether that color should be added or subtracted.
+    If steps is given, each tint only takes that many distinct strengths
+    """
+    colors = []
     for idx, tint in enumerate(tints):
         color = tint.color
 
@@ -225,11 +296,18 @@ def draw_flicker_tint(image: engine.Surface, time: int, tints: List[FlickerTint]
             offset = idx * tint.period / len(tints)
             diff = utils.model_wave(time + offset, tint.period, tint.width)
             diff = utils.clamp(diff, 0, 1)
+            if steps:
+                diff = round(diff * steps) / steps
             color = tuple([int(c * diff) for c in color])
 
-        if tint.add:
+        colors.append((color, tint.add))
+    return colors
+
+def draw_flicker_tint(image: engine.Surface, time: int, tints: List[FlickerTint]) -> engine.Surface:
+    for color, add in get_flicker_tint_colors(time, tints):
+        if add:
             image = add_tint(image.convert_alpha(), color)
         else:
             image = sub_tint(image.convert_alpha(), color)
 
-    return image
\ No newline at end of file
+    return image
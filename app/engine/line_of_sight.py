@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
 from app.utilities.typing import NID, Pos
 
 from app.utilities import utils
@@ -14,6 +14,88 @@ class Visibility(IntEnum):
     Dark = 1
     Lit = 2
 
+# Line of sight results only depend on the opacity grid, so they are cached
+# until the board changes or its opacity version is bumped
+_cache_board = None
+_cache_opacity_version: Optional[int] = None
+_ray_cache: Dict[Tuple[Pos, Pos], bool] = {}
+_visibility_cache: Dict[Tuple[Pos, int], FrozenSet[Pos]] = {}
+# Team visibility also depends on where units are looking from,
+# so it is thrown away whenever anything on the board changes
+_team_cache_version: Optional[int] = None
+_team_visibility_cache: Dict[Tuple[NID, int], FrozenSet[Pos]] = {}
+MAX_RAY_CACHE = 100000
+
+def clear_cache():
+    _ray_cache.clear()
+    _visibility_cache.clear()
+    _team_visibility_cache.clear()
+
+def _check_cache():
+    global _cache_board, _cache_opacity_version, _team_cache_version
+    board = game.board
+    if board is not _cache_board or board.opacity_version != _cache_opacity_version:
+        clear_cache()
+        _cache_board = board
+        _cache_opacity_version = board.opacity_version
+    if board.version != _team_cache_version:
+        _team_visibility_cache.clear()
+        _team_cache_version = board.version
+
+def has_line(source_pos: Pos, dest_pos: Pos) -> bool:
+    """
+    Cached version of get_line against the current board's opacity
+    """
+    _check_cache()
+    key = (source_pos, dest_pos)
+    if key not in _ray_cache:
+        if len(_ray_cache) > MAX_RAY_CACHE:
+            _ray_cache.clear()
+        _ray_cache[key] = get_line(source_pos, dest_pos, game.board.get_opacity)
+    return _ray_cache[key]
+
+def build_visibility(source_pos: Pos, max_range: int, width: int, height: int,
+                     get_opacity: Callable[[Pos], bool]) -> FrozenSet[Pos]:
+    """
+    Returns every position on a width x height map that can be seen
+    from source_pos within max_range
+    """
+    x, y = source_pos
+    visible = {source_pos}
+    for dx in range(-max_range, max_range + 1):
+        remaining = max_range - abs(dx)
+        for dy in range(-remaining, remaining + 1):
+            pos = (x + dx, y + dy)
+            if 0 <= pos[0] < width and 0 <= pos[1] < height and get_line(source_pos, pos, get_opacity):
+                visible.add(pos)
+    return frozenset(visible)
+
+def get_visible_positions(source_pos: Pos, max_range: int) -> FrozenSet[Pos]:
+    """
+    Returns every position that can be seen from source_pos within max_range.
+    Computed once per source and range until the opacity grid changes
+    """
+    _check_cache()
+    key = (source_pos, max_range)
+    if key not in _visibility_cache:
+        board = game.board
+        _visibility_cache[key] = build_visibility(source_pos, max_range, board.width, board.height, board.get_opacity)
+    return _visibility_cache[key]
+
+def get_team_visibility(team: NID, default_range: int, fow_vantage_point: Dict[NID, Pos]) -> FrozenSet[Pos]:
+    """
+    Returns every position that any unit on the team can see with line of sight
+    """
+    _check_cache()
+    key = (team, default_range)
+    if key not in _team_visibility_cache:
+        visible = set()
+        for unit in game.units:
+            if unit.team == team and fow_vantage_point.get(unit.nid):
+                visible |= get_visible_positions(fow_vantage_point[unit.nid], default_range + skill_system.sight_range(unit))
+        _team_visibility_cache[key] = frozenset(visible)
+    return _team_visibility_cache[key]
+
 def line_of_sight(source_pos: list, dest_pos: list, max_range: int) -> list:
     all_tiles = {}
     for pos in dest_pos:
@@ -26,7 +108,7 @@ def line_of_sight(source_pos: list, dest_pos: list, max_range: int) -> list:
     for pos, vis in all_tiles.items():
         if vis == Visibility.Unknown:
             for s_pos in source_pos:
-                if utils.calculate_distance(pos, s_pos) <= max_range and get_line(s_pos, pos, game.board.get_opacity):
+                if utils.calculate_distance(pos, s_pos) <= max_range and has_line(s_pos, pos):
                     all_tiles[pos] = Visibility.Lit
                     break
             else:
@@ -39,13 +121,7 @@ def simple_check(dest_pos: Pos, team: NID, default_range: int, fow_vantage_point
     """
     Returns true if can see position with line of sight
     """
-    info = [(fow_vantage_point[unit.nid], skill_system.sight_range(unit)) for unit in game.units if unit.team == team and fow_vantage_point.get(unit.nid)]
-    for s_pos, extra_range in info:
-        if s_pos == dest_pos:
-            return True
-        elif utils.calculate_distance(dest_pos, s_pos) <= default_range + extra_range and get_line(s_pos, dest_pos, game.board.get_opacity):
-            return True
-    return False
+    return dest_pos in get_team_visibility(team, default_range, fow_vantage_point)
 
 if __name__ == '__main__':
     import random, time
@@ -58,6 +134,28 @@ if __name__ == '__main__':
             (random_nums[x * 4 + 2], random_nums[x * 4 + 3]),
             lambda x: False))
     end = time.time_ns() / 1e6
-    print(end - start)
+    print("get_line x %d: %.1f ms" % (num_trials, end - start))
+
+    # Fog of war queries on a 60x60 map with 20 vantage points of range 8
+    # Uncached, each query runs a Bresenham line per vantage point in range
+    # Cached, each vantage point's visibility is built once, then queries are lookups
+    size, sight = 60, 8
+    opaque = {(random.randrange(size), random.randrange(size)) for _ in range(size * size // 8)}
+    get_opacity = lambda pos: pos in opaque
+    vantage_points = [(random.randrange(size), random.randrange(size)) for _ in range(20)]
+    queries = [(random.randrange(size), random.randrange(size)) for _ in range(20000)]
+
+    start = time.time_ns() / 1e6
+    uncached = [any(utils.calculate_distance(pos, s_pos) <= sight and get_line(s_pos, pos, get_opacity)
+                    for s_pos in vantage_points) for pos in queries]
+    end = time.time_ns() / 1e6
+    print("Uncached fog queries x %d: %.1f ms" % (len(queries), end - start))
 
-    print(out)
+    start = time.time_ns() / 1e6
+    visible = set()
+    for s_pos in vantage_points:
+        visible |= build_visibility(s_pos, sight, size, size, get_opacity)
+    cached = [pos in visible for pos in queries]
+    end = time.time_ns() / 1e6
+    print("Cached fog queries x %d (including build): %.1f ms" % (len(queries), end - start))
+    assert cached == uncached
@@ -12,9 +12,18 @@ from app.utilities.utils import magnitude, tmult, tuple_add, tuple_sub
 
 class MapView():
     def __init__(self):
+        # Surfaces reused every frame. They are cleared in place instead of reallocated
+        self._frame_surf = engine.create_surface((WINWIDTH, WINHEIGHT), transparent=True)
         self._unit_surf = engine.create_surface((WINWIDTH, WINHEIGHT), transparent=True)
         self._line_surf = engine.copy_surface(self._unit_surf)
         self._line_surf.fill((0, 0, 0, 0))
+        # What the grid in the line surf was last drawn for
+        self._line_surf_key = None
+
+    def _get_frame_surf(self, size) -> engine.Surface:
+        if self._frame_surf.get_size() != tuple(size):
+            self._frame_surf = engine.create_surface(size, transparent=True)
+        return self._frame_surf
 
     def save_screenshot(self):
         import os
@@ -43,7 +52,8 @@ class MapView():
         engine.save_surface(surf, 'screenshots/LT_%s_map_view.png' % current_time)
 
     def draw_units(self, surf, cull_rect, subsurface_rect=None):
-        unit_surf = engine.copy_surface(self._unit_surf)
+        unit_surf = self._unit_surf
+        unit_surf.fill((0, 0, 0, 0))
         cull_rect_in_tiles = cull_rect[0] / TILEWIDTH, cull_rect[1] / TILEHEIGHT, cull_rect[2] / TILEWIDTH, cull_rect[3] / TILEHEIGHT
         cull_rect_center_in_tiles = tuple_add(cull_rect_in_tiles[:2], tmult(cull_rect_in_tiles[2:], 0.5))
 
@@ -124,14 +134,16 @@ class MapView():
             parallax_cull = (bg_x, bg_y, cull_rect[2], cull_rect[3])
             base_image = game.bg_tilemap.get_full_image(parallax_cull)
             map_image = game.tilemap.get_full_image(cull_rect)
-            surf = engine.copy_surface(base_image)
-            surf = surf.convert_alpha()
+            surf = self._get_frame_surf(cull_rect[2:])
+            # Wherever the background is transparent, so is the frame
+            surf.fill((0, 0, 0, 0))
+            surf.blit(base_image, (0, 0))
             surf.blit(map_image, shake)
         else:
-            surf = engine.create_surface(cull_rect[2:])
+            surf = self._get_frame_surf(cull_rect[2:])
+            surf.fill((0, 0, 0, 255))
             map_image = game.tilemap.get_full_image(cull_rect)
             surf.blit(map_image, shake)
-            surf = surf.convert_alpha()
 
         surf = game.boundary.draw_auras(surf, full_size, cull_rect)
         surf = game.boundary.draw(surf, full_size, cull_rect)
@@ -188,9 +200,18 @@ class MapView():
 
     def draw_grid(self, surf, cull_rect):
         # Draw board grid
-        line_surf = engine.copy_surface(self._line_surf)
+        line_surf = self._line_surf
 
         bounds = game.board.bounds
+        opacity = cf.SETTINGS['grid_opacity']  # Higher numbers show more grid
+        show_bounds = cf.SETTINGS['show_bounds']
+        # The grid only changes when the camera or the bounds do
+        line_surf_key = (tuple(cull_rect), tuple(bounds), game.tilemap.width, game.tilemap.height, opacity, show_bounds)
+        if line_surf_key == self._line_surf_key:
+            surf.blit(line_surf, (0, 0))
+            return surf
+        self._line_surf_key = line_surf_key
+        line_surf.fill((0, 0, 0, 0))
         
         regular_bounds = \
             bounds[0] == 0 and \
@@ -203,7 +224,6 @@ class MapView():
         top = bounds[1] * TILEHEIGHT - cull_rect[1]
         bottom = (bounds[3] + 1) * TILEHEIGHT - cull_rect[1]
 
-        opacity = cf.SETTINGS['grid_opacity']  # Higher numbers show more grid
         outside_opacity = min(255, opacity + 56)
         # Draw small lines (grid)
         if opacity > 30:
@@ -216,7 +236,7 @@ class MapView():
 
         # Draw big lines (bounds)
         # Don't bother showing bounds if they are just normal bounds
-        if not regular_bounds and cf.SETTINGS['show_bounds']:
+        if not regular_bounds and show_bounds:
             engine.draw_line(line_surf, (0, 0, 0, outside_opacity), (left - 2, top - 1), (right + 1, top - 1), width=3)
             engine.draw_line(line_surf, (0, 0, 0, outside_opacity), (left - 1, top - 1), (left - 1, bottom), width=3)
             engine.draw_line(line_surf, (0, 0, 0, outside_opacity), (right, top - 1), (right, bottom), width=3)
@@ -1,4 +1,5 @@
-from typing import Dict, List, Tuple
+from collections import OrderedDict
+from typing import Dict, List, Set, Tuple
 from app.utilities.typing import NID, Pos
 
 from app.constants import TILEWIDTH, TILEHEIGHT, AUTOTILE_FRAMES, COLORKEY
@@ -8,6 +9,9 @@ from app.data.resources.resources import RESOURCES
 
 from app.engine import engine, image_mods, particles, animations
 
+CHUNK_SIZE = 16  # Width and height of each chunk of a layer's image, in tiles
+MAX_CHUNKS = 64  # How many built chunks each tilemap keeps around at once
+
 class LayerObject():
     transition_speed = 333
 
@@ -17,8 +21,12 @@ class LayerObject():
         self.parent = parent
         self.visible = True
         self.terrain = {}
+        # Only layers built from a premade image have an image
+        # Other layers are drawn a chunk at a time from their sprite grid
         self.image = None
-        self.autotile_images = []
+        self.sprite_grid = {}
+        self.chunks: Dict[Pos, List[Pos]] = {}  # Chunk -> coords of the tiles in that chunk
+        self.autotile_chunks: Set[Pos] = set()
         self.pixel_bounds = None
 
         # For fade in
@@ -41,23 +49,95 @@ class LayerObject():
             cull_rect[1] + cull_rect[3] > self.pixel_bounds[1]
         return ans
 
+    def build_chunk(self, chunk: Pos) -> Tuple[engine.Surface, List[engine.Surface]]:
+        """
+        Blits the tiles of the chunk into a chunk sized image.
+        Also returns an image for each autotile frame, but only
+        if the chunk has any autotiles in it
+        """
+        size = (CHUNK_SIZE * TILEWIDTH, CHUNK_SIZE * TILEHEIGHT)
+        image = engine.create_surface(size)
+        engine.fill(image, COLORKEY)
+        engine.set_colorkey(image, COLORKEY, rleaccel=True)
+        autotile_images = []
+        if chunk in self.autotile_chunks:
+            autotile_images = [engine.create_surface(size) for _ in range(AUTOTILE_FRAMES)]
+            for im in autotile_images:
+                engine.fill(im, COLORKEY)
+                engine.set_colorkey(im, COLORKEY, rleaccel=True)
+
+        left, top = chunk[0] * CHUNK_SIZE, chunk[1] * CHUNK_SIZE
+        for coord in self.chunks[chunk]:
+            tile_sprite = self.sprite_grid[coord]
+            tileset = RESOURCES.tilesets.get(tile_sprite.tileset_nid)
+            pos = tile_sprite.tileset_position
+            topleft = ((coord[0] - left) * TILEWIDTH, (coord[1] - top) * TILEHEIGHT)
+
+            rect = (pos[0] * TILEWIDTH, pos[1] * TILEHEIGHT, TILEWIDTH, TILEHEIGHT)
+            sub_image = engine.subsurface(tileset.image, rect)
+            image.blit(sub_image, topleft)
+
+            # Handle Autotiles
+            if autotile_images and pos in tileset.autotiles and tileset.autotile_image:
+                column = tileset.autotiles[pos]
+                for idx, im in enumerate(autotile_images):
+                    rect = (column * TILEWIDTH, idx * TILEHEIGHT, TILEWIDTH, TILEHEIGHT)
+                    sub_image = engine.subsurface(tileset.autotile_image, rect)
+                    im.blit(sub_image, topleft)
+
+        return image, autotile_images
+
+    def draw(self, surf, cull_rect):
+        """
+        Blits the part of the layer within the cull rect
+        (along with its current autotile frame) onto surf
+        """
+        if self.state in ('fade_in', 'fade_out'):
+            surf.blit(self.get_image(cull_rect), (0, 0))
+        else:
+            self._blit_chunks(surf, cull_rect)
+
+    def _blit_chunks(self, surf, cull_rect):
+        map_size = (self.parent.width * TILEWIDTH, self.parent.height * TILEHEIGHT)
+        x, y, width, height = engine.bound_subsurface(map_size, tuple(int(v) for v in cull_rect))
+        if width == 0 or height == 0:
+            return
+        if self.image:
+            surf.blit(engine.subsurface(self.image, (x, y, width, height)), (0, 0))
+            return
+
+        chunk_width, chunk_height = CHUNK_SIZE * TILEWIDTH, CHUNK_SIZE * TILEHEIGHT
+        old_clip = surf.get_clip()
+        surf.set_clip((0, 0, width, height))
+        for chunk_y in range(y // chunk_height, (y + height - 1) // chunk_height + 1):
+            for chunk_x in range(x // chunk_width, (x + width - 1) // chunk_width + 1):
+                chunk = (chunk_x, chunk_y)
+                if chunk not in self.chunks:
+                    continue
+                image, autotile_images = self.parent.get_chunk(self, chunk)
+                topleft = (chunk_x * chunk_width - x, chunk_y * chunk_height - y)
+                surf.blit(image, topleft)
+                if autotile_images:
+                    surf.blit(autotile_images[self.autotile_frame], topleft)
+        surf.set_clip(old_clip)
+
+    def get_draw_state(self) -> tuple:
+        """
+        Everything about the layer that changes what draw blits for a given cull rect
+        """
+        return (self.visible, self.state, self.translucence, self.autotile_frame, id(self.image))
+
     def get_image(self, cull_rect):
         # Cull to only the part I need
-        im = engine.subsurface(self.image, cull_rect)
+        im = engine.create_surface((int(cull_rect[2]), int(cull_rect[3])))
+        engine.fill(im, COLORKEY)
+        engine.set_colorkey(im, COLORKEY)
+        self._blit_chunks(im, cull_rect)
         if self.state in ('fade_in', 'fade_out'):
             im = im.convert_alpha()
             im = image_mods.make_translucent(im, self.translucence)
         return im
 
-    def get_autotile_image(self, cull_rect):
-        if not self.autotile_images:
-            return None
-        im = engine.subsurface(self.autotile_images[self.autotile_frame], cull_rect)
-        if self.state in ('fade_in', 'fade_out'):
-            im = im.convert_alpha()
-            return image_mods.make_translucent(im, self.translucence)
-        return im
-
     def quick_show(self):
         self.visible = True
 
@@ -97,9 +177,9 @@ class LayerObject():
             if self.translucence >= 1:
                 self.state = None
 
-        if self.autotile_images:
+        if self.autotile_chunks:
             autotile_wait = int(self.parent.autotile_fps * 16.66)
-            frame = (current_time // autotile_wait) % len(self.autotile_images)
+            frame = (current_time // autotile_wait) % AUTOTILE_FRAMES
             if frame != self.autotile_frame:
                 self.autotile_frame = frame
                 in_state = True  # Requires update to image when autotiles turn over
@@ -123,6 +203,14 @@ class TileMapObject(Prefab):
         self.width: int = 0
         self.height: int = 0
         self.nid: NID = None
+        # (layer nid, chunk) -> that chunk's image and autotile images, least recently drawn first
+        self._chunks: OrderedDict = OrderedDict()
+        # Composited images from the last call to get_full_image and get_foreground_image,
+        # along with the cull rect and layer states they were drawn with
+        self._full_image: engine.Surface = None
+        self._full_image_state: tuple = None
+        self._foreground_image: engine.Surface = None
+        self._foreground_image_state: tuple = None
 
     @classmethod
     def from_prefab(cls, prefab):
@@ -133,22 +221,14 @@ class TileMapObject(Prefab):
         self.autotile_fps = prefab.autotile_fps
         self.layers = Data()
 
-        # Stitch together image layers
+        # Sort each layer's tiles into chunks
+        # The chunk images are only built once they need to be drawn
         for layer in prefab.layers:
             new_layer = LayerObject(layer.nid, layer.foreground, self)
             # Terrain
             for coord, terrain_nid in layer.terrain_grid.items():
                 new_layer.terrain[coord] = terrain_nid
-
-            # Image
-            image = engine.create_surface((self.width * TILEWIDTH, self.height * TILEHEIGHT))
-            engine.fill(image, COLORKEY)
-            engine.set_colorkey(image, COLORKEY, rleaccel=True)
-            # Autotile Images
-            autotile_images = [engine.create_surface((self.width * TILEWIDTH, self.height * TILEHEIGHT)) for _ in range(AUTOTILE_FRAMES)]
-            for im in autotile_images:
-                engine.fill(im, COLORKEY)
-                engine.set_colorkey(im, COLORKEY, rleaccel=True)
+            new_layer.sprite_grid = layer.sprite_grid
 
             # Build pixel bounds
             coords = layer.sprite_grid.keys()
@@ -159,31 +239,17 @@ class TileMapObject(Prefab):
                 bottom_bound = (max(coord[1] for coord in coords) + 1) * TILEHEIGHT
                 new_layer.pixel_bounds = [left_bound, top_bound, right_bound, bottom_bound]
 
-            has_autotiles = False
             for coord, tile_sprite in layer.sprite_grid.items():
                 tileset = RESOURCES.tilesets.get(tile_sprite.tileset_nid)
                 if not tileset.image:
                     tileset.image = engine.image_load(tileset.full_path)
                 if not tileset.autotile_image and tileset.autotile_full_path:
                     tileset.autotile_image = engine.image_load(tileset.autotile_full_path)
-                pos = tile_sprite.tileset_position
-
-                rect = (pos[0] * TILEWIDTH, pos[1] * TILEHEIGHT, TILEWIDTH, TILEHEIGHT)
-                sub_image = engine.subsurface(tileset.image, rect)
-                image.blit(sub_image, (coord[0] * TILEWIDTH, coord[1] * TILEHEIGHT))
-
-                # Handle Autotiles
-                if pos in tileset.autotiles and tileset.autotile_image:
-                    has_autotiles = True
-                    column = tileset.autotiles[pos]
-                    for idx, im in enumerate(autotile_images):
-                        rect = (column * TILEWIDTH, idx * TILEHEIGHT, TILEWIDTH, TILEHEIGHT)
-                        sub_image = engine.subsurface(tileset.autotile_image, rect)
-                        im.blit(sub_image, (coord[0] * TILEWIDTH, coord[1] * TILEHEIGHT))
-
-            new_layer.image = image
-            if has_autotiles:
-                new_layer.autotile_images = autotile_images
+                chunk = (coord[0] // CHUNK_SIZE, coord[1] // CHUNK_SIZE)
+                new_layer.chunks.setdefault(chunk, []).append(coord)
+                if tile_sprite.tileset_position in tileset.autotiles and tileset.autotile_image:
+                    new_layer.autotile_chunks.add(chunk)
+
             self.layers.append(new_layer)
 
         # Base layer should be visible, rest invisible
@@ -254,32 +320,58 @@ class TileMapObject(Prefab):
     def foreground_layers(self) -> List[LayerObject]:
         return [layer for layer in self.layers if layer.foreground]
 
+    def get_chunk(self, layer: LayerObject, chunk: Pos) -> Tuple[engine.Surface, List[engine.Surface]]:
+        key = (layer.nid, chunk)
+        if key in self._chunks:
+            self._chunks.move_to_end(key)
+            return self._chunks[key]
+        built = layer.build_chunk(chunk)
+        self._chunks[key] = built
+        if len(self._chunks) > MAX_CHUNKS:
+            self._chunks.popitem(last=False)
+        return built
+
     def get_full_image(self, cull_rect):
-        image = engine.create_surface((cull_rect[2], cull_rect[3]))
-        engine.fill(image, COLORKEY)
-        engine.set_colorkey(image, COLORKEY)
+        """
+        The returned image is reused by later calls, so copy it before drawing on it.
+        If neither the cull rect nor any background layer has changed since
+        the last call, the last image is returned as is
+        """
         layers = self.background_layers()
+        draw_state = (tuple(cull_rect), tuple(layer.get_draw_state() for layer in layers))
+        if draw_state == self._full_image_state:
+            return self._full_image
+        size = (cull_rect[2], cull_rect[3])
+        if not self._full_image or self._full_image.get_size() != size:
+            self._full_image = engine.create_surface(size)
+            engine.set_colorkey(self._full_image, COLORKEY)
+        image = self._full_image
+        engine.fill(image, COLORKEY)
         for layer in layers:
             if (layer.visible or layer.state == 'fade_out') and \
                     layer.should_draw(cull_rect):
-                main_image = layer.get_image(cull_rect)
-                image.blit(main_image, (0, 0))
-                autotile_image = layer.get_autotile_image(cull_rect)
-                if autotile_image:
-                    image.blit(autotile_image, (0, 0))
+                layer.draw(image, cull_rect)
+        self._full_image_state = draw_state
         return image
 
     def get_foreground_image(self, cull_rect):
-        image = engine.create_surface((cull_rect[2], cull_rect[3]), transparent=True)
+        """
+        Same as get_full_image, but for the foreground layers
+        """
         layers = self.foreground_layers()
+        draw_state = (tuple(cull_rect), tuple(layer.get_draw_state() for layer in layers))
+        if draw_state == self._foreground_image_state:
+            return self._foreground_image
+        size = (cull_rect[2], cull_rect[3])
+        if not self._foreground_image or self._foreground_image.get_size() != size:
+            self._foreground_image = engine.create_surface(size, transparent=True)
+        image = self._foreground_image
+        engine.fill(image, (0, 0, 0, 0))
         for layer in layers:
             if (layer.visible or layer.state == 'fade_out') and \
                     layer.should_draw(cull_rect):
-                main_image = layer.get_image(cull_rect)
-                image.blit(main_image, (0, 0))
-                autotile_image = layer.get_autotile_image(cull_rect)
-                if autotile_image:
-                    image.blit(autotile_image, (0, 0))
+                layer.draw(image, cull_rect)
+        self._foreground_image_state = draw_state
         return image
 
     def save_screenshot(self, fn: str = None):
@@ -290,7 +382,7 @@ class TileMapObject(Prefab):
             os.mkdir('screenshots')
 
         cull_rect = (0, 0, self.width * TILEWIDTH, self.height * TILEHEIGHT)
-        image = self.get_full_image(cull_rect)
+        image = engine.copy_surface(self.get_full_image(cull_rect))
         image.blit(self.get_foreground_image(cull_rect), (0, 0))
         if fn:
             ss_fn = os.path.join('screenshots', fn)
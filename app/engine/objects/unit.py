@@ -12,12 +12,14 @@ from app.engine.objects.difficulty_mode import DifficultyModeObject
 from app.engine.objects.item import ItemObject
 from app.engine.objects.skill import SkillObject
 from app.engine.source_type import SourceType
+from app.engine.utils import ltcache
 from app.utilities import utils
 from app.utilities.data import Prefab
 from app.utilities.typing import NID
 from typing import Union
 
 if TYPE_CHECKING:
+    from app.engine.component_system.utils import HookIndex
     from app.engine.unit_sound import UnitSound
     from app.engine.unit_sprite import UnitSprite
 
@@ -107,6 +109,7 @@ class UnitObject(Prefab):
 
     _skills: List[UnitSkill] = field(default_factory=list)
     _visible_skills_cache: List[SkillObject] = field(default_factory=list)
+    _skill_hook_index: Optional[HookIndex] = None  # Which skill components define each hook, see skill_system
 
     has_rescued: bool = False  #: Has the unit *rescued* someone this phase?
     has_taken: bool = False  #: Has the unit *taken* someone this phase?
@@ -318,7 +321,7 @@ class UnitObject(Prefab):
         # equip items and skill after initialization
         for s in self._skills:
             skill_system.after_add(self, s.get())
-        self._visible_skills_cache.clear()
+        self._reset_skills_cache()
 
         # -- Equipped Items
         self.autoequip()
@@ -435,7 +438,7 @@ class UnitObject(Prefab):
                 popped_skill = displaceable_skills[0]
         if not test:
             self._skills.append(UnitSkill(skill, source, source_type))
-            self._visible_skills_cache.clear()
+            self._reset_skills_cache()
         return popped_skill
 
     def remove_skill(self, skill, source, source_type=SourceType.DEFAULT, test=False):
@@ -454,13 +457,18 @@ class UnitObject(Prefab):
                 to_remove = s
         if not test and to_remove:
             self._skills.remove(to_remove)
-            self._visible_skills_cache.clear()
+            self._reset_skills_cache()
         return removed_skill_info
 
     @property
     def all_skills(self) -> List[SkillObject]:
         return [s.get() for s in self._skills]
 
+    def _reset_skills_cache(self):
+        self._visible_skills_cache.clear()
+        # Cached skill hooks for this unit are stale now
+        ltcache.alter_state((ltcache.SKILLS,))
+
     @property
     def skills(self) -> List[SkillObject]:
         """Returns a list of the unit's current skills.
@@ -1017,7 +1025,7 @@ class UnitObject(Prefab):
 
         for s in self._skills:
             skill_system.after_add_from_restore(self, s.get())
-        self._visible_skills_cache.clear()
+        self._reset_skills_cache()
 
         return self
 
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from array import array
+from typing import Optional, Tuple
+
+from app.utilities.grid import Grid
+from app.utilities.typing import Pos
+
+# Any tile that costs this much or more cannot be entered
+IMPASSABLE = 99
+
+class CostGrid():
+    """
+    Compact movement cost grid. Stores one float per tile in a flat
+    buffer, laid out the same way as Grid (x * height + y).
+
+    Pathfinders keep their own search state, so a single CostGrid
+    can be shared by every movement group with the same cost table.
+    """
+    __slots__ = ['width', 'height', 'costs', 'bounds']
+
+    def __init__(self, size: Tuple[int, int], costs: Optional[array] = None,
+                 bounds: Optional[Tuple[int, int, int, int]] = None):
+        self.width, self.height = size
+        if costs is None:
+            costs = array('d', bytes(8 * self.width * self.height))
+        self.costs: array = costs
+        self.bounds: Tuple[int, int, int, int] = bounds or (0, 0, self.width - 1, self.height - 1)
+
+    @classmethod
+    def from_nodes(cls, grid: Grid) -> CostGrid:
+        """
+        Builds a CostGrid from a grid of pathfinding Nodes
+        """
+        costs = array('d', (node.cost if node.reachable else max(node.cost, IMPASSABLE) for node in grid.cells()))
+        return cls((grid.width, grid.height), costs, getattr(grid, 'bounds', None))
+
+    def get_cost(self, pos: Pos) -> float:
+        return self.costs[pos[0] * self.height + pos[1]]
+
+    def set_cost(self, pos: Pos, cost: float):
+        self.costs[pos[0] * self.height + pos[1]] = cost
+
+    def reachable(self, pos: Pos) -> bool:
+        return self.costs[pos[0] * self.height + pos[1]] < IMPASSABLE
+
+    def check_bounds(self, pos: Pos) -> bool:
+        """
+        Leftmost, Topmost, Rightmost, Bottommost valid position
+        """
+        return self.bounds[0] <= pos[0] <= self.bounds[2] and self.bounds[1] <= pos[1] <= self.bounds[3]
+
+    def apply_bounds(self, bounds: Tuple[int, int, int, int]) -> CostGrid:
+        # Shares the cost buffer, so later changes to the costs are seen by both
+        return CostGrid((self.width, self.height), self.costs, bounds)
+
+    def __repr__(self):
+        return f'CostGrid: {self.width}x{self.height}'
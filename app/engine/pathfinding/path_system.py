@@ -1,7 +1,8 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List, Optional, Set
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Set, Tuple
 
 import functools
+import logging
 
 from app.engine import equations, skill_system
 from app.engine.movement import movement_funcs
@@ -11,8 +12,7 @@ from app.utilities.typing import Pos
 
 if TYPE_CHECKING:
     from app.engine.objects.unit import UnitObject
-    from app.utilities.grid import Grid, BoundedGrid
-    from app.engine.pathfinding.node import Node
+    from app.engine.pathfinding.cost_grid import CostGrid
 
 class PathSystem():
     def __init__(self, game: Optional[GameState] = None):
@@ -22,9 +22,32 @@ class PathSystem():
             from app.engine.game_state import game
             self.game = game
 
+        # Valid moves are cached until anything on the board changes
+        # Key: (unit nid, team, position, movement left, movement group, pass through)
+        self._valid_moves_cache: Dict[Tuple, FrozenSet[Pos]] = {}
+        # The board can be replaced wholesale (e.g. change_tilemap), and a
+        # fresh board's version starts over, so track which board as well
+        self._cache_board = None
+        self._cache_version: Optional[int] = None
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+    def clear_cache(self):
+        if self._valid_moves_cache:
+            logging.debug("Valid moves cache cleared. Hits: %d, Misses: %d", self.cache_hits, self.cache_misses)
+        self._valid_moves_cache.clear()
+
+    def _check_cache_version(self):
+        board = self.game.board
+        if board is not self._cache_board or board.version != self._cache_version:
+            self.clear_cache()
+            self._cache_board = board
+            self._cache_version = board.version
+
     def get_valid_moves(self, unit: UnitObject, force: bool = False, witch_warp: bool = True) -> Set[Pos]:
         """Given a unit, finds all positions on the map they can move to
         Assumes unit is on the map.
+        Results are cached until the board or its version changes.
         
         Args:
             unit (UnitObject): The unit to find valid moves for
@@ -37,18 +60,27 @@ class PathSystem():
         if not force and unit.finished:
             return set()
         mtype = movement_funcs.get_movement_group(unit)
-        grid: BoundedGrid[Node] = self.game.board.get_movement_grid(mtype)
         start_pos = unit.position
-        pathfinder = pathfinding.Djikstra(start_pos, grid)
         movement_left = equations.parser.movement(unit) if force else unit.movement_left
+        pass_through = skill_system.pass_through(unit)
 
-        if skill_system.pass_through(unit):
-            can_move_through = lambda adj: True
+        self._check_cache_version()
+        key = (unit.nid, unit.team, start_pos, movement_left, mtype, pass_through)
+        if key in self._valid_moves_cache:
+            self.cache_hits += 1
+            valid_moves = set(self._valid_moves_cache[key])
         else:
-            # Feed the unit's team into the function
-            can_move_through = functools.partial(self.game.board.can_move_through, unit.team)
-        valid_moves = pathfinder.process(can_move_through, movement_left)
-        valid_moves.add(unit.position)
+            self.cache_misses += 1
+            grid: CostGrid = self.game.board.get_movement_grid(mtype)
+            pathfinder = pathfinding.Djikstra(start_pos, grid)
+            if pass_through:
+                can_move_through = lambda adj: True
+            else:
+                # Feed the unit's team into the function
+                can_move_through = functools.partial(self.game.board.can_move_through, unit.team)
+            valid_moves = pathfinder.process(can_move_through, movement_left)
+            valid_moves.add(unit.position)
+            self._valid_moves_cache[key] = frozenset(valid_moves)
         if witch_warp:
             witch_warp = set(skill_system.witch_warp(unit))
             valid_moves |= witch_warp
@@ -69,7 +101,7 @@ class PathSystem():
             List[Pos]: The path (a list of positions), with the goal position first and the start position last
         """
         mtype = movement_funcs.get_movement_group(unit)
-        grid: BoundedGrid[Node] = self.game.board.get_movement_grid(mtype)
+        grid: CostGrid = self.game.board.get_movement_grid(mtype)
         assert unit.position
         start_pos = unit.position
 
@@ -114,7 +146,7 @@ class PathSystem():
             prev_pos = pos
         return True
 
-    def travel_algorithm(self, path: List[Pos], moves: int, unit: UnitObject, grid: Grid[Node]) -> Pos:
+    def travel_algorithm(self, path: List[Pos], moves: int, unit: UnitObject, grid: CostGrid) -> Pos:
         """
         Given a long path, travels along that path as far as possible.
         
@@ -124,7 +156,7 @@ class PathSystem():
             path (List[Pos]): The path
             moves (int): How many movement points the unit has left
             unit (UnitObject): The unit that will be "traveling"
-            grid (Grid[Node]): The movement grid the unit uses
+            grid (CostGrid): The movement grid the unit uses
         
         Returns:
             Pos: Where the AI should end up
@@ -135,7 +167,7 @@ class PathSystem():
         moves_left = moves
         through_path = 0
         for position in path[::-1][1:]:  # Remove start position, travel backwards
-            moves_left -= grid.get(position).cost
+            moves_left -= grid.get_cost(position)
             if moves_left >= 0:
                 through_path += 1
             else:
@@ -1,155 +1,194 @@
 import heapq
-from typing import Callable, List, Optional, Set, Tuple
+import math
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple, Union
 
 from app.engine import bresenham_line_algorithm
 
+from app.engine.pathfinding.cost_grid import CostGrid, IMPASSABLE
 from app.engine.pathfinding.node import Node
-from app.utilities.grid import BoundedGrid
+from app.utilities.grid import Grid
 from app.utilities.typing import Pos
 
-class Djikstra:
-    __slots__ = ['open', 'closed', 'grid', 'start_pos', 'start_node']
-
-    def __init__(self, start_pos: Pos, grid: BoundedGrid[Node]):
-        self.open: List[Node] = []
-        heapq.heapify(self.open)
-        self.closed: Set[Node] = set()
-        self.grid: BoundedGrid[Node] = grid
-        self._reset_grid()
-        self.start_pos: Pos = start_pos
-        self.start_node: Node = self.grid.get(start_pos)
+class SearchState():
+    """
+    Scratch arrays that hold the per-tile state of a search.
+
+    One is shared by every search over grids with the same number of tiles.
+    Each search takes a new generation, and any tile stamped with an older
+    generation is treated as unvisited, so a search only touches the tiles
+    it actually visits and nothing needs to be reset in between.
+    """
+    __slots__ = ['generation', 'stamp', 'g', 'f', 'true_f', 'parent']
+
+    def __init__(self, size: int):
+        self.generation: int = 0
+        self.stamp = array('Q', bytes(8 * size))  # Which search last touched this tile
+        self.g = array('d', bytes(8 * size))  # True distance to starting position (takes into account movement costs)
+        self.f = array('d', bytes(8 * size))  # Final heuristic (g + h)
+        self.true_f = array('d', bytes(8 * size))  # f but does not include minor adjustment for preferring a straight line path
+        self.parent = array('q', bytes(8 * size))
+
+    def new_generation(self) -> int:
+        self.generation += 1
+        return self.generation
 
-    def _reset_grid(self):
-        for node in self.grid.cells():
-            node.reset()
+_search_states: Dict[int, SearchState] = {}
 
-    def _get_adj_nodes(self, node: Node) -> List[Node]:
-        return self._get_manhattan_adj_nodes(node)
+def get_search_state(size: int) -> SearchState:
+    if size not in _search_states:
+        _search_states[size] = SearchState(size)
+    return _search_states[size]
+
+def as_cost_grid(grid: Union[CostGrid, Grid[Node]]) -> CostGrid:
+    """
+    Pathfinders run on CostGrids. A grid of Nodes is converted once up front.
+    """
+    if isinstance(grid, CostGrid):
+        return grid
+    return CostGrid.from_nodes(grid)
+
+class Djikstra:
+    __slots__ = ['grid', 'start_pos', 'start_idx']
+
+    def __init__(self, start_pos: Pos, grid: Union[CostGrid, Grid[Node]]):
+        self.grid: CostGrid = as_cost_grid(grid)
+        self.start_pos: Pos = start_pos
+        self.start_idx: int = start_pos[0] * self.grid.height + start_pos[1]
 
-    def _get_manhattan_adj_nodes(self, node: Node) -> List[Node]:
-        nodes: List[Node] = []
-        for adj in [(node.x, node.y + 1), (node.x + 1, node.y), 
-                    (node.x - 1, node.y), (node.x, node.y - 1)]:
-            if self.grid.check_bounds(adj):
-                nodes.append(self.grid.get(adj))
-        return nodes
+    def _get_adj_idxs(self, idx: int) -> List[int]:
+        return self._get_manhattan_adj_idxs(idx)
 
-    def _update_node(self, adj: Node, node: Node):
-        # g is true distance between this node and starting position
-        adj.g = node.g + adj.cost
-        adj.parent = node
+    def _get_manhattan_adj_idxs(self, idx: int) -> List[int]:
+        height = self.grid.height
+        min_x, min_y, max_x, max_y = self.grid.bounds
+        x, y = divmod(idx, height)
+        idxs: List[int] = []
+        for adj_x, adj_y in ((x, y + 1), (x + 1, y), (x - 1, y), (x, y - 1)):
+            if min_x <= adj_x <= max_x and min_y <= adj_y <= max_y:
+                idxs.append(adj_x * height + adj_y)
+        return idxs
 
-    def process(self, can_move_through: Callable[[Pos], bool], 
+    def process(self, can_move_through: Callable[[Pos], bool],
                 movement_left: float) -> Set[Pos]:
-        # add starting node to open heap queue
-        heapq.heappush(self.open, (self.start_node.g, self.start_node))
-        while self.open:
-            # pop node from heap queue
-            g, node = heapq.heappop(self.open)
+        costs = self.grid.costs
+        height = self.grid.height
+        state = get_search_state(len(costs))
+        generation = state.new_generation()
+        stamp, g_score = state.stamp, state.g
+
+        closed: Set[int] = set()
+        start = self.start_idx
+        stamp[start] = generation
+        g_score[start] = 0
+        # add starting tile to open heap queue
+        open: List[Tuple[float, int]] = [(0, start)]
+        while open:
+            # pop tile from heap queue
+            g, idx = heapq.heappop(open)
+            # Stale entry left behind when a shorter path to this tile was found
+            if idx in closed:
+                continue
             # If we've traveled too far -- always g ordered, so leaving at the
             # first sign of trouble will always work
             if g > movement_left:
-                return {(node.x, node.y) for node in self.closed}
-            # add node to closed set so we don't process it twice
-            self.closed.add(node)
-            # get adjacent nodes for node
-            adj_nodes = self._get_adj_nodes(node)
-            for adj in adj_nodes:
-                if adj.reachable and adj not in self.closed:
-                    if can_move_through((adj.x, adj.y)):
-                        if (adj.g, adj) in self.open:
-                            # if adj node in open list, check if current path
-                            # is better than the one previously found for this adj node
-                            if adj.g > node.g + adj.cost:
-                                self._update_node(adj, node)
-                                heapq.heappush(self.open, (adj.g, adj))
-                        else:
-                            self._update_node(adj, node)
-                            heapq.heappush(self.open, (adj.g, adj))
+                break
+            # add tile to closed set so we don't process it twice
+            closed.add(idx)
+            for adj in self._get_adj_idxs(idx):
+                cost = costs[adj]
+                if cost < IMPASSABLE and adj not in closed:
+                    if can_move_through(divmod(adj, height)):
+                        # g is true distance between this tile and starting position
+                        new_g = g + cost
+                        # if adj tile already in open list, only update if current path
+                        # is better than the one previously found for this adj tile
+                        if stamp[adj] != generation or g_score[adj] > new_g:
+                            stamp[adj] = generation
+                            g_score[adj] = new_g
+                            heapq.heappush(open, (new_g, adj))
                     else:  # Unit is in the way
                         pass
-        # Sometimes gets here if unit is fully enclosed
-        return {(node.x, node.y) for node in self.closed}
+        # Sometimes runs out of tiles if unit is fully enclosed
+        return {divmod(idx, height) for idx in closed}
 
 class AStar:
-    def __init__(self, start_pos: Pos, goal_pos: Optional[Pos], grid: BoundedGrid[Node]):
-        self.grid = grid
+    def __init__(self, start_pos: Pos, goal_pos: Optional[Pos], grid: Union[CostGrid, Grid[Node]]):
+        self.grid: CostGrid = as_cost_grid(grid)
         self.start_pos = start_pos
         self.goal_pos = goal_pos
 
-        self.start_node: Node = self.grid.get(start_pos)
-        self.end_node: Node = self.grid.get(goal_pos) if goal_pos else None
-        self.adj_end: List[Node] = self._get_adj_nodes(self.end_node) if self.end_node else None
+        self.start_idx: int = self._to_idx(start_pos)
+        self.end_idx: Optional[int] = self._to_idx(goal_pos) if goal_pos else None
+        self.adj_end: Optional[Set[int]] = set(self._get_adj_idxs(self.end_idx)) if goal_pos else None
 
         self.reset()
 
-    def _reset_grid(self):
-        for node in self.grid.cells():
-            node.reset()
+    def _to_idx(self, pos: Pos) -> int:
+        return pos[0] * self.grid.height + pos[1]
 
     def reset(self):
-        self.open: List[Node] = []
-        heapq.heapify(self.open)
-        self.closed: Set[Node] = set()
-        self._reset_grid()
+        """
+        Search state lives in the shared scratch arrays and is lazily
+        reset by generation, so there is no need to touch the grid here
+        """
+        self.open: List[Tuple[float, int]] = []
+        self.closed: Set[int] = set()
 
     def set_goal_pos(self, goal_pos: Pos):
         self.goal_pos = goal_pos
-        self.end_node = self.grid.get(goal_pos)
-        self.adj_end = self._get_adj_nodes(self.end_node)
-
-    def _get_simple_heuristic(self, node: Node) -> float:
-        """
-        Compute the heuristic for this node
-        h is the approximate distance between this node and the goal node
-        """
-        dx1 = node.x - self.end_node.x
-        dy1 = node.y - self.end_node.y
-        h = abs(dx1) + abs(dy1)
-        return h
+        self.end_idx = self._to_idx(goal_pos)
+        self.adj_end = set(self._get_adj_idxs(self.end_idx))
 
-    def _get_heuristic(self, node: Node) -> float:
+    def _get_heuristics(self, idx: int) -> Tuple[float, float]:
         """
-        Compute the heuristic for this node
-        h is the approximate distance between this node and the goal node
+        Compute the heuristics for this tile
+        h is the approximate distance between this tile and the goal tile
+        Returns h with a slight nudge towards the straight line from start to goal,
+        and h without it
         """
         # Get main heuristic
-        dx1 = node.x - self.end_node.x
-        dy1 = node.y - self.end_node.y
+        x, y = divmod(idx, self.grid.height)
+        dx1 = x - self.goal_pos[0]
+        dy1 = y - self.goal_pos[1]
         h = abs(dx1) + abs(dy1)
         # Are we going in direction of goal?
         # Slight nudge in direction that lies along path from start to end
-        dx2 = self.start_node.x - self.end_node.x
-        dy2 = self.start_node.y - self.end_node.y
+        dx2 = self.start_pos[0] - self.goal_pos[0]
+        dy2 = self.start_pos[1] - self.goal_pos[1]
         cross = abs(dx1 * dy2 - dx2 * dy1)
-        return h + cross * .001
-
-    def _get_adj_nodes(self, node: Node) -> List[Node]:
-        return self._get_manhattan_adj_nodes(node)
-
-    def _get_manhattan_adj_nodes(self, node: Node) -> List[Node]:
-        nodes: List[Node] = []
-        for adj in [(node.x, node.y + 1), (node.x + 1, node.y), 
-                    (node.x - 1, node.y), (node.x, node.y - 1)]:
-            if self.grid.check_bounds(adj):
-                nodes.append(self.grid.get(adj))
-        return nodes
-
-    def _update_node(self, adj: Node, node: Node):
-        # h is approximate distance between this node and the goal
-        # g is true distance between this node and the starting position
+        return h + cross * .001, h
+
+    def _get_adj_idxs(self, idx: int) -> List[int]:
+        return self._get_manhattan_adj_idxs(idx)
+
+    def _get_manhattan_adj_idxs(self, idx: int) -> List[int]:
+        height = self.grid.height
+        min_x, min_y, max_x, max_y = self.grid.bounds
+        x, y = divmod(idx, height)
+        idxs: List[int] = []
+        for adj_x, adj_y in ((x, y + 1), (x + 1, y), (x - 1, y), (x, y - 1)):
+            if min_x <= adj_x <= max_x and min_y <= adj_y <= max_y:
+                idxs.append(adj_x * height + adj_y)
+        return idxs
+
+    def _update_node(self, state: SearchState, adj: int, idx: int):
+        # h is approximate distance between this tile and the goal
+        # g is true distance between this tile and the starting position
         # f is simply them added together
-        adj.g = node.g + adj.cost
-        adj.h = self._get_heuristic(adj)
-        adj.parent = node
-        adj.f = adj.h + adj.g
-        adj.true_f = self._get_simple_heuristic(adj) + adj.g
+        g = state.g[idx] + self.grid.costs[adj]
+        state.g[adj] = g
+        state.parent[adj] = idx
+        h, simple_h = self._get_heuristics(adj)
+        state.f[adj] = h + g
+        state.true_f[adj] = simple_h + g
 
-    def _return_path(self, node: Node) -> List[Pos]:
+    def _return_path(self, state: SearchState, idx: int) -> List[Pos]:
         path = []
-        while node:
-            path.append((node.x, node.y))
-            node = node.parent
+        while idx >= 0:
+            path.append(divmod(idx, self.grid.height))
+            idx = state.parent[idx]
         return path
 
     def process(self, can_move_through: Callable[[Pos], bool],
@@ -157,71 +196,219 @@ class AStar:
                 max_movement_limit: int = 999) -> List[Pos]:
         """
         Args:
-            can_move_through (Callable): Expects a callback function that takes in a position 
+            can_move_through (Callable): Expects a callback function that takes in a position
                 and returns whether an enemy unit is standing in that position, which means we can't move through it.
             adj_good_enough (bool, optional): If set, moving adjacent to the goal position also counts as meeting its goal.
             limit (float, optional): If set, return the best answer once we've evaluated all paths that cost <= this cost limit
             max_movement_limit (int, optional): Defaults to 999. Treat as impassable all nodes with cost > this limit.
         """
-        # Add starting node to open queue
-        heapq.heappush(self.open, (self.start_node.f, self.start_node))
+        costs = self.grid.costs
+        height = self.grid.height
+        state = get_search_state(len(costs))
+        generation = state.new_generation()
+        stamp, g_score, true_f = state.stamp, state.g, state.true_f
+        self.reset()
+
+        start = self.start_idx
+        stamp[start] = generation
+        g_score[start] = 0
+        state.f[start] = 0
+        true_f[start] = 0
+        state.parent[start] = -1
+        # Add starting tile to open queue
+        heapq.heappush(self.open, (0, start))
         while self.open:
-            f, node = heapq.heappop(self.open)
-            # Make sure we don't process the node twice
-            self.closed.add(node)
-            # If this node is past the limit, just return None
+            f, idx = heapq.heappop(self.open)
+            # Stale entry left behind when a shorter path to this tile was found
+            if idx in self.closed:
+                continue
+            # Make sure we don't process the tile twice
+            self.closed.add(idx)
+            # If this tile is past the limit, just return None
             # Uses f, not g, because g will cut off if first greedy path fails
-            # f only cuts off if all nodes are bad
-            if limit is not None and node.true_f > limit:
+            # f only cuts off if all tiles are bad
+            if limit is not None and true_f[idx] > limit:
                 return []
-            # if ending node, display found path
-            if node is self.end_node or (adj_good_enough and node in self.adj_end):
-                return self._return_path(node)
-            # get adjacent nodes for node
-            adj_nodes = self._get_adj_nodes(node)
-            for adj in adj_nodes:
-                if adj.reachable and adj not in self.closed:
-                    if can_move_through((adj.x, adj.y)) and adj.cost <= max_movement_limit:
-                        if (adj.f, adj) in self.open:
-                            # if adj node in open list, check if current path
-                            # is better than the one previously found for this adj node
-                            if adj.g > node.g + adj.cost:
-                                self._update_node(adj, node)
-                                heapq.heappush(self.open, (adj.f, adj))
+            # if ending tile, display found path
+            if idx == self.end_idx or (adj_good_enough and idx in self.adj_end):
+                return self._return_path(state, idx)
+            # get adjacent tiles for tile
+            for adj in self._get_adj_idxs(idx):
+                cost = costs[adj]
+                if cost < IMPASSABLE and adj not in self.closed:
+                    if can_move_through(divmod(adj, height)) and cost <= max_movement_limit:
+                        if stamp[adj] == generation:
+                            # if adj tile already in open list, check if current path
+                            # is better than the one previously found for this adj tile
+                            if g_score[adj] > g_score[idx] + cost:
+                                self._update_node(state, adj, idx)
+                                heapq.heappush(self.open, (state.f[adj], adj))
                         else:
-                            self._update_node(adj, node)
-                            heapq.heappush(self.open, (adj.f, adj))
+                            stamp[adj] = generation
+                            self._update_node(state, adj, idx)
+                            heapq.heappush(self.open, (state.f[adj], adj))
                     else:  # Is blocked
                         pass
         return []
 
+class DistanceField():
+    """
+    Cost of the cheapest path from the start position to every tile
+    within max_distance of it, found in a single Djikstra pass.
+
+    Answers path queries for any number of goals without searching again,
+    so it replaces running one AStar per goal when there are many goals.
+    Keeps its own arrays instead of the shared search state so it can be held onto
+    """
+    __slots__ = ['grid', 'start_pos', 'max_distance', 'dist', 'parent']
+
+    def __init__(self, start_pos: Pos, grid: Union[CostGrid, Grid[Node]],
+                 can_move_through: Callable[[Pos], bool],
+                 max_distance: float = math.inf, max_movement_limit: int = 999):
+        """
+        Args:
+            can_move_through (Callable): Same as AStar.process
+            max_distance (float, optional): Tiles that cost more than this to reach are left unreached
+            max_movement_limit (int, optional): Same as AStar.process
+        """
+        self.grid: CostGrid = as_cost_grid(grid)
+        self.start_pos: Pos = start_pos
+        self.max_distance: float = max_distance
+        size = len(self.grid.costs)
+        self.dist = array('d', [math.inf]) * size
+        self.parent = array('q', [-1]) * size
+        self._process(can_move_through, max_movement_limit)
+
+    def _get_adj_idxs(self, idx: int) -> List[int]:
+        height = self.grid.height
+        min_x, min_y, max_x, max_y = self.grid.bounds
+        x, y = divmod(idx, height)
+        idxs: List[int] = []
+        for adj_x, adj_y in ((x, y + 1), (x + 1, y), (x - 1, y), (x, y - 1)):
+            if min_x <= adj_x <= max_x and min_y <= adj_y <= max_y:
+                idxs.append(adj_x * height + adj_y)
+        return idxs
+
+    def _process(self, can_move_through: Callable[[Pos], bool], max_movement_limit: int):
+        costs = self.grid.costs
+        height = self.grid.height
+        dist, parent = self.dist, self.parent
+        start = self.start_pos[0] * height + self.start_pos[1]
+        # (Distance, tile, tile it was reached from)
+        open: List[Tuple[float, int, int]] = [(0, start, -1)]
+        while open:
+            g, idx, prev = heapq.heappop(open)
+            # Already reached more cheaply
+            if dist[idx] < math.inf:
+                continue
+            # Always g ordered, so everything left is too far
+            if g > self.max_distance:
+                break
+            dist[idx] = g
+            parent[idx] = prev
+            for adj in self._get_adj_idxs(idx):
+                cost = costs[adj]
+                if cost < IMPASSABLE and dist[adj] == math.inf and cost <= max_movement_limit \
+                        and can_move_through(divmod(adj, height)):
+                    heapq.heappush(open, (g + cost, adj, idx))
+
+    def get_distance(self, pos: Pos) -> float:
+        """
+        Returns the cost of the cheapest path to pos, or inf if pos cannot be reached
+        """
+        return self.dist[pos[0] * self.grid.height + pos[1]]
+
+    def get_path(self, goal_pos: Pos, adj_good_enough: bool = False, limit: float = None) -> List[Pos]:
+        """
+        Returns the cheapest path to goal_pos, from goal_pos back to the start position,
+        or an empty list if there is none. Arguments are the same as AStar.process.
+        The field must have been built with a max_distance of at least limit
+        """
+        height = self.grid.height
+        goal_idx = goal_pos[0] * height + goal_pos[1]
+        best_idx, best_cost = -1, math.inf
+        # Costs include the remaining distance to the goal, same as AStar's limit check.
+        # On a tie, AStar reaches the adjacent tile before the goal, so check those first
+        candidates = [(adj, 1) for adj in self._get_adj_idxs(goal_idx)] if adj_good_enough else []
+        candidates.append((goal_idx, 0))
+        for idx, remaining in candidates:
+            cost = self.dist[idx] + remaining
+            if cost < best_cost:
+                best_idx, best_cost = idx, cost
+        if best_idx < 0 or (limit is not None and best_cost > limit):
+            return []
+        path = []
+        idx = best_idx
+        while idx >= 0:
+            path.append(divmod(idx, height))
+            idx = self.parent[idx]
+        return path
+
+class DistanceFieldCache():
+    """
+    Distance fields that can be shared between units that start from the same
+    position with the same movement group, blocking, and movement limit.
+    Everything is thrown out whenever the version passed in changes
+    (the board and its version, generally, since a new board for a new
+    level starts back at the same version numbers)
+    """
+    def __init__(self, max_size: int = 16):
+        self.max_size = max_size
+        self.version = None
+        self._fields: OrderedDict[Hashable, DistanceField] = OrderedDict()
+
+    def get(self, version, key: Hashable, start_pos: Pos, grid: CostGrid,
+            can_move_through: Callable[[Pos], bool], max_distance: float = math.inf,
+            max_movement_limit: int = 999) -> DistanceField:
+        """
+        Args:
+            key (Hashable): Identifies the grid and what can_move_through blocks,
+                (movement group, team) say. Fields with the same key are shared
+        """
+        if version != self.version:
+            self._fields.clear()
+            self.version = version
+        key = (key, start_pos, max_movement_limit)
+        field = self._fields.get(key)
+        # A field that stops short of max_distance cannot answer everything needed
+        if field is None or field.max_distance < max_distance:
+            field = DistanceField(start_pos, grid, can_move_through, max_distance, max_movement_limit)
+            self._fields[key] = field
+            if len(self._fields) > self.max_size:
+                self._fields.popitem(last=False)
+        self._fields.move_to_end(key)
+        return field
+
+DISTANCE_FIELDS = DistanceFieldCache()
+
 class ThetaStar(AStar):
     """
     # Just a slight modification to AStar that enables better straight line
     # pathing because we can skip nodes
     """
-    def _update_node(self, adj: Node, node: Node):
-        # h is approximate distance between this node and the goal
-        # g is true distance between this node and the starting position
+    def _update_node(self, state: SearchState, adj: int, idx: int):
+        # h is approximate distance between this tile and the goal
+        # g is true distance between this tile and the starting position
         # f is simply them added together
         # If line of sight is valid, we can just use the parent
-        # of the current node rather than the current node
-        if node.parent and self._line_of_sight(node.parent, adj):
-            adj.g = node.parent.g + adj.cost
-            adj.parent = node.parent
+        # of the current tile rather than the current tile
+        parent = state.parent[idx]
+        if parent >= 0 and self._line_of_sight(parent, adj):
+            g = state.g[parent] + self.grid.costs[adj]
+            state.parent[adj] = parent
         else:
-            adj.g = node.g + adj.cost
-            adj.parent = node
-        adj.h = self._get_heuristic(adj)
-        adj.f = adj.h + adj.g
-        adj.true_f = self._get_simple_heuristic(adj) + adj.g
+            g = state.g[idx] + self.grid.costs[adj]
+            state.parent[adj] = idx
+        state.g[adj] = g
+        h, simple_h = self._get_heuristics(adj)
+        state.f[adj] = h + g
+        state.true_f[adj] = simple_h + g
 
-    def _line_of_sight(self, node1: Node, node2: Node) -> bool:
+    def _line_of_sight(self, idx1: int, idx2: int) -> bool:
         def cannot_move_through(pos: Tuple[int, int]) -> bool:
-            node = self.grid.get(pos)
-            return not node.reachable
+            return not self.grid.reachable(pos)
 
-        pos1 = node1.x, node1.y
-        pos2 = node2.x, node2.y
+        pos1 = divmod(idx1, self.grid.height)
+        pos2 = divmod(idx2, self.grid.height)
         valid = bresenham_line_algorithm.get_line(pos1, pos2, cannot_move_through)
         return valid
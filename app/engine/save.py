@@ -1,4 +1,4 @@
-import os, shutil, glob, re
+import os, glob, re
 from datetime import datetime
 from typing import Optional
 import threading
@@ -12,6 +12,7 @@ from app.utilities import str_utils
 from app.data.database.database import DB
 
 import app.engine.config as cf
+from app.engine import save_container
 from app.engine.objects.item import ItemObject
 from app.engine.objects.skill import SkillObject
 
@@ -86,28 +87,16 @@ def save_io(s_dict, meta_dict, old_slot, slot, force_loc=None, name=None):
 
     logging.info("Saving to %s", save_loc)
 
-    with open(save_loc, 'wb') as fp:
-        # pickle.dump(s_dict, fp, -1)
-        try:
-            pickle.dump(s_dict, fp)
-        except TypeError as e:
-            # There's a surface somewhere in the dictionary of things to save...
-            logging.error(e)
-            dict_print(s_dict)
-            print(e)
-            for k, v in s_dict.items():
-                try:
-                    pickle.dumps(v)
-                except TypeError as e2:
-                    logging.error(e2)
-                    print(e2)
-                    logging.error("The offending object is in %s" % k)
-                    print("The offending object is in %s" % k)
-                    logging.error(v)
-                    print(v)
-
-    with open(meta_loc, 'wb') as fp:
-        pickle.dump(meta_dict, fp)
+    try:
+        save_container.write_save(save_loc, s_dict, meta_dict)
+    except TypeError as e:
+        # There's a surface somewhere in the dictionary of things to save...
+        logging.error(e)
+        dict_print(s_dict)
+        print(e)
+        return
+
+    save_container.write_meta(meta_loc, meta_dict)
 
     # For restart
     if not force_loc:
@@ -117,14 +106,14 @@ def save_io(s_dict, meta_dict, old_slot, slot, force_loc=None, name=None):
         # Then rename it to restart file
         if meta_dict['kind'] == 'start':
             if save_loc != r_save:
-                shutil.copy(save_loc, r_save)
-                shutil.copy(meta_loc, r_save_meta)
+                save_container.share_save(save_loc, r_save)
+                save_container.share_save(meta_loc, r_save_meta)
         elif old_slot is not None:
             old_name = 'saves/' + GAME_NID() + '-restart' + str(old_slot) + '.p'
             old_name_meta = old_name + 'meta'
             if old_name != r_save and os.path.exists(old_name):
-                shutil.copy(old_name, r_save)
-                shutil.copy(old_name_meta, r_save_meta)
+                save_container.share_save(old_name, r_save)
+                save_container.share_save(old_name_meta, r_save_meta)
 
     # For preload
     if meta_dict['kind'] == 'start':
@@ -134,8 +123,8 @@ def save_io(s_dict, meta_dict, old_slot, slot, force_loc=None, name=None):
         preload_save = 'saves/' + GAME_NID() + '-preload-' + str(meta_dict['level_nid']) + '-' + unique_nid + '.p'
         preload_save_meta = 'saves/' + GAME_NID() + '-preload-' + str(meta_dict['level_nid']) + '-' + unique_nid + '.pmeta'
 
-        shutil.copy(save_loc, preload_save)
-        shutil.copy(meta_loc, preload_save_meta)
+        save_container.share_save(save_loc, preload_save)
+        save_container.share_save(meta_loc, preload_save_meta)
 
 def suspend_game(game_state, kind, slot: int = None, name=None, display_name=None):
     """
@@ -167,8 +156,7 @@ def load_game(game_state, save_slot: SaveSlot):
     """
     save_loc = save_slot.save_loc
     logging.info("Loading from %s", save_loc)
-    with open(save_loc, 'rb') as fp:
-        s_dict = pickle.load(fp)
+    s_dict = save_container.read_save(save_loc)
     game_state.build_new()
     game_state.load(s_dict)
     game_state.current_save_slot = save_slot.idx
@@ -0,0 +1,144 @@
+"""
+Save files are a container of separately addressable sections,
+one per top level key of the save dict (units, items, skills, level, action_log, ...)
+
+Layout:
+    MAGIC
+    4 byte little endian length of the header
+    header: pickled dict with the format version, the save metadata,
+        and the (name, offset, length, crc32) of each section
+    payload: every section, pickled and compressed, back to back
+
+Each section is only decompressed and unpickled the first time it is
+asked for. Loading a game reads every section anyway, so this only saves
+work for tools that look at part of a save.
+
+Saves are written to a temporary file and then moved into place, so a
+save file is never modified once written. That means restart and preload
+copies can be hard links to the same file instead of full duplicates.
+"""
+
+import os
+import shutil
+import struct
+import zlib
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+import logging
+
+MAGIC = b'LTSAVE\x00\x01'
+VERSION = 1
+# Saves happen often (every turn change), so favor speed over size
+COMPRESSION_LEVEL = 1
+
+class CorruptSaveError(ValueError):
+    pass
+
+def encode_section(value: Any) -> bytes:
+    return zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), COMPRESSION_LEVEL)
+
+def decode_section(name: str, data: bytes, crc: int) -> Any:
+    if zlib.crc32(data) != crc:
+        raise CorruptSaveError("Save section %s failed its checksum" % name)
+    return pickle.loads(zlib.decompress(data))
+
+def write_save(save_loc: str, sections: Dict[str, Any], meta: Optional[dict] = None):
+    """
+    Writes each item of sections as its own section.
+    Raises the pickling error of the first section that cannot be saved,
+    after logging which section it was
+    """
+    chunks: List[bytes] = []
+    index: List[Tuple[str, int, int, int]] = []
+    offset = 0
+    for name, value in sections.items():
+        try:
+            data = encode_section(value)
+        except (TypeError, pickle.PicklingError, AttributeError):
+            logging.error("The offending object is in %s" % name)
+            raise
+        index.append((name, offset, len(data), zlib.crc32(data)))
+        chunks.append(data)
+        offset += len(data)
+
+    header = pickle.dumps({'version': VERSION, 'meta': meta, 'sections': index}, pickle.HIGHEST_PROTOCOL)
+    tmp_loc = save_loc + '.tmp'
+    with open(tmp_loc, 'wb') as fp:
+        fp.write(MAGIC)
+        fp.write(struct.pack('<I', len(header)))
+        fp.write(header)
+        for data in chunks:
+            fp.write(data)
+    os.replace(tmp_loc, save_loc)
+
+def write_meta(meta_loc: str, meta: dict):
+    """
+    Writes the separate metadata file that goes next to each save file
+    """
+    tmp_loc = meta_loc + '.tmp'
+    with open(tmp_loc, 'wb') as fp:
+        pickle.dump(meta, fp)
+    os.replace(tmp_loc, meta_loc)
+
+def _read_header(fp) -> Optional[dict]:
+    if fp.read(len(MAGIC)) != MAGIC:
+        return None
+    header_length, = struct.unpack('<I', fp.read(4))
+    return pickle.loads(fp.read(header_length))
+
+class SaveSections(Mapping):
+    """
+    Read-only dict-like view of a save file's sections.
+    Decodes each section the first time it is accessed
+    """
+    def __init__(self, header: dict, payload: bytes):
+        self.meta: Optional[dict] = header.get('meta')
+        self._index: Dict[str, Tuple[int, int, int]] = \
+            {name: (offset, length, crc) for name, offset, length, crc in header['sections']}
+        self._payload = payload
+        self._decoded: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._decoded:
+            offset, length, crc = self._index[name]
+            self._decoded[name] = decode_section(name, self._payload[offset:offset + length], crc)
+        return self._decoded[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._decoded
+
+def read_save(save_loc: str) -> Mapping:
+    """
+    Returns the sections of the save file, decoded lazily.
+    Also reads saves from before the container format, which are a single pickled dict
+    """
+    with open(save_loc, 'rb') as fp:
+        header = _read_header(fp)
+        if header is None:
+            fp.seek(0)
+            return pickle.load(fp)
+        return SaveSections(header, fp.read())
+
+def share_save(src: str, dst: str):
+    """
+    Makes dst a copy of the save file src.
+    Save files are never modified in place, so a hard link is as good as a copy
+    """
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
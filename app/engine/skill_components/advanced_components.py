@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING
 from app.data.database.components import ComponentType
 from app.data.database.skill_components import SkillComponent, SkillTags
 from app.engine import action, equations, item_funcs, skill_system
+from app.engine.component_system.utils import invalidate_hook_indices
 from app.engine.game_state import game
 import app.engine.combat.playback as pb
 from app.utilities import static_random
@@ -48,6 +49,7 @@ class MultiSkill(SkillComponent):
         for subaction in subactions:
             action.execute(subaction)
             subaction.skill_obj.components.append(parent_condition)
+            invalidate_hook_indices()
 
     # remove all child skills when the skill is removed
     def after_remove(self, unit, skill):
@@ -7,6 +7,8 @@ if TYPE_CHECKING:
 
 import logging
 
+from app.engine.frame_profiler import PROFILER
+
 
 class SimpleStateMachine():
     def __init__(self, starting_state):
@@ -248,24 +250,32 @@ class StateMachine():
         # Start
         if not state.started:
             state.started = True
+            start_time = PROFILER.mark()
             start_output = state.start()
+            PROFILER.record(state.name, 'start', start_time)
             if start_output == 'repeat':
                 repeat_flag = True
             self.prev_state = state.name
         # Begin
         if not repeat_flag and not state.processed:
             state.processed = True
+            start_time = PROFILER.mark()
             begin_output = state.begin()
+            PROFILER.record(state.name, 'begin', start_time)
             if begin_output == 'repeat':
                 repeat_flag = True
         # Take Input
         if not repeat_flag:
+            start_time = PROFILER.mark()
             input_output = state.take_input(event)
+            PROFILER.record(state.name, 'take_input', start_time)
             if input_output == 'repeat':
                 repeat_flag = True
         # Update
         if not repeat_flag:
+            start_time = PROFILER.mark()
             update_output = state.update()
+            PROFILER.record(state.name, 'update', start_time)
             if update_output == 'repeat':
                 repeat_flag = True
         # Draw
@@ -278,12 +288,16 @@ class StateMachine():
                 else:
                     break
             while idx <= -1:
+                start_time = PROFILER.mark()
                 surf = self.state[idx].draw(surf)
+                PROFILER.record(self.state[idx].name, 'draw', start_time)
                 idx += 1
         # End
         if self.temp_state and state.processed:
             state.processed = False
+            start_time = PROFILER.mark()
             state.end()
+            PROFILER.record(state.name, 'end', start_time)
         # Finish
         self.process_temp_state()  # This is where FINISH is taken care of
         return surf, repeat_flag
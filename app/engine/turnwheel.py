@@ -3,13 +3,14 @@ from typing import List, Tuple
 
 import math
 import logging
+import zlib
 from dataclasses import dataclass
 
 from app.data.resources.resources import RESOURCES
 
 import app.engine.action as Action
 from app.constants import WINHEIGHT, WINWIDTH
-from app.engine import base_surf, engine, gui, image_mods
+from app.engine import base_surf, engine, gui, image_mods, save_container
 from app.engine.background import SpriteBackground
 from app.engine.battle_animation import BattleAnimation
 from app.engine.fonts import FONT
@@ -22,6 +23,52 @@ from app.engine.sprites import SPRITES
 from app.engine.state import MapState
 from app.events import triggers
 
+# How many phases worth of actions are saved as is.
+# Older actions the turnwheel can still reach are saved packed into checkpoints
+LIVE_PHASES = 6
+
+@dataclass
+class Checkpoint():
+    """
+    One phase worth of actions, compressed in their saved form.
+    Only exists in saves. The actions are restored as soon as the save is
+    loaded, so they find their units and items the same way every other
+    action in the save does
+    """
+    data: bytes
+    crc: int
+    num_actions: int
+
+    @classmethod
+    def pack(cls, actions: List[Action.Action]) -> Checkpoint:
+        data = save_container.encode_section([action.save() for action in actions])
+        return cls(data, zlib.crc32(data), len(actions))
+
+    def unpack(self) -> List[Action.Action]:
+        return [getattr(Action, name).restore(action) for name, action in
+                save_container.decode_section('turnwheel checkpoint', self.data, self.crc)]
+
+    def save(self):
+        return (self.data, self.crc, self.num_actions)
+
+    @classmethod
+    def restore(cls, serial):
+        return cls(*serial)
+
+def get_end_lock_and_phase(actions: List[Action.Action], lock: bool, phase: str) -> Tuple[bool, str]:
+    """
+    Returns the turnwheel lock and phase in effect after the actions,
+    given the lock and phase in effect before them
+    """
+    for action in reversed(actions):
+        if isinstance(action, Action.LockTurnwheel):
+            lock = action.lock
+            break
+    for action in reversed(actions):
+        if isinstance(action, Action.MarkPhase):
+            phase = action.phase_name
+            break
+    return lock, phase
 
 class ActionLog():
     def __init__(self):
@@ -42,6 +89,10 @@ class ActionLog():
         # Since it will call the other actions it needs to reverse itself
         # on it's own. 0 means first action in the chain
         self.action_depth: int = 0
+        # What the turnwheel lock and phase were at the end of
+        # the actions that have been compacted away
+        self._compacted_lock: bool = False
+        self._compacted_phase: str = 'player'
 
         # For playback
         self.current_unit = None
@@ -359,7 +410,7 @@ class ActionLog():
             cur_action = self.actions[cur_index]
             if isinstance(cur_action, Action.LockTurnwheel):
                 return cur_action.lock
-        return False  # Assume not locked
+        return self._compacted_lock
 
     def get_current_phase(self):
         cur_index = self.action_index
@@ -368,7 +419,7 @@ class ActionLog():
             cur_action = self.actions[cur_index]
             if isinstance(cur_action, Action.MarkPhase):
                 return cur_action.phase_name
-        return 'player'
+        return self._compacted_phase
 
     def is_turned_back(self):
         return self.action_index + 1 < len(self.actions)
@@ -398,6 +449,46 @@ class ActionLog():
         logging.debug("*** First Free Action ***")
         self._first_free_action = self.action_index
 
+    def compact(self):
+        """
+        Called at each phase change, so the action log does not keep every
+        action since the start of the level around and in every save.
+        Throws out every action the turnwheel can no longer go back to,
+        keeping only the turnwheel lock and phase they left behind
+        """
+        if self.is_turned_back() or self.action_depth > 0:
+            return
+        num_discarded = self._first_free_action + 1
+        if num_discarded > 0:
+            self._compacted_lock, self._compacted_phase = \
+                get_end_lock_and_phase(self.actions[:num_discarded], self._compacted_lock, self._compacted_phase)
+            logging.debug("Compacting %d actions out of the action log", num_discarded)
+            self.actions = self.actions[num_discarded:]
+            self.action_index -= num_discarded
+            self._first_free_action = -1
+
+    def _pack_checkpoints(self) -> Tuple[List[Checkpoint], int]:
+        """
+        Packs each phase older than the last LIVE_PHASES into a checkpoint.
+        Returns the checkpoints and how many actions they hold
+        """
+        phase_starts = [idx for idx, action in enumerate(self.actions) if isinstance(action, Action.MarkPhase)]
+        if len(phase_starts) <= LIVE_PHASES:
+            return [], 0
+        # Actions before the first phase mark go in with the first phase
+        boundaries = [0] + phase_starts[1:len(phase_starts) - LIVE_PHASES + 1]
+        checkpoints = []
+        num_packed = 0
+        for begin, end in zip(boundaries, boundaries[1:]):
+            try:
+                checkpoints.append(Checkpoint.pack(self.actions[begin:end]))
+            except Exception as e:
+                # Save the rest as is
+                logging.error("Could not pack actions %d to %d into a turnwheel checkpoint: %s", begin, end, e)
+                break
+            num_packed = end
+        return checkpoints, num_packed
+
     def hover_on(self, unit):
         game.cursor.set_turnwheel_sprite()
         self.hovered_unit = unit
@@ -416,7 +507,10 @@ class ActionLog():
         self.record -= 1
 
     def save(self):
-        return ([action.save() for action in self.actions], self._first_free_action, self.record)
+        checkpoints, num_packed = self._pack_checkpoints()
+        return ([action.save() for action in self.actions[num_packed:]], self._first_free_action, self.record,
+                self._compacted_lock, self._compacted_phase,
+                [checkpoint.save() for checkpoint in checkpoints])
 
     @classmethod
     def restore(cls, serial):
@@ -424,8 +518,16 @@ class ActionLog():
         if len(serial) == 2:  # deprecated
             actions, first_free_action = serial
             record = 0
-        else:
+        elif len(serial) == 3:
             actions, first_free_action, record = serial
+        elif len(serial) == 5:
+            actions, first_free_action, record, self._compacted_lock, self._compacted_phase = serial
+        else:
+            actions, first_free_action, record, self._compacted_lock, self._compacted_phase, checkpoints = serial
+            # Packed actions come before the rest
+            for checkpoint in checkpoints:
+                for packed_action in Checkpoint.restore(checkpoint).unpack():
+                    self.append(packed_action)
         for name, action in actions:
             self.append(getattr(Action, name).restore(action))
         self._first_free_action = first_free_action
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import math
-from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
 
 from app.counters import GenericAnimCounter
 from app.data.database.units import UnitPrefab
@@ -28,6 +29,39 @@ from app.utilities.typing import NID, Color3
 
 import logging
 
+# (frame, effect key) -> the frame with that effect applied
+# Effect keys hold the exact integer alpha or color the effect uses,
+# so a cached frame is identical to one made fresh
+EFFECT_CACHE_SIZE = 512
+_effect_cache: OrderedDict = OrderedDict()
+# Fades and flickers only take this many distinct strengths, so an
+# animated effect cycles through a few cached frames instead of
+# producing a new color (and a new cache entry) every frame
+EFFECT_STEPS = 16
+
+def cached_effect(image: engine.Surface, key: tuple, make: Callable[[engine.Surface], engine.Surface]) -> engine.Surface:
+    """
+    Returns make(image), only calling make if this frame has not had
+    the effect described by key applied to it recently.
+    The returned image is shared, so it must not be drawn on
+    """
+    cache_key = (image, key)
+    new_image = _effect_cache.get(cache_key)
+    if new_image is not None:
+        _effect_cache.move_to_end(cache_key)
+        return new_image
+    new_image = make(image.convert_alpha())
+    _effect_cache[cache_key] = new_image
+    if len(_effect_cache) > EFFECT_CACHE_SIZE:
+        _effect_cache.popitem(last=False)
+    return new_image
+
+def quantize_effect(t: float) -> float:
+    return round(utils.clamp(t, 0, 1) * EFFECT_STEPS) / EFFECT_STEPS
+
+def _translucent_key(t: float) -> tuple:
+    return ('translucent', utils.clamp(255 - int(255 * t), 0, 255))
+
 class SingleMapSprite():
     frames: List[engine.Surface] = []
     counter: GenericAnimCounter = None
@@ -565,7 +599,12 @@ class UnitSprite():
                 extra_height = new_height - cur_height
                 image = engine.transform_scale(image, (new_width, new_height))
                 top -= extra_height
-            image = image_mods.make_translucent(image.convert_alpha(), progress)
+                # The stretched image is new every frame, so there's nothing to cache
+                image = image_mods.make_translucent(image.convert_alpha(), progress)
+            else:
+                progress = quantize_effect(progress)
+                image = cached_effect(image, _translucent_key(progress),
+                                      lambda im: image_mods.make_translucent(im, progress))
 
         elif self.transition_state in ('fade_in', 'warp_in', 'swoosh_in') or self.state in ('fake_transition_in'):
             progress = utils.clamp((self.transition_time - self.transition_counter) / self.transition_time, 0, 1)
@@ -577,7 +616,11 @@ class UnitSprite():
                 extra_height = new_height - cur_height
                 image = engine.transform_scale(image, (new_width, new_height))
                 top -= extra_height
-            image = image_mods.make_translucent(image.convert_alpha(), progress)
+                image = image_mods.make_translucent(image.convert_alpha(), progress)
+            else:
+                progress = quantize_effect(progress)
+                image = cached_effect(image, _translucent_key(progress),
+                                      lambda im: image_mods.make_translucent(im, progress))
 
         # Flickering the unit a specific color, like flash white during a map combat hit
         for flicker in self.flicker[:]:
@@ -588,15 +631,17 @@ class UnitSprite():
                     continue
                 if fade_out:
                     time_passed = engine.get_time() - starting_time
-                    color = tuple((total_time - time_passed) * float(c) // total_time for c in color)
+                    strength = quantize_effect((total_time - time_passed) / total_time)
+                    color = tuple(c * strength for c in color)
+                color = tuple(int(c) for c in color)
                 if direction == 'add':
-                    image = image_mods.add_tint(image.convert_alpha(), color)
+                    image = cached_effect(image, ('add_tint', color), lambda im: image_mods.add_tint(im, color))
                 elif direction == 'sub':
-                    image = image_mods.sub_tint(image.convert_alpha(), color)
+                    image = cached_effect(image, ('sub_tint', color), lambda im: image_mods.sub_tint(im, color))
 
         # Color a unit red if they are highlighted by the boundary
         if not self.flicker and game.boundary.draw_flag and self.unit.nid in game.boundary.displaying_units:
-            image = image_mods.change_color(image.convert_alpha(), (60, 0, 0))
+            image = cached_effect(image, ('change_color', (60, 0, 0)), lambda im: image_mods.change_color(im, (60, 0, 0)))
 
         # Turnwheel tint of unit sprite
         if game.action_log.hovered_unit is self.unit:
@@ -605,13 +650,19 @@ class UnitSprite():
                 diff = current_time % length
                 if diff > length // 2:
                     diff = length - diff
-                diff = utils.clamp(255. * diff / length * 2, 0, 255)
+                diff = 255. * quantize_effect(diff / length * 2)
                 color = (0, int(diff * .5), 0)  # Tint image green at magnitude depending on diff
-                image = image_mods.change_color(image.convert_alpha(), color)
+                image = cached_effect(image, ('change_color', color), lambda im: image_mods.change_color(im, color))
 
         flicker_tints = skill_system.unit_sprite_flicker_tint(self.unit)
-        flicker_tints = [image_mods.FlickerTint(*tint) for tint in flicker_tints]
-        image = image_mods.draw_flicker_tint(image, current_time, flicker_tints)
+        if flicker_tints:
+            flicker_tints = [image_mods.FlickerTint(*tint) for tint in flicker_tints]
+            for color, add in image_mods.get_flicker_tint_colors(current_time, flicker_tints, EFFECT_STEPS):
+                color = tuple(color)
+                if add:
+                    image = cached_effect(image, ('add_tint', color), lambda im: image_mods.add_tint(im, color))
+                else:
+                    image = cached_effect(image, ('sub_tint', color), lambda im: image_mods.sub_tint(im, color))
 
         # Each image has (self.image.get_width() - 32)//2 pixels on the
         # left and right of it, to handle any off tile spriting
@@ -1,17 +1,45 @@
 import functools
-import uuid
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Dependency tags. A cached function that declares its dependencies is
+# only invalidated when something alters one of those parts of the game state
+SKILLS = 'skills'  # Which skills a unit has, and their component values
+ITEMS = 'items'  # Which items a unit has, and their component values
+BOARD = 'board'  # Where units are on the map
+STATS = 'stats'  # A unit's hp, mana, exp and other numbers
+UNIT_STATE = 'unit_state'  # A unit's per turn flags (has moved, has attacked, etc.)
 
 class LTCache():
-    _state: uuid.UUID
+    """
+    Tracks how the game state has changed so cached functions know when to throw out their results.
+
+    Every alteration bumps the state. An alteration that names the parts of
+    the game state it touched also bumps the version of each of those tags.
+    An alteration that does not name anything might have touched
+    anything, so it bumps the wildcard version that every tag depends on.
+    """
+    _state: int
     def __init__(self):
-        self._state = uuid.uuid1()
+        self._state = 0
+        self._wildcard = 0
+        self._tag_versions: Dict[str, int] = {}
 
-    def alter_state(self):
-        self._state = uuid.uuid1()
+    def alter_state(self, tags: Optional[Tuple[str, ...]] = None):
+        self._state += 1
+        if tags is None:
+            self._wildcard += 1
+        else:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
 
-    def get_state(self) -> uuid.UUID:
+    def get_state(self) -> int:
         return self._state
 
+    def get_tag_state(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        return (self._wildcard,) + tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
 LT_CACHE = None
 def init() -> LTCache:
     """Init the LTCache instance."""
@@ -20,29 +48,128 @@ def init() -> LTCache:
         LT_CACHE = LTCache()
     return LT_CACHE
 
-def get_state() -> uuid.UUID:
+# Without an LTCache instance nothing can be trusted, so every call gets a fresh state
+_uncached_state = 0
+
+def get_state() -> int:
     """Get the current state of the LTCache."""
-    global LT_CACHE
+    global LT_CACHE, _uncached_state
     if LT_CACHE is None:
-        return uuid.uuid1()
+        _uncached_state -= 1
+        return _uncached_state
     return LT_CACHE.get_state()
 
-def alter_state():
-    """Alter the state of the LTCache."""
+def get_tag_state(tags: Tuple[str, ...]) -> Tuple[int, ...]:
+    """Get the current versions of the given dependency tags."""
+    global LT_CACHE
+    if LT_CACHE is None:
+        return (get_state(),)
+    return LT_CACHE.get_tag_state(tags)
+
+def alter_state(tags: Optional[Tuple[str, ...]] = None):
+    """Alter the state of the LTCache. If tags are given, only those parts of the game state were altered."""
     global LT_CACHE
     if LT_CACHE is not None:
-        LT_CACHE.alter_state()
+        LT_CACHE.alter_state(tags)
+
+class CacheStats():
+    __slots__ = ['name', 'hits', 'misses', 'invalidations']
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+_cache_stats: Dict[str, CacheStats] = {}
+
+def get_cache_stats() -> List[CacheStats]:
+    """Stats for every cached function, most called first."""
+    return sorted(_cache_stats.values(), key=lambda stats: stats.hits + stats.misses, reverse=True)
+
+def reset_cache_stats():
+    for stats in _cache_stats.values():
+        stats.hits = stats.misses = stats.invalidations = 0
+
+def log_cache_stats():
+    for stats in get_cache_stats():
+        logging.debug("ltcache %s: %d hits, %d misses (%.1f%% hit rate), %d invalidations",
+                      stats.name, stats.hits, stats.misses, stats.hit_rate() * 100, stats.invalidations)
+
+# Cached calls currently being computed that only depend on some tags.
+# If one of them ends up relying on something untracked, it falls back to
+# depending on the whole game state
+_tagged_calls: List[list] = []
+
+def depends_on_game_state():
+    """
+    Mark the cached calls currently being computed as relying on any part
+    of the game state, not just the tags they declared.
+    """
+    for volatile in _tagged_calls:
+        volatile[0] = True
+
+def ltcached(func: Callable = None, *, depends_on: Optional[Tuple[str, ...]] = None, maxsize: int = 128):
+    """
+    Decorator to cache the result of a function.
+
+    Without depends_on, results are thrown out whenever the game state is altered at all.
+    With depends_on, results are only thrown out when the game state is altered
+    in one of those tags, or in an unknown way. A result whose computation
+    called depends_on_game_state, or hit such a result, is thrown out on any alteration.
+    """
+    if func is None:
+        return lambda f: ltcached(f, depends_on=depends_on, maxsize=maxsize)
+
+    stats = _cache_stats.setdefault(func.__qualname__, CacheStats(func.__qualname__))
+    # key -> (state the result was computed at if it relies on the whole game state else None, result)
+    cache: OrderedDict = OrderedDict()
+    prev_state = None
 
-def ltcached(func):
-    """Decorator to cache the result of a function."""
-    func = functools.lru_cache()(func)
-    prev_state = get_state()
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         nonlocal prev_state
-        curr_state = get_state()
+        state = get_state()
+        curr_state = get_tag_state(depends_on) if depends_on is not None else state
         if curr_state != prev_state:
-            func.cache_clear()
+            if cache:
+                stats.invalidations += 1
+            cache.clear()
             prev_state = curr_state
-        return func(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+
+        key = args if not kwargs else args + tuple(sorted(kwargs.items()))
+        entry = cache.get(key)
+        if entry is not None and (entry[0] is None or entry[0] == state):
+            stats.hits += 1
+            cache.move_to_end(key)
+            if entry[0] is not None:
+                depends_on_game_state()
+            return entry[1]
+
+        stats.misses += 1
+        if depends_on is not None:
+            volatile = [False]
+            _tagged_calls.append(volatile)
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _tagged_calls.pop()
+            computed_at = state if volatile[0] else None
+        else:
+            result = func(*args, **kwargs)
+            computed_at = state
+            # Anything computing on top of this relies on the whole game state too
+            depends_on_game_state()
+        cache[key] = (computed_at, result)
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+        return result
+
+    def cache_clear():
+        cache.clear()
+    wrapper.cache_clear = cache_clear
+    return wrapper
@@ -9,6 +9,7 @@ from app.engine.game_state import game
 from app.engine import action, evaluate
 
 import logging
+import time
 
 class EventManager():
     def __init__(self):
@@ -26,14 +27,25 @@ class EventManager():
                 event_source_nid = game.level_nid
             else:
                 event_source_nid = None
-        for event_prefab in DB.events.get(trigger.nid, event_source_nid):
+        start = time.time_ns() / 1e6
+        candidates = DB.events.get_candidates(trigger.nid, event_source_nid)
+        if not candidates:
+            return triggered_events
+        args = trigger.to_args()
+        for event_prefab, trivial_condition in candidates:
+            if event_prefab.nid in game.already_triggered_events:
+                continue
+            if trivial_condition:
+                triggered_events.append(event_prefab)
+                continue
             try:
-                args = trigger.to_args()
                 result = evaluate.evaluate(event_prefab.condition, unit1=args.get('unit1', None), unit2=args.get('unit2', None), position=args.get('position', None), local_args=args)
-                if event_prefab.nid not in game.already_triggered_events and result:
+                if result:
                     triggered_events.append(event_prefab)
             except:
                 logging.error("Condition {%s} could not be evaluated" % event_prefab.condition)
+        logging.debug("Trigger %s: %d events checked, %d triggered in %.2f ms",
+                      trigger.nid, len(candidates), len(triggered_events), time.time_ns() / 1e6 - start)
         return triggered_events
 
     def should_trigger(self, trigger: EventTrigger, level_nid=None):
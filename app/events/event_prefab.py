@@ -23,6 +23,15 @@ def get_event_version(script: str) -> EventVersion.EVENT:
     except:
         return EventVersion.EVENT
 
+# Bumped whenever an event's trigger, level, or condition changes (in the editor)
+# so event catalogs know to rebuild their trigger index
+_index_version = 0
+INDEXED_ATTRS = ('trigger', 'level_nid', 'condition')
+
+def _bump_index_version():
+    global _index_version
+    _index_version += 1
+
 class EventPrefab(Prefab):
     def __init__(self, name):
         self.name = name
@@ -35,6 +44,15 @@ class EventPrefab(Prefab):
 
         self._source: List[str] = []
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in INDEXED_ATTRS:
+            _bump_index_version()
+
+    def has_trivial_condition(self) -> bool:
+        """Whether the condition is always True, so does not need to be evaluated"""
+        return isinstance(self.condition, str) and self.condition.strip() == 'True'
+
     @property
     def nid(self):
         if not self.name:
@@ -97,10 +115,91 @@ class EventCatalog(Data[EventPrefab]):
     def __init__(self, vals: List[EventPrefab] | None = None):
         super().__init__(vals)
         self.inspector = EventInspectorEngine(self)
+        # Trigger nid: Events with that trigger, in order. Rebuilt from scratch when None
+        self._trigger_index: Optional[Dict[NID, List[EventPrefab]]] = None
+        self._index_version: int = _index_version
+        # (Trigger nid, Level nid): (Event, Whether its condition is trivially True) for each event that could fire
+        self._level_index: Dict[Tuple[NID, Optional[NID]], List[Tuple[EventPrefab, bool]]] = {}
+
+    def _get_trigger_index(self) -> Dict[NID, List[EventPrefab]]:
+        if self._trigger_index is None or self._index_version != _index_version:
+            self._trigger_index = {}
+            for event in self._list:
+                self._trigger_index.setdefault(event.trigger, []).append(event)
+            self._index_version = _index_version
+            self._level_index.clear()
+        return self._trigger_index
+
+    def _reset_index(self):
+        self._trigger_index = None
+        self._level_index.clear()
+
+    def _clear_level_index(self, trigger_nid: NID):
+        for key in [key for key in self._level_index if key[0] == trigger_nid]:
+            del self._level_index[key]
+
+    def _index_added(self, event: EventPrefab):
+        if self._trigger_index is not None:
+            self._trigger_index.setdefault(event.trigger, []).append(event)
+            self._clear_level_index(event.trigger)
+
+    def _index_removed(self, event: EventPrefab):
+        if self._trigger_index is not None:
+            events = self._trigger_index.get(event.trigger, [])
+            if event in events:
+                events.remove(event)
+            self._clear_level_index(event.trigger)
+
+    def append(self, val: EventPrefab, overwrite: bool = False):
+        added = overwrite or val.nid not in self._dict
+        super().append(val, overwrite)
+        if added:
+            self._index_added(val)
+
+    def delete(self, val: EventPrefab):
+        if val.nid in self._dict:
+            super().delete(val)
+            self._index_removed(val)
+
+    def remove_key(self, key: NID):
+        val = self._dict[key]
+        super().remove_key(key)
+        self._index_removed(val)
+
+    def pop(self, idx: Optional[int] = None):
+        super().pop(idx)
+        self._reset_index()
+
+    def insert(self, idx: int, val: EventPrefab):
+        super().insert(idx, val)
+        self._reset_index()
+
+    def clear(self):
+        super().clear()
+        self._reset_index()
+
+    def move_index(self, old_index: int, new_index: int):
+        super().move_index(old_index, new_index)
+        self._reset_index()
+
+    def sort(self, sort_func=None):
+        super().sort(sort_func)
+        self._reset_index()
+
+    def get_candidates(self, trigger_nid, level_nid) -> List[Tuple[EventPrefab, bool]]:
+        """
+        Returns each event that could fire for the trigger in the level,
+        along with whether its condition is trivially True
+        """
+        key = (trigger_nid, level_nid)
+        trigger_index = self._get_trigger_index()
+        if key not in self._level_index:
+            self._level_index[key] = [(event, event.has_trivial_condition()) for event in trigger_index.get(trigger_nid, [])
+                                      if not event.level_nid or event.level_nid == level_nid]
+        return self._level_index[key]
 
     def get(self, trigger_nid, level_nid):
-        return [event for event in self._list if event.trigger == trigger_nid and
-                (not event.level_nid or event.level_nid == level_nid)]
+        return [event for event, _ in self.get_candidates(trigger_nid, level_nid)]
 
     def get_by_level(self, level_nid: Optional[NID]) -> List[EventPrefab]:
         return [event for event in self._list if (not event.level_nid or not level_nid or event.level_nid == level_nid)]
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import functools
 import logging
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from app.engine.text_evaluator import TextEvaluator
 from app.events import event_commands
@@ -64,11 +65,54 @@ class IteratorInfo():
         self.iterator = EventIterator.restore(s_dict['iterator'])
         return self
 
+class JumpTable():
+    """
+    Where each conditional and loop command in a list of commands jumps to.
+    Built in a single pass, so branching never has to scan through the commands
+    """
+    def __init__(self, commands: List[event_commands.EventCommand]):
+        # Index of if, elif, else, or for: index after the end or endf of its block
+        self.block_ends: Dict[int, int] = {}
+        # Index of if, elif, or else: index of the next elif, else, or end of its block
+        self.next_clauses: Dict[int, int] = {}
+
+        open_blocks: List[List[int]] = []  # Indices of the clauses of each if block not yet ended
+        open_loops: List[int] = []
+        for idx, command in enumerate(commands):
+            if command.nid == 'if':
+                open_blocks.append([idx])
+            elif command.nid in ('elif', 'else'):
+                if open_blocks:
+                    open_blocks[-1].append(idx)
+                else:
+                    open_blocks.append([idx])
+            elif command.nid == 'end':
+                if open_blocks:
+                    clauses = open_blocks.pop()
+                    for clause, next_clause in zip(clauses, clauses[1:] + [idx]):
+                        self.block_ends[clause] = idx + 1
+                        self.next_clauses[clause] = next_clause
+            elif command.nid == 'for':
+                open_loops.append(idx)
+            elif command.nid == 'endf':
+                if open_loops:
+                    self.block_ends[open_loops.pop()] = idx + 1
+
+@functools.lru_cache(maxsize=256)
+def parse_script(script: str) -> Tuple[List[event_commands.EventCommand], JumpTable]:
+    """
+    Parses the script into commands and their jump table.
+    The same few scripts are started over and over, so each is only parsed once.
+    The commands are shared, so must not be modified
+    """
+    commands = event_commands.parse_script_to_commands(script)
+    return commands, JumpTable(commands)
+
 class EventProcessor():
     def __init__(self, nid: NID, script: str, text_evaluator: TextEvaluator):
         self.nid = nid
         self.script = script
-        self.commands: List[event_commands.EventCommand] = event_commands.parse_script_to_commands(script)
+        self.commands, self.jump_table = parse_script(script)
         self.command_pointer = 0
 
         self.logger = logging.getLogger()
@@ -107,51 +151,27 @@ class EventProcessor():
         truth = self._get_truth(base_conditional)
         if truth:
             return index + 1
-        # not true, so seek next clause
-        level = 0
-        curr_index = index + 1
-        while(curr_index) < len(self.commands):
-            curr_command = self.commands[curr_index]
-            if level == 0:
-                if curr_command.nid in ('elif',):
-                    return self._jump_conditional(curr_index)
-                elif curr_command.nid in ('end', 'else'):
-                    return curr_index + 1
-            if curr_command.nid == 'if':
-                level += 1
-            elif curr_command.nid == 'end':
-                level -= 1
-            curr_index += 1
-        # have not found end clause
-        # maybe throw instead?
-        raise SyntaxError("Line %d: %s has no corresponding terminator" % (index, str(base_conditional)))
+        return self._skip_clause(index)
+
+    def _skip_clause(self, index: int) -> int:
+        """Given an index of a conditional if or elif that is false,
+        returns the index of the next command to run,
+        i.e. after the next `else` or `end`, or the next true `elif`'s contents"""
+        self._find_end(index)
+        next_index = self.jump_table.next_clauses[index]
+        if self.commands[next_index].nid == 'elif':
+            return self._jump_conditional(next_index)
+        return next_index + 1
 
     def _find_end(self, index: int) -> int:
         """given an index of an if, elif, else, for, or while command,
         gets the index of the end of the entire block.
         """
         base_conditional = self.commands[index]
-        start_command = 'if'
-        end_command = 'end'
-        if base_conditional.nid in ('if', 'elif', 'else'):
-            pass
-        elif base_conditional.nid == 'for':
-            start_command = 'for'
-            end_command = 'endf'
-        else:
+        if base_conditional.nid not in ('if', 'elif', 'else', 'for'):
             raise TypeError("%s is not a conditional command" % str(base_conditional))
-        level = 0
-        curr_index = index + 1
-        while curr_index < len(self.commands):
-            curr_command = self.commands[curr_index]
-            if curr_command.nid == start_command:
-                level += 1
-            elif curr_command.nid == end_command:
-                if level == 0:
-                    return curr_index + 1
-                else:
-                    level -= 1
-            curr_index += 1
+        if index in self.jump_table.block_ends:
+            return self.jump_table.block_ends[index]
         raise SyntaxError("Line %d: %s has no corresponding terminator" % (index, str(base_conditional)))
 
     def _build_iterator(self, index: int, command: event_commands.EventCommand) -> IteratorInfo:
@@ -177,7 +197,7 @@ class EventProcessor():
                 if truth:
                     self.command_pointer += 1
                 else:
-                    self.command_pointer = self._jump_conditional(self.command_pointer)
+                    self.command_pointer = self._skip_clause(self.command_pointer)
                 continue
             elif command.nid in ('elif', 'else'):
                 # if we naturally navigate to elif/else,
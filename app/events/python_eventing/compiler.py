@@ -1,4 +1,15 @@
-from typing import Dict, Type
+import functools
+import hashlib
+import importlib.util
+import logging
+import marshal
+import os
+import shutil
+from collections import OrderedDict
+from types import CodeType
+from typing import Dict, Optional, Tuple, Type
+
+from app.constants import VERSION
 from app.events.event_prefab import get_event_version
 from app.events.event_version import EventVersion
 from app.events.python_eventing.postcomp.compiled_event import CompiledEvent
@@ -10,9 +21,139 @@ VERSION_MAP: Dict[EventVersion, Type[SWSCompilerV1]] = {
     EventVersion.PYEV1: SWSCompilerV1
 }
 
+# Everything that decides what an event compiles to: the SWS compiler, the post
+# compiler, the engine header and command wrappers it writes into the event
+# (all under this folder), and the event commands themselves
+COMPILER_SOURCES = [
+    os.path.dirname(os.path.abspath(__file__)),
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'event_commands.py'),
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'event_structs.py'),
+]
+
+@functools.lru_cache()
+def get_compiler_version() -> str:
+    """
+    Hash of the engine version and the source of the compiler, so events
+    compiled by any other engine are never loaded from the disk cache.
+    Without the sources (a frozen build), only the engine version counts
+    """
+    version = hashlib.sha1(VERSION.encode())
+    for path in COMPILER_SOURCES:
+        if os.path.isdir(path):
+            fns = sorted(os.path.join(root, fn) for root, _, files in os.walk(path)
+                         for fn in files if fn.endswith('.py'))
+        else:
+            fns = [path]
+        for fn in fns:
+            try:
+                with open(fn, 'rb') as fp:
+                    version.update(fp.read())
+            except OSError:
+                pass
+    return version.hexdigest()[:16]
+
+class CompiledEventCache():
+    """
+    Compiled python events, keyed by a hash of the script and the command
+    pointer it was compiled to resume from.
+    Kept in memory, and also on disk once a cache directory is set,
+    so an event is only compiled the first time it is ever run.
+    On disk, each compiler version gets its own folder inside the cache directory
+    """
+    # Python bytecode is only valid for the interpreter version that made it
+    MAGIC = b'LTEV' + importlib.util.MAGIC_NUMBER
+
+    def __init__(self, max_size: int = 128, max_disk_size: int = 1024):
+        self.cache_dir: Optional[str] = None
+        self.max_size = max_size
+        self.max_disk_size = max_disk_size
+        self._memory: OrderedDict[str, Tuple[str, CodeType]] = OrderedDict()
+
+    def set_cache_dir(self, cache_dir: Optional[str]):
+        self.cache_dir = os.path.join(cache_dir, get_compiler_version()) if cache_dir else None
+        if cache_dir:
+            self.prune(cache_dir)
+
+    def prune(self, cache_dir: str):
+        """
+        Throws out everything cached by other compiler versions, then the
+        least recently used events past max_disk_size
+        """
+        if not os.path.isdir(cache_dir):
+            return
+        try:
+            for fn in os.listdir(cache_dir):
+                path = os.path.join(cache_dir, fn)
+                if path == self.cache_dir:
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+            if os.path.isdir(self.cache_dir):
+                paths = [os.path.join(self.cache_dir, fn) for fn in os.listdir(self.cache_dir)]
+                paths.sort(key=os.path.getmtime, reverse=True)
+                for path in paths[self.max_disk_size:]:
+                    os.remove(path)
+        except OSError as e:
+            logging.warning("Could not prune event cache %s: %s", cache_dir, e)
+
+    def get_key(self, script: str, command_pointer: int) -> str:
+        key = hashlib.sha1(('%s %d\n' % (get_compiler_version(), command_pointer)).encode())
+        key.update(script.encode('utf-8'))
+        return key.hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.ltev')
+
+    def get(self, key: str) -> Optional[Tuple[str, CodeType]]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.cache_dir and os.path.exists(self._get_path(key)):
+            try:
+                with open(self._get_path(key), 'rb') as fp:
+                    if fp.read(len(self.MAGIC)) == self.MAGIC:
+                        compiled_script, code = marshal.load(fp)
+                        self._remember(key, compiled_script, code)
+                        # So pruning keeps the events that are actually used
+                        os.utime(self._get_path(key))
+                        return compiled_script, code
+            except (OSError, EOFError, ValueError, TypeError) as e:
+                logging.warning("Could not read cached event %s: %s", key, e)
+        return None
+
+    def put(self, key: str, compiled_script: str, code: CodeType):
+        self._remember(key, compiled_script, code)
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_loc = self._get_path(key) + '.tmp'
+                with open(tmp_loc, 'wb') as fp:
+                    fp.write(self.MAGIC)
+                    marshal.dump((compiled_script, code), fp)
+                os.replace(tmp_loc, self._get_path(key))
+            except OSError as e:
+                logging.warning("Could not cache event %s: %s", key, e)
+
+    def _remember(self, key: str, compiled_script: str, code: CodeType):
+        self._memory[key] = (compiled_script, code)
+        if len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        self._memory.clear()
+
+COMPILED_EVENT_CACHE = CompiledEventCache()
+
 class Compiler():
     @staticmethod
     def compile(event_name: str, script: str, command_pointer: int = 0) -> CompiledEvent:
+        key = COMPILED_EVENT_CACHE.get_key(script, command_pointer)
+        cached = COMPILED_EVENT_CACHE.get(key)
+        if cached:
+            compiled_script, code = cached
+            return CompiledEvent(event_name, script, compiled_script, code)
         version = get_event_version(script)
         if not version in VERSION_MAP:
             raise ValueError("In event %s: Unknown python event version: '%s'" %(event_name, version))
@@ -20,7 +161,9 @@ class Compiler():
         original_script = script
         sentinel_script = sws_compiler(script).compile_sws()
         compiled_script = PostComp.postcompile(sentinel_script, command_pointer)
-        return CompiledEvent(event_name, original_script, compiled_script)
+        code = compile(compiled_script, '<string>', 'exec')
+        COMPILED_EVENT_CACHE.put(key, compiled_script, code)
+        return CompiledEvent(event_name, original_script, compiled_script, code)
 
     @staticmethod
     def compile_analyzer(script: str) -> str:
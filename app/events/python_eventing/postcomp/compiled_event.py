@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 import sys
 import traceback
-from typing import Generator
+from types import CodeType
+from typing import Generator, Optional
 from app.engine.evaluate import get_context
 from app.engine.game_state import GameState
 from app.events.python_eventing.errors import InvalidPythonError
@@ -13,10 +14,11 @@ class CompiledEvent():
     event: NID          # event nid
     source: str         # original source code of event
     compiled: str       # pythonic source code of event
+    code: Optional[CodeType] = None  # compiled bytecode of the pythonic source
 
     def get_runnable(self, game: GameState, context: dict=None) -> Generator:
         exec_context = get_context(game=game, local_args=context)
-        exec(self.compiled, exec_context)
+        exec(self.code or self.compiled, exec_context)
         # possibility that there are some errors in python script
         try:
             gen = exec_context[EVENT_GEN_NAME]()
@@ -19,7 +19,7 @@ class PythonEventProcessor():
         self.source = source
         self.curr_cmd_idx = curr_cmd_idx
         self.is_finished = False
-        self._compiled_script = Compiler.compile(nid, source, 0)
+        self._compiled_script = Compiler.compile(nid, source, curr_cmd_idx)
         self._executable = self._compiled_script.get_runnable(game, context)
 
     @lru_cache()
@@ -76,8 +76,5 @@ class PythonEventProcessor():
     def restore(cls, s_dict, game: GameState) -> PythonEventProcessor:
         source = s_dict['source']
         nid = s_dict['nid']
-        self = cls(nid, source, game)
-        self.curr_cmd_idx = s_dict['curr_cmd_idx']
-        self._compiled_script = Compiler.compile(nid, source, self.curr_cmd_idx)
-        self._executable = self._compiled_script.get_runnable(game)
+        self = cls(nid, source, game, s_dict['curr_cmd_idx'])
         return self
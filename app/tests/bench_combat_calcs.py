@@ -0,0 +1,86 @@
+"""
+Micro-benchmark for combat_calcs.compute_hit and combat_calcs.compute_damage
+on a unit carrying many skills. Runs each calc against the per-unit hook
+dispatch index, then again with skill hook dispatch swapped back to the
+old flat scan over every component of every skill.
+
+Starts a headless engine on the first level of testing_proj.
+Not picked up by the test runner. Run with:
+    python -m app.tests.bench_combat_calcs
+"""
+import os
+import time
+
+from app.data.serialization.versions import CURRENT_SERIALIZATION_VERSION
+from app.utilities.data import Data
+
+def flat_scan(unit, hook_names):
+    # What every generated skill hook did before the dispatch index
+    return [(skill, component) for skill in unit.skills for component in skill.components
+            if any(component.defines(hook_name) for hook_name in hook_names)]
+
+def add_skills(game, unit, num_skills: int):
+    import app.engine.skill_component_access as SCA
+    from app.engine import action
+    from app.engine.objects.skill import SkillObject
+
+    # Most skills do not touch combat at all, a few do
+    combat_components = [('hit', 5), ('damage', 2), ('avoid', 10), ('resist', 1)]
+    other_components = [('class_skill', None), ('stat_change', [['STR', 1]]), ('growth_change', [['SKL', 5]])]
+    for i in range(num_skills):
+        components = Data()
+        pool = combat_components if i % 4 == 0 else other_components
+        for nid, value in pool:
+            components.append(SCA.restore_component((nid, value)))
+        skill = SkillObject('bench_skill%d' % i, 'Bench Skill %d' % i, '', components=components)
+        action.AddSkill(unit, skill).do()
+
+def bench_calcs(attacker, defender, iterations: int):
+    from app.engine import combat_calcs
+    aweapon = attacker.get_weapon()
+    dweapon = defender.get_weapon()
+    start = time.time_ns() / 1e6
+    for _ in range(iterations):
+        combat_calcs.compute_hit(attacker, defender, aweapon, dweapon, 'attack', (0, 0))
+    hit_time = time.time_ns() / 1e6 - start
+    start = time.time_ns() / 1e6
+    for _ in range(iterations):
+        combat_calcs.compute_damage(attacker, defender, aweapon, dweapon, 'attack', (0, 0))
+    damage_time = time.time_ns() / 1e6 - start
+    return hit_time, damage_time
+
+def main():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    from app.data.database.database import DB
+    from app.data.resources.resources import RESOURCES
+    RESOURCES.load('testing_proj.ltproj', CURRENT_SERIALIZATION_VERSION)
+    DB.load('testing_proj.ltproj', CURRENT_SERIALIZATION_VERSION)
+    from app.engine import driver, game_state, skill_system
+    driver.start('bench')
+    game = game_state.start_level(DB.levels[0].nid)
+
+    attacker = next(unit for unit in game.units if unit.position and unit.team == 'player' and unit.get_weapon())
+    defender = next(unit for unit in game.units if unit.position and unit.team == 'enemy' and unit.get_weapon())
+    indexed_dispatch = skill_system.get_skill_hook_components
+
+    iterations = 1000
+    total_skills = 0
+    for num_skills in (10, 30, 60):
+        add_skills(game, attacker, num_skills - total_skills)
+        add_skills(game, defender, num_skills - total_skills)
+        total_skills = num_skills
+        print("%d skills per unit (%d combat calcs)" % (num_skills, iterations))
+
+        skill_system.get_skill_hook_components = flat_scan
+        try:
+            flat_hit, flat_damage = bench_calcs(attacker, defender, iterations)
+        finally:
+            skill_system.get_skill_hook_components = indexed_dispatch
+        indexed_hit, indexed_damage = bench_calcs(attacker, defender, iterations)
+
+        print("  compute_hit:    flat %.1f ms, indexed %.1f ms" % (flat_hit, indexed_hit))
+        print("  compute_damage: flat %.1f ms, indexed %.1f ms" % (flat_damage, indexed_damage))
+
+if __name__ == '__main__':
+    main()
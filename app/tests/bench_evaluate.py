@@ -0,0 +1,59 @@
+"""
+Micro-benchmark for app.engine.evaluate, on the condition checks of a turn
+change in a level with a few hundred conditional events. Compares the
+compiled expression cache and shared base namespace against copying the
+namespace and parsing each condition on every call.
+
+Not picked up by the test runner. Run with:
+    python -m app.tests.bench_evaluate
+"""
+import time
+
+from app.engine import evaluate
+from app.events import triggers
+from app.tests.mocks.mock_game import get_mock_game
+
+CONDITIONS = [
+    "True",
+    "game.turncount == %d",
+    "game.level_vars.get('Reinforcements%d', 0) > 2",
+    "not game.get_unit('Seth%d')",
+    "game.game_vars.get('Route') == 'Eirika' and game.turncount >= %d",
+    "check_pair('Eirika', 'Seth%d')",
+    "any(nid == 'Boss%d' for nid in game.level_vars)",
+]
+
+def build_conditions(num_events: int):
+    return [CONDITIONS[i % len(CONDITIONS)].replace('%d', str(i)) for i in range(num_events)]
+
+def legacy_evaluate(string, unit1=None, unit2=None, position=None, local_args=None, game=None):
+    context = vars(evaluate).copy()
+    context.update({'unit1': unit1, 'unit': unit1, 'unit2': unit2, 'target': unit2, 'position': position,
+                    'check_pair': lambda s1, s2: False, 'game': game, 'target_system': game.target_system})
+    context.update(game.query_engine.func_dict)
+    if local_args:
+        context.update(local_args)
+    return eval(string.strip(), context)
+
+def turn_change(eval_func, conditions, game, turns: int) -> float:
+    start = time.time_ns() / 1e6
+    for turn in range(turns):
+        game.turncount = turn
+        args = triggers.TurnChange().to_args()
+        for condition in conditions:
+            eval_func(condition, unit1=args.get('unit1', None), unit2=args.get('unit2', None),
+                      position=args.get('position', None), local_args=args, game=game)
+    return time.time_ns() / 1e6 - start
+
+def main():
+    game = get_mock_game()
+    game.level_vars = {}
+    turns = 20
+    for num_events in (100, 300, 600):
+        conditions = build_conditions(num_events)
+        print("%d conditional events (%d turn changes)" % (num_events, turns))
+        print("  copied namespace %.1f ms, compiled + shared namespace %.1f ms" %
+              (turn_change(legacy_evaluate, conditions, game, turns), turn_change(evaluate.evaluate, conditions, game, turns)))
+
+if __name__ == '__main__':
+    main()
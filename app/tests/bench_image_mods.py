@@ -0,0 +1,112 @@
+"""
+Micro-benchmark for the per pixel operations in app.engine.image_mods,
+run on the map sprites and combat animation frames of the default project.
+Times each operation with the NumPy backend (if installed) and with the
+per pixel fallback, and checks that both produce the same pixels.
+
+Not picked up by the test runner. Run with:
+    python -m app.tests.bench_image_mods
+"""
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from app.constants import COLORKEY
+from app.data.resources.default_palettes import default_palettes
+from app.data.resources.resources import RESOURCES
+from app.data.serialization.versions import CURRENT_SERIALIZATION_VERSION
+from app.engine import engine, image_mods
+
+def load_map_sprites():
+    images = []
+    for map_sprite in RESOURCES.map_sprites:
+        images.append(engine.image_load(map_sprite.stand_full_path))
+        images.append(engine.image_load(map_sprite.move_full_path))
+    return images
+
+def load_anim_frames():
+    """Each frame of each combat animation and effect, with the conversion dict of its first palette"""
+    frames = []
+    sources = [(combat_anim, weapon_anim) for combat_anim in RESOURCES.combat_anims for weapon_anim in combat_anim.weapon_anims]
+    sources += [(effect, effect) for effect in RESOURCES.combat_effects if effect.full_path]
+    for anim, weapon_anim in sources:
+        palette = RESOURCES.combat_palettes.get(anim.palettes[0][1]) if anim.palettes else None
+        if not palette or not weapon_anim.frames:
+            continue
+        conversion_dict = {(0, coord[0], coord[1]): tuple(color[:3]) for coord, color in palette.colors.items()}
+        image = engine.image_load(weapon_anim.full_path, convert=True)
+        engine.set_colorkey(image, COLORKEY, rleaccel=True)
+        for frame in weapon_anim.frames:
+            frames.append((engine.subsurface(image, frame.rect), conversion_dict))
+    return frames
+
+def team_conversion(team: str):
+    return {a: b for a, b in zip(default_palettes['map_sprite_blue'], default_palettes['map_sprite_' + team])}
+
+def gray_conversion():
+    return {a: b for a, b in zip(default_palettes['map_sprite_red'], default_palettes['map_sprite_wait'])}
+
+def run(map_sprites, anim_frames):
+    """Returns the time each operation took, and everything it made"""
+    times, results = {}, {}
+
+    start = time.time_ns() / 1e6
+    red = [image_mods.color_convert(image, team_conversion('red')) for image in map_sprites]
+    gray = [image_mods.color_convert(image, gray_conversion()) for image in red]
+    times['map sprite team palette + create_gray'] = time.time_ns() / 1e6 - start
+    results['map sprites'] = red + gray
+
+    start = time.time_ns() / 1e6
+    palette_frames = [image_mods.color_convert(engine.copy_surface(image), conversion_dict) for image, conversion_dict in anim_frames]
+    times['combat anim apply_palette'] = time.time_ns() / 1e6 - start
+    results['palette frames'] = palette_frames
+
+    start = time.time_ns() / 1e6
+    anim_gray = [image_mods.make_anim_gray(engine.copy_surface(image)) for image in palette_frames]
+    times['combat anim make_anim_gray'] = time.time_ns() / 1e6 - start
+    results['anim gray'] = anim_gray
+
+    start = time.time_ns() / 1e6
+    sprite_gray = [image_mods.make_gray(image.convert_alpha()) for image in red]
+    times['map sprite make_gray'] = time.time_ns() / 1e6 - start
+    results['sprite gray'] = sprite_gray
+
+    start = time.time_ns() / 1e6
+    inverted = [engine.copy_surface(image) for image in red]
+    for image in inverted:
+        image_mods.invert_surface(image)
+    times['map sprite invert_surface'] = time.time_ns() / 1e6 - start
+    results['inverted'] = inverted
+
+    return times, results
+
+def main():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    RESOURCES.load('default.ltproj', CURRENT_SERIALIZATION_VERSION)
+    map_sprites = load_map_sprites()
+    anim_frames = load_anim_frames()
+    print("%d map sprite sheets, %d combat animation frames" % (len(map_sprites), len(anim_frames)))
+
+    numpy = image_mods.numpy
+    vectorized_times, vectorized_results = run(map_sprites, anim_frames) if numpy else ({}, {})
+    image_mods.numpy = None
+    fallback_times, fallback_results = run(map_sprites, anim_frames)
+    image_mods.numpy = numpy
+
+    for name, fallback_time in fallback_times.items():
+        if name in vectorized_times:
+            print("  %-40s %8.1f ms  (fallback %8.1f ms)" % (name, vectorized_times[name], fallback_time))
+        else:
+            print("  %-40s %8.1f ms  (NumPy not installed)" % (name, fallback_time))
+
+    for name, images in vectorized_results.items():
+        same = all(pygame.image.tobytes(a, 'RGBA') == pygame.image.tobytes(b, 'RGBA')
+                   for a, b in zip(images, fallback_results[name]))
+        if not same:
+            print("  Mismatch between backends in %s" % name)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for the pathfinders in app.engine.pathfinding
+
+Not picked up by the test runner. Run with:
+    python -m app.tests.bench_pathfinding
+"""
+import random
+import time
+
+from app.engine.pathfinding import pathfinding
+from app.engine.pathfinding.cost_grid import CostGrid
+
+def build_grid(width: int, height: int, seed: int = 0) -> CostGrid:
+    rng = random.Random(seed)
+    grid = CostGrid((width, height))
+    for x in range(width):
+        for y in range(height):
+            roll = rng.random()
+            if roll < 0.1:
+                cost = 99
+            elif roll < 0.25:
+                cost = 2
+            else:
+                cost = 1
+            grid.set_cost((x, y), cost)
+    return grid
+
+def bench_djikstra(grid: CostGrid, starts, movement: int) -> float:
+    can_move_through = lambda pos: True
+    start = time.time_ns() / 1e6
+    for pos in starts:
+        pathfinding.Djikstra(pos, grid).process(can_move_through, movement)
+    return time.time_ns() / 1e6 - start
+
+def bench_astar(grid: CostGrid, pairs, theta: bool = False) -> float:
+    can_move_through = lambda pos: True
+    klass = pathfinding.ThetaStar if theta else pathfinding.AStar
+    start = time.time_ns() / 1e6
+    for start_pos, goal_pos in pairs:
+        pathfinder = klass(start_pos, goal_pos, grid)
+        pathfinder.process(can_move_through, adj_good_enough=True)
+        pathfinder.reset()
+    return time.time_ns() / 1e6 - start
+
+def bench_targets(grid: CostGrid, start_pos, goals, field: bool = False) -> float:
+    """
+    Paths from one unit to each of its targets, the way SecondaryAI looks for them
+    """
+    can_move_through = lambda pos: True
+    start = time.time_ns() / 1e6
+    if field:
+        distance_field = pathfinding.DistanceField(start_pos, grid, can_move_through)
+        for goal_pos in goals:
+            distance_field.get_path(goal_pos, adj_good_enough=True)
+    else:
+        pathfinder = pathfinding.AStar(start_pos, None, grid)
+        for goal_pos in goals:
+            pathfinder.set_goal_pos(goal_pos)
+            pathfinder.process(can_move_through, adj_good_enough=True)
+            pathfinder.reset()
+    return time.time_ns() / 1e6 - start
+
+def main():
+    rng = random.Random(1)
+    for size in (30, 60, 100):
+        grid = build_grid(size, size)
+        open_cells = [(x, y) for x in range(size) for y in range(size) if grid.reachable((x, y))]
+        starts = [rng.choice(open_cells) for _ in range(50)]
+        pairs = [(rng.choice(open_cells), rng.choice(open_cells)) for _ in range(50)]
+        print("%dx%d grid" % (size, size))
+        print("  Djikstra  (50 searches, 7 move):  %.1f ms" % bench_djikstra(grid, starts, 7))
+        print("  Djikstra  (50 searches, 15 move): %.1f ms" % bench_djikstra(grid, starts, 15))
+        print("  AStar     (50 searches):          %.1f ms" % bench_astar(grid, pairs))
+        print("  ThetaStar (50 searches):          %.1f ms" % bench_astar(grid, pairs, theta=True))
+        targets = [rng.choice(open_cells) for _ in range(50)]
+        print("  AStar per target (50 targets):    %.1f ms" % bench_targets(grid, starts[0], targets))
+        print("  DistanceField    (50 targets):    %.1f ms" % bench_targets(grid, starts[0], targets, field=True))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.data.database import database
+from app.data.database.database import Database
+from app.data.serialization.versions import CURRENT_SERIALIZATION_VERSION
+
+class DatabaseSerializeTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.dir = tempfile.mkdtemp()
+        self.db = Database()
+        self.db.load('testing_proj.ltproj', CURRENT_SERIALIZATION_VERSION)
+        self.db.serialize(self.dir, as_chunks=True)
+        self.items_dir = Path(self.dir, 'game_data', 'items')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        logging.disable(logging.NOTSET)
+
+    def serialize(self):
+        with patch.object(database, 'save_json', wraps=database.save_json) as save_json:
+            self.assertTrue(self.db.serialize(self.dir, as_chunks=True))
+        return {os.path.relpath(call.args[0], self.dir) for call in save_json.call_args_list}
+
+    def test_unchanged(self):
+        self.assertEqual(self.serialize(), set())
+        # Nothing to go on but what is on disk
+        self.db._saved_files.clear()
+        self.assertEqual(self.serialize(), set())
+
+    def test_changed(self):
+        item = self.db.items[0]
+        item.name = 'Renamed'
+        self.assertEqual(self.serialize(), {os.path.join('game_data', 'items', item.nid + '.json')})
+        with open(self.items_dir / (item.nid + '.json')) as fp:
+            self.assertEqual(json.load(fp)[0]['name'], 'Renamed')
+
+    def test_removed(self):
+        item = self.db.items[0]
+        self.db.items.remove_key(item.nid)
+        self.assertEqual(self.serialize(), {os.path.join('game_data', 'items', '.orderkeys')})
+        self.assertFalse((self.items_dir / (item.nid + '.json')).exists())
+        new_db = Database()
+        new_db.load(self.dir, CURRENT_SERIALIZATION_VERSION)
+        self.assertEqual(new_db.items.keys(), self.db.items.keys())
+
+    def test_edited_outside(self):
+        item = self.db.items[0]
+        save_loc = self.items_dir / (item.nid + '.json')
+        with open(save_loc, 'w') as fp:
+            json.dump([], fp)
+        self.assertEqual(self.serialize(), {os.path.relpath(save_loc, self.dir)})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import logging
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.data.serialization import disk_loader
+from app.data.serialization.loaders.loader0 import Loader0
+
+class Loader0Tests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.proj_dir = Path('default.ltproj')
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_concurrent_matches_serial(self):
+        serial, concurrent = Loader0(max_workers=1), Loader0(max_workers=4)
+        for load in ('load_database', 'load_resources'):
+            data_dir = self.proj_dir / ('game_data' if load == 'load_database' else 'resources')
+            expected = getattr(serial, load)(data_dir)
+            loaded = getattr(concurrent, load)(data_dir)
+            self.assertEqual(list(loaded.keys()), list(expected.keys()))
+            self.assertEqual(loaded, expected)
+
+    def test_missing_category(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            data_dir = Path(temp_dir, 'game_data')
+            shutil.copytree(self.proj_dir / 'game_data', data_dir)
+            shutil.rmtree(data_dir / 'units')
+            (data_dir / 'units.json').unlink()
+            with self.assertRaises(FileNotFoundError):
+                Loader0(max_workers=4).load_database(data_dir)
+        finally:
+            shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.data.serialization import disk_loader, project_cache
+from app.data.serialization.loaders.loader0 import _json_load
+
+class ProjectCacheTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.dir, 'game_data')
+        os.mkdir(self.data_dir)
+        os.mkdir(self.data_dir / 'units')
+        self.write('stats.json', [{'nid': 'HP'}])
+        self.write('units/Eirika.json', [{'nid': 'Eirika'}])
+        self.write('units/Seth.json', [{'nid': 'Seth'}])
+        self.write('units/.orderkeys', ['Seth', 'Eirika'])
+        self.num_loads = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        logging.disable(logging.NOTSET)
+
+    def write(self, rel_path, value):
+        with open(self.data_dir / rel_path, 'w') as fp:
+            json.dump(value, fp)
+
+    def load(self):
+        def load_func():
+            self.num_loads += 1
+            return {'stats': _json_load(self.data_dir, 'stats'), 'units': _json_load(self.data_dir, 'units')}
+        return project_cache.load_cached(self.data_dir, 0, load_func)
+
+    def test_order_keys(self):
+        self.assertEqual(self.load()['units'], [{'nid': 'Seth'}, {'nid': 'Eirika'}])
+
+    def test_unchanged(self):
+        data = self.load()
+        self.assertTrue(project_cache.get_cache_path(self.data_dir).exists())
+        self.assertEqual(self.load(), data)
+        self.assertEqual(self.num_loads, 1)
+
+    def test_touched(self):
+        # A new mtime with the same contents, like a freshly copied project
+        self.load()
+        stat = os.stat(self.data_dir / 'stats.json')
+        os.utime(self.data_dir / 'stats.json', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.load()
+        self.load()
+        self.assertEqual(self.num_loads, 1)
+
+    def test_changed(self):
+        self.load()
+        self.write('stats.json', [{'nid': 'MP'}])
+        self.assertEqual(self.load()['stats'], [{'nid': 'MP'}])
+        self.write('units/Ephraim.json', [{'nid': 'Ephraim'}])
+        self.assertEqual(len(self.load()['units']), 3)
+        os.remove(self.data_dir / 'units' / 'Seth.json')
+        self.assertEqual(len(self.load()['units']), 2)
+        self.assertEqual(self.num_loads, 4)
+
+    def test_version(self):
+        self.load()
+        project_cache.load_cached(self.data_dir, -1, lambda: {})
+        self.assertEqual(self.load()['stats'], [{'nid': 'HP'}])
+        self.assertEqual(self.num_loads, 2)
+
+    def test_corrupt_cache(self):
+        self.load()
+        with open(project_cache.get_cache_path(self.data_dir), 'wb') as fp:
+            fp.write(project_cache.MAGIC + b'not a cache')
+        self.assertEqual(self.load()['stats'], [{'nid': 'HP'}])
+        self.assertEqual(self.num_loads, 2)
+
+if __name__ == '__main__':
+    unittest.main()
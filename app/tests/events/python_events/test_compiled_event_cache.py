@@ -0,0 +1,101 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.events.python_eventing import compiler
+from app.events.python_eventing.compiler import Compiler, CompiledEventCache
+
+class CompiledEventCacheTests(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.dir = tempfile.mkdtemp()
+        self.old_cache = compiler.COMPILED_EVENT_CACHE
+        compiler.COMPILED_EVENT_CACHE = CompiledEventCache()
+        compiler.COMPILED_EVENT_CACHE.set_cache_dir(self.dir)
+        script_path = Path(__file__).parent / 'data' / 'test_save_event_state.pyevent'
+        self.script_source = script_path.read_text()
+
+    def tearDown(self):
+        compiler.COMPILED_EVENT_CACHE = self.old_cache
+        shutil.rmtree(self.dir)
+        logging.disable(logging.NOTSET)
+
+    def test_disk_cache(self):
+        compiled = Compiler.compile('test', self.script_source, 0)
+        self.assertEqual(os.listdir(self.dir), [compiler.get_compiler_version()])
+        self.assertEqual(len(os.listdir(compiler.COMPILED_EVENT_CACHE.cache_dir)), 1)
+        # A new session only has what is on disk
+        compiler.COMPILED_EVENT_CACHE.clear()
+        cached = Compiler.compile('other', self.script_source, 0)
+        self.assertEqual(cached.event, 'other')
+        self.assertEqual(cached.compiled, compiled.compiled)
+        self.assertEqual(cached.code, compiled.code)
+
+    def test_command_pointer(self):
+        compiled = Compiler.compile('test', self.script_source, 0)
+        resumed = Compiler.compile('test', self.script_source, 2)
+        self.assertNotEqual(compiled.compiled, resumed.compiled)
+        self.assertEqual(len(os.listdir(compiler.COMPILED_EVENT_CACHE.cache_dir)), 2)
+
+    def test_corrupt_file(self):
+        Compiler.compile('test', self.script_source, 0)
+        compiler.COMPILED_EVENT_CACHE.clear()
+        cache_dir = compiler.COMPILED_EVENT_CACHE.cache_dir
+        for fn in os.listdir(cache_dir):
+            with open(os.path.join(cache_dir, fn), 'wb') as fp:
+                fp.write(b'not an event')
+        compiled = Compiler.compile('test', self.script_source, 0)
+        self.assertIsNotNone(compiled.code)
+
+    def test_prune_other_versions(self):
+        Compiler.compile('test', self.script_source, 0)
+        # Left behind by an older engine
+        old_dir = os.path.join(self.dir, 'older_version')
+        os.makedirs(old_dir)
+        Path(old_dir, 'event.ltev').write_bytes(b'old')
+        Path(self.dir, 'event.ltev').write_bytes(b'old')
+        # The next session throws them out and keeps its own
+        session = CompiledEventCache()
+        session.set_cache_dir(self.dir)
+        self.assertEqual(os.listdir(self.dir), [compiler.get_compiler_version()])
+        self.assertEqual(len(os.listdir(session.cache_dir)), 1)
+
+    def test_prune_least_recently_used(self):
+        for command_pointer in range(4):
+            Compiler.compile('test', self.script_source, command_pointer)
+        cache_dir = compiler.COMPILED_EVENT_CACHE.cache_dir
+        paths = [os.path.join(cache_dir, fn) for fn in os.listdir(cache_dir)]
+        for idx, path in enumerate(paths):
+            os.utime(path, (time.time() - 100 * (idx + 1), time.time() - 100 * (idx + 1)))
+        # Loading an event from the disk counts as using it
+        compiler.COMPILED_EVENT_CACHE.clear()
+        used_key = os.path.basename(paths[-1])[:-len('.ltev')]
+        self.assertIsNotNone(compiler.COMPILED_EVENT_CACHE.get(used_key))
+
+        session = CompiledEventCache(max_disk_size=2)
+        session.set_cache_dir(self.dir)
+        self.assertEqual(sorted(os.listdir(cache_dir)), sorted(os.path.basename(path) for path in (paths[0], paths[-1])))
+
+    def test_compiler_version(self):
+        version = compiler.get_compiler_version()
+        self.assertEqual(compiler.get_compiler_version(), version)
+        key = compiler.COMPILED_EVENT_CACHE.get_key(self.script_source, 0)
+        # Changing any compiler source changes the version, and so every key
+        source = Path(self.dir, 'engine_header.py')
+        source.write_text('HEADER_IMPORT = ""')
+        with patch.object(compiler, 'COMPILER_SOURCES', compiler.COMPILER_SOURCES + [str(source)]):
+            compiler.get_compiler_version.cache_clear()
+            try:
+                self.assertNotEqual(compiler.get_compiler_version(), version)
+                self.assertNotEqual(compiler.COMPILED_EVENT_CACHE.get_key(self.script_source, 0), key)
+            finally:
+                compiler.get_compiler_version.cache_clear()
+        self.assertEqual(compiler.get_compiler_version(), version)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from app.events.event_prefab import EventCatalog, EventPrefab
+
+def make_event(name, trigger, level_nid=None, condition="True"):
+    event = EventPrefab(name)
+    event.trigger = trigger
+    event.level_nid = level_nid
+    event.condition = condition
+    return event
+
+class EventCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self.catalog = EventCatalog()
+        self.catalog.append(make_event('Intro', 'level_start', '0'))
+        self.catalog.append(make_event('Reinforcements', 'turn_change', '0', 'game.turncount == 3'))
+        self.catalog.append(make_event('Everywhere', 'turn_change'))
+        self.catalog.append(make_event('Later', 'turn_change', '1'))
+
+    def names(self, trigger_nid, level_nid):
+        return [event.name for event in self.catalog.get(trigger_nid, level_nid)]
+
+    def test_get(self):
+        self.assertEqual(self.names('turn_change', '0'), ['Reinforcements', 'Everywhere'])
+        self.assertEqual(self.names('turn_change', '1'), ['Everywhere', 'Later'])
+        self.assertEqual(self.names('turn_change', None), ['Everywhere'])
+        self.assertEqual(self.names('unit_wait', '0'), [])
+
+    def test_add_remove(self):
+        self.assertEqual(self.names('turn_change', '0'), ['Reinforcements', 'Everywhere'])
+        self.catalog.append(make_event('Ambush', 'turn_change', '0'))
+        self.assertEqual(self.names('turn_change', '0'), ['Reinforcements', 'Everywhere', 'Ambush'])
+        self.catalog.delete(self.catalog.get_from_nid('Global Everywhere'))
+        self.assertEqual(self.names('turn_change', '0'), ['Reinforcements', 'Ambush'])
+        self.catalog.remove_key('0 Reinforcements')
+        self.assertEqual(self.names('turn_change', '0'), ['Ambush'])
+        self.catalog.move_index(0, len(self.catalog) - 1)
+        self.catalog.insert(0, make_event('First', 'turn_change', '0'))
+        self.assertEqual(self.names('turn_change', '0'), ['First', 'Ambush'])
+
+    def test_edited_event(self):
+        self.assertEqual(self.names('level_start', '0'), ['Intro'])
+        event = self.catalog.get_from_nid('0 Intro')
+        event.trigger = 'turn_change'
+        self.assertEqual(self.names('level_start', '0'), [])
+        self.assertEqual(self.names('turn_change', '0'), ['Intro', 'Reinforcements', 'Everywhere'])
+
+    def test_trivial_condition(self):
+        trivial = {event.name: trivial for event, trivial in self.catalog.get_candidates('turn_change', '0')}
+        self.assertEqual(trivial, {'Reinforcements': False, 'Everywhere': True})
+        self.catalog.get_from_nid('Global Everywhere').condition = "  True "
+        self.assertTrue(self.catalog.get_candidates('turn_change', '0')[1][1])
+        self.catalog.get_from_nid('Global Everywhere').condition = "game.turncount > 1"
+        self.assertFalse(self.catalog.get_candidates('turn_change', '0')[1][1])
+
+if __name__ == '__main__':
+    unittest.main()
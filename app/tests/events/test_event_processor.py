@@ -48,6 +48,18 @@ class EventProcessorUnitTests(unittest.TestCase):
         self.assertEqual(processor._jump_conditional(18), 19)
         self.assertEqual(processor._find_end(19), 21)
 
+    def test_parsed_script_is_shared(self):
+        script_path = Path(__file__).parent / 'test_files' / 'processor' / 'test.event'
+        processor = EventProcessor('test', script_path.read_text(), self.text_evaluator)
+        # Running the script must not change the parsed commands
+        while not processor.finished():
+            processor.fetch_next_command()
+        other_processor = EventProcessor('other', script_path.read_text(), self.text_evaluator)
+        self.assertIs(other_processor.commands, processor.commands)
+        self.assertIs(other_processor.jump_table, processor.jump_table)
+        mu_speak = other_processor.fetch_next_command()
+        self.assertEqual(mu_speak.parameters['Text'], 'I am a custom named character.')
+
     def test_event_processor_handles_conditionals(self):
         script_path = Path(__file__).parent / 'test_files' / 'processor' / 'second_conditional.event'
         processor = EventProcessor('conditionals', script_path.read_text(), self.text_evaluator)
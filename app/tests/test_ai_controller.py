@@ -0,0 +1,137 @@
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.data.serialization.versions import CURRENT_SERIALIZATION_VERSION
+from app.engine.ai_controller import PrimaryAI
+from app.utilities import utils
+
+class PrimaryAITests(unittest.TestCase):
+    """
+    PrimaryAI tests each strike position once per item and scores every
+    target reachable from it there. It should still make exactly the
+    choice that trying each target and then each of its positions would
+    """
+
+    def setUp(self):
+        from app.data.database.database import DB
+        DB.load('testing_proj.ltproj', CURRENT_SERIALIZATION_VERSION)
+        DB.constants.get('line_of_sight').set_value(False)
+
+    def _build_primary(self, items, valid_moves, targets, attack_positions, priorities, enemy_positions=()):
+        unit = MagicMock()
+        unit.position = (0, 0)
+        unit.can_equip.return_value = False
+
+        mock_game = MagicMock()
+        mock_game.units = [MagicMock(position=pos) for pos in enemy_positions]
+        mock_game.board.get_unit.return_value = None
+        mock_game.target_system.get_ai_targets.side_effect = lambda unit, moves, items: targets[items[0]]
+        mock_game.target_system.get_possible_attack_positions.side_effect = \
+            lambda unit, target, moves, item: attack_positions[item, target]
+        mock_game.target_system.check_target_from_position.return_value = True
+        mock_game.target_system.get_target_from_position.side_effect = lambda unit, item, target: (target, [])
+
+        patchers = [
+            patch('app.engine.ai_controller.game', mock_game),
+            patch('app.engine.ai_controller.item_funcs.get_range', return_value={1}),
+            patch('app.engine.ai_controller.item_system.no_attack_after_move', return_value=False),
+            patch('app.engine.ai_controller.skill_system.no_attack_after_move', return_value=False),
+            patch('app.engine.ai_controller.skill_system.check_enemy', return_value=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        primary = PrimaryAI.__new__(PrimaryAI)
+        primary.max_tp = 0
+        primary.unit = unit
+        primary.orig_pos = unit.position
+        primary.orig_item = None
+        primary.items = items
+        primary.behaviour_targets = set()
+        primary.item_index = 0
+        primary.move_index = 0
+        primary.valid_moves = list(valid_moves)
+        primary.best_target = None
+        primary.best_position = None
+        primary.best_item = None
+        primary.best_order = None
+
+        def quick_move(move):
+            unit.position = move
+        primary.quick_move = quick_move
+        primary.compute_priority = lambda target_pos, splash, move, item: priorities[item, target_pos, move]
+        primary.item_setup()
+        return primary
+
+    def _target_by_target(self, items, targets, attack_positions, priorities, enemy_positions=()):
+        # How PrimaryAI picked before strike positions were grouped
+        max_tp = 0
+        best = (None, None, None)
+        for item in items:
+            item_targets = targets[item]
+            for target in item_targets:
+                moves = attack_positions[item, target]
+                for move_index in range(len(moves)):
+                    if len(item_targets) > 10:
+                        move = utils.farthest_away_pos((0, 0), moves, set(enemy_positions))
+                        if not move:
+                            move = moves[move_index]
+                    else:
+                        move = moves[move_index]
+                    tp = priorities[item, target, move]
+                    if tp > max_tp:
+                        max_tp = tp
+                        best = (target, move, item)
+        return best
+
+    def _run(self, primary):
+        for _ in range(10000):
+            done, target, position, item = primary.run()
+            if done:
+                return (target, position, item)
+        self.fail('PrimaryAI never finished')
+
+    def test_same_choice_as_target_by_target(self):
+        rng = random.Random(0)
+        for trial in range(200):
+            items = ['item%d' % i for i in range(rng.randint(1, 3))]
+            valid_moves = [(x, y) for x in range(4) for y in range(4)]
+            targets = {}
+            attack_positions = {}
+            priorities = {}
+            for item in items:
+                # Sometimes enough targets to only try one position for each
+                num_targets = rng.choice((1, 3, 6, 12))
+                targets[item] = [(10 + i, rng.randint(0, 5)) for i in range(num_targets)]
+                for target in targets[item]:
+                    attack_positions[item, target] = rng.sample(valid_moves, rng.randint(0, 5))
+                    for move in attack_positions[item, target]:
+                        # Few distinct scores, so there are plenty of ties to break
+                        priorities[item, target, move] = rng.choice((0, 0.5, 1, 1, 2))
+            # With many targets, only the position farthest from the enemy is tried, if there are any
+            enemy_positions = rng.choice(((), ((3, 3),), ((0, 3), (3, 0))))
+
+            expected = self._target_by_target(items, targets, attack_positions, priorities, enemy_positions)
+            primary = self._build_primary(items, valid_moves, targets, attack_positions, priorities, enemy_positions)
+            self.assertEqual(self._run(primary), expected, 'Trial %d chose differently' % trial)
+            self.assertEqual(primary.unit.position, (0, 0), 'Did not move back to the original position')
+
+    def test_tie_goes_to_first_target(self):
+        # Target A is best struck from (2, 0), target B equally well from (1, 0).
+        # Grouped by position, B is scored first, but A was tried first target by target
+        items = ['item']
+        valid_moves = [(1, 0), (2, 0)]
+        target_a, target_b = (5, 5), (6, 6)
+        targets = {'item': [target_a, target_b]}
+        attack_positions = {('item', target_a): [(1, 0), (2, 0)],
+                            ('item', target_b): [(1, 0)]}
+        priorities = {('item', target_a, (1, 0)): 0.5,
+                      ('item', target_a, (2, 0)): 1,
+                      ('item', target_b, (1, 0)): 1}
+        primary = self._build_primary(items, valid_moves, targets, attack_positions, priorities)
+        self.assertEqual(self._run(primary), (target_a, (2, 0), 'item'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,386 @@
+import os
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from app.constants import TILEWIDTH, TILEHEIGHT
+from app.data.serialization.versions import CURRENT_SERIALIZATION_VERSION
+from app.engine.fog_of_war import FogOfWarLevelConfig, FogOfWarType
+from app.engine.target_system import TargetSystem
+
+WIDTH, HEIGHT = 12, 9
+
+class FakeUnit():
+    def __init__(self, nid, team, position, movement, spell_range=0):
+        self.nid = nid
+        self.team = team
+        self.position = position
+        self.movement = movement
+        self.spell_range = spell_range
+
+    def get_ai(self):
+        return None
+
+class BoundaryTests(unittest.TestCase):
+    """
+    Moving units only redraws the boundary tiles that changed, and enemy ranges
+    are only recalculated when the boundary is next drawn. After any sequence of
+    updates, the boundary must look exactly like one drawn from scratch
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+        # Loading resources elsewhere resets the sprites, so load their images like the driver does
+        from app.engine import sprites
+        sprites.load_images()
+
+    @classmethod
+    def tearDownClass(cls):
+        pygame.display.quit()
+
+    def setUp(self):
+        from app.data.database.database import DB
+        DB.load('testing_proj.ltproj', CURRENT_SERIALIZATION_VERSION)
+        from app.engine.boundary import BoundaryInterface
+        self.DB = DB
+        self.units = {}
+
+        mock_game = MagicMock()
+        mock_game.units = []
+        mock_game.get_unit.side_effect = lambda nid: self.units.get(nid)
+        mock_game.get_current_fog_info.return_value.is_active = False
+        mock_game.board.fog_region_set = set()
+        mock_game.board.check_bounds.side_effect = lambda pos: 0 <= pos[0] < WIDTH and 0 <= pos[1] < HEIGHT
+        mock_game.board.in_vision.return_value = True
+        spheres = TargetSystem(mock_game).find_manhattan_spheres
+        mock_game.target_system.find_manhattan_spheres.side_effect = spheres
+        mock_game.path_system.get_valid_moves.side_effect = lambda unit, force: self._valid_moves(unit)
+        mock_game.target_system.get_all_attackable_positions_weapons.side_effect = \
+            lambda unit, valid_moves, force: self._expand(valid_moves, 1)
+        mock_game.target_system.get_all_attackable_positions_spells.side_effect = \
+            lambda unit, valid_moves, force: self._expand(valid_moves, unit.spell_range)
+        self.game = mock_game
+
+        patchers = [
+            patch('app.engine.boundary.game', mock_game),
+            patch('app.engine.boundary.equations.parser.movement', lambda unit: unit.movement),
+            patch.object(BoundaryInterface, 'enemy_teams', DB.teams.enemies),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.BoundaryInterface = BoundaryInterface
+
+    def _valid_moves(self, unit):
+        # Units of other teams block the tiles they stand on
+        allies = self.DB.teams.get_allies(unit.team)
+        blocked = {other.position for other in self.units.values()
+                   if other.position and other.team not in allies}
+        sphere = self.game.target_system.find_manhattan_spheres(set(range(unit.movement + 1)), *unit.position)
+        return {pos for pos in sphere if self.game.board.check_bounds(pos) and pos not in blocked}
+
+    def _expand(self, positions, rng):
+        if not rng:
+            return set()
+        tiles = set()
+        for x, y in positions:
+            tiles |= self.game.target_system.find_manhattan_spheres(set(range(1, rng + 1)), x, y)
+        return {pos for pos in tiles if self.game.board.check_bounds(pos)}
+
+    def _draw(self, boundary) -> bytes:
+        full_size = (WIDTH * TILEWIDTH, HEIGHT * TILEHEIGHT)
+        surf = pygame.Surface(full_size, pygame.SRCALPHA, 32)
+        boundary.draw(surf, full_size, (0, 0, *full_size))
+        return pygame.image.tobytes(boundary.surf, 'RGBA')
+
+    def _full_redraw(self, boundary) -> bytes:
+        fresh = self.BoundaryInterface(WIDTH, HEIGHT)
+        fresh.show()
+        fresh.displaying_units = set(boundary.displaying_units)
+        fresh.all_on_flag = boundary.all_on_flag
+        self.game.units = list(self.units.values())
+        fresh.reset()
+        return self._draw(fresh)
+
+    def _move(self, boundary, unit, position):
+        # What game.leave and game.arrive tell the boundary
+        boundary.leave(unit)
+        unit.position = position
+        boundary.arrive(unit)
+
+    def _random_free_position(self, rng):
+        taken = {unit.position for unit in self.units.values()}
+        while True:
+            pos = (rng.randrange(WIDTH), rng.randrange(HEIGHT))
+            if pos not in taken:
+                return pos
+
+    def test_incremental_draw_matches_full_redraw(self):
+        rng = random.Random(0)
+        enemy_team = self.DB.teams.enemies[0]
+        for trial in range(10):
+            self.units = {}
+            for idx in range(4):
+                nid = 'enemy%d' % idx
+                self.units[nid] = FakeUnit(nid, enemy_team, None, rng.randint(1, 3), rng.choice((0, 0, 2)))
+            for idx in range(3):
+                nid = 'player%d' % idx
+                self.units[nid] = FakeUnit(nid, 'player', None, 5)
+            boundary = self.BoundaryInterface(WIDTH, HEIGHT)
+            boundary.show()
+            for unit in self.units.values():
+                self._move(boundary, unit, self._random_free_position(rng))
+            self._draw(boundary)
+
+            enemies = [unit for unit in self.units.values() if unit.team == enemy_team]
+            for step in range(40):
+                unit = rng.choice(list(self.units.values()))
+                op = rng.choice(('move', 'move', 'move', 'remove', 'toggle', 'toggle_all', 'recalculate'))
+                if op == 'move' or (op == 'remove' and not unit.position):
+                    self._move(boundary, unit, self._random_free_position(rng))
+                elif op == 'remove':
+                    self._move(boundary, unit, None)
+                elif op == 'toggle':
+                    boundary.toggle_unit(rng.choice(enemies))
+                elif op == 'toggle_all':
+                    boundary.toggle_all_enemy_attacks()
+                elif op == 'recalculate':
+                    unit = rng.choice(enemies)
+                    unit.movement = rng.randint(1, 3)
+                    boundary.recalculate_unit(unit)
+                # Sometimes several changes pile up before the next draw
+                if rng.random() < 0.6:
+                    self.assertEqual(self._draw(boundary), self._full_redraw(boundary),
+                                     'Trial %d differs after step %d (%s)' % (trial, step, op))
+            self.assertEqual(self._draw(boundary), self._full_redraw(boundary))
+
+    def test_incremental_draw_redraws_something(self):
+        # Make sure the comparison is not between two empty surfaces
+        enemy_team = self.DB.teams.enemies[0]
+        self.units = {'enemy': FakeUnit('enemy', enemy_team, None, 2)}
+        boundary = self.BoundaryInterface(WIDTH, HEIGHT)
+        boundary.show()
+        boundary.show_all_enemy_attacks()
+        empty = self._draw(boundary)
+        self._move(boundary, self.units['enemy'], (5, 5))
+        drawn = self._draw(boundary)
+        self.assertNotEqual(drawn, empty)
+        self._move(boundary, self.units['enemy'], (1, 1))
+        self.assertNotEqual(self._draw(boundary), drawn)
+        self.assertEqual(self._draw(boundary), self._full_redraw(boundary))
+
+    def test_fog_of_war_unit_leaves(self):
+        # Under fog of war, only the ranges of enemies the player can see are drawn
+        self.game.get_current_fog_info.return_value.is_active = True
+        self.game.board.in_vision.side_effect = lambda pos: pos[0] < WIDTH // 2
+        enemy_team = self.DB.teams.enemies[0]
+        self.units = {'seen': FakeUnit('seen', enemy_team, None, 2),
+                      'hidden': FakeUnit('hidden', enemy_team, None, 2)}
+        boundary = self.BoundaryInterface(WIDTH, HEIGHT)
+        boundary.show()
+        boundary.show_all_enemy_attacks()
+        empty = self._draw(boundary)
+        self._move(boundary, self.units['hidden'], (9, 4))
+        self.assertEqual(self._draw(boundary), empty)
+        self._move(boundary, self.units['seen'], (2, 4))
+        seen = self._draw(boundary)
+        self.assertNotEqual(seen, empty)
+        self.assertEqual(seen, self._full_redraw(boundary))
+
+        # Dying or leaving the map leaves the unit with no position
+        self._move(boundary, self.units['hidden'], None)
+        self.assertEqual(self._draw(boundary), seen)
+        self._move(boundary, self.units['seen'], None)
+        self.assertEqual(self._draw(boundary), empty)
+        self.assertEqual(self._draw(boundary), self._full_redraw(boundary))
+
+class FakeRegion():
+    def __init__(self, nid, position, size, sub_nid):
+        self.nid = nid
+        self.position = position
+        self.size = size
+        self.sub_nid = sub_nid
+
+    def get_all_positions(self):
+        return [(self.position[0] + x, self.position[1] + y) for x in range(self.size[0]) for y in range(self.size[1])]
+
+class FogOfWarOverlayTests(unittest.TestCase):
+    """
+    The board reports which tiles' fog of war might have changed, and the
+    overlay only redraws those. After any sequence of unit moves, region and
+    terrain changes, the overlay must look exactly like one drawn from scratch
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+        # Loading resources elsewhere resets the sprites, so load their images like the driver does
+        from app.engine import sprites
+        sprites.load_images()
+
+    @classmethod
+    def tearDownClass(cls):
+        pygame.display.quit()
+
+    def setUp(self):
+        from app.data.database.database import DB
+        DB.load('testing_proj.ltproj', CURRENT_SERIALIZATION_VERSION)
+        from app.engine import line_of_sight
+        from app.engine.boundary import BoundaryInterface
+        from app.engine.game_board import GameBoard
+        from app.engine.sprites import SPRITES
+        self.DB = DB
+        self.BoundaryInterface = BoundaryInterface
+        self.units = []
+        self.sight_ranges = {}
+        self.opaque = set()
+        self.fog_info = FogOfWarLevelConfig(True, FogOfWarType.HYBRID, 2, 2, 2)
+
+        mock_game = MagicMock()
+        mock_game.units = self.units
+        mock_game.get_current_fog_info.side_effect = lambda: self.fog_info
+        mock_game.get_terrain_nid.side_effect = lambda tilemap, pos: '9' if pos in self.opaque else '0'
+        mock_game.target_system = TargetSystem(mock_game)
+        self.game = mock_game
+
+        patchers = [
+            patch('app.engine.boundary.game', mock_game),
+            patch('app.engine.game_board.game', mock_game),
+            patch('app.engine.line_of_sight.game', mock_game),
+            patch('app.engine.skill_system.sight_range', lambda unit: self.sight_ranges.get(unit.nid, 0)),
+            patch.object(BoundaryInterface, 'fog_of_war_tile1', SPRITES.get('bg_fow_tile')),
+            patch.object(BoundaryInterface, 'fog_of_war_tile2', SPRITES.get('bg_black_tile')),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(line_of_sight.clear_cache)
+
+        self.tilemap = MagicMock(width=WIDTH, height=HEIGHT)
+        mock_game.board = GameBoard(self.tilemap)
+
+    def _draw(self, boundary) -> bytes:
+        full_size = (WIDTH * TILEWIDTH, HEIGHT * TILEHEIGHT)
+        surf = pygame.Surface(full_size, pygame.SRCALPHA, 32)
+        boundary.draw_fog_of_war(surf, full_size, (0, 0, *full_size))
+        if not (self.fog_info.is_active or self.game.board.fog_region_set):
+            return b''  # No overlay is drawn at all
+        return pygame.image.tobytes(boundary.fog_of_war_surf, 'RGBA')
+
+    def _full_rebuild(self) -> bytes:
+        return self._draw(self.BoundaryInterface(WIDTH, HEIGHT))
+
+    def _random_pos(self, rng):
+        return (rng.randrange(WIDTH), rng.randrange(HEIGHT))
+
+    def _run_sequence(self, rng, fog_los: bool):
+        self.DB.constants.get('fog_los').set_value(fog_los)
+        board = self.game.board
+        teams = ['player', 'player', 'other', 'enemy']
+        for idx in range(5):
+            unit = FakeUnit('unit%d' % idx, teams[idx % len(teams)], None, 0)
+            self.units.append(unit)
+        fog_regions = [FakeRegion('fog%d' % idx, self._random_pos(rng), (2, 2), str(rng.randint(0, 2))) for idx in range(2)]
+        vision_regions = [FakeRegion('vision%d' % idx, self._random_pos(rng), (1, 2), str(rng.randint(0, 1))) for idx in range(2)]
+
+        boundary = self.BoundaryInterface(WIDTH, HEIGHT)
+        self._draw(boundary)
+        for step in range(60):
+            op = rng.choice(('move', 'move', 'move', 'remove', 'sight', 'team', 'fog_region',
+                             'vision_region', 'opacity', 'fog_info', 'visited'))
+            unit = rng.choice(self.units)
+            if op == 'move':
+                unit.position = self._random_pos(rng)
+                board.update_fow(unit.position, unit, self.fog_info.default_radius)
+            elif op == 'remove':
+                unit.position = None
+                board.update_fow(None, unit, self.fog_info.default_radius)
+            elif op == 'sight':
+                self.sight_ranges[unit.nid] = rng.randint(0, 2)
+                board.change_sight_range(unit, self.fog_info.default_radius + self.sight_ranges[unit.nid])
+            elif op == 'team':
+                unit.team = rng.choice(teams)
+                board.update_fow(unit.position, unit, self.fog_info.default_radius)
+            elif op == 'fog_region':
+                region = rng.choice(fog_regions)
+                if region.nid in board.fog_region_set:
+                    board.remove_fog_region(region)
+                else:
+                    board.add_fog_region(region)
+            elif op == 'vision_region':
+                region = rng.choice(vision_regions)
+                if region.nid in board.vision_region_footprints:
+                    board.remove_vision_region(region)
+                else:
+                    board.add_vision_region(region)
+            elif op == 'opacity':
+                pos = self._random_pos(rng)
+                self.opaque ^= {pos}
+                board.reset_pos(self.tilemap, pos)
+            elif op == 'fog_info':
+                self.fog_info = FogOfWarLevelConfig(rng.random() < 0.8, rng.choice(list(FogOfWarType)),
+                                                    rng.randint(1, 3), 2, 2)
+            elif op == 'visited':
+                board.set_previously_visited_tiles(set())
+            # Sometimes several changes pile up before the next draw
+            if rng.random() < 0.6:
+                self.assertEqual(self._draw(boundary), self._full_rebuild(),
+                                 'Step %d (%s) differs with fog_los %s' % (step, op, fog_los))
+        self.assertEqual(self._draw(boundary), self._full_rebuild())
+
+    def test_incremental_overlay_matches_full_rebuild(self):
+        for seed in range(6):
+            with self.subTest(seed=seed):
+                self.setUp()
+                self._run_sequence(random.Random(seed), fog_los=False)
+
+    def test_incremental_overlay_matches_full_rebuild_fog_los(self):
+        for seed in range(6):
+            with self.subTest(seed=seed):
+                self.setUp()
+                self._run_sequence(random.Random(seed), fog_los=True)
+
+    def test_move_only_redraws_footprint(self):
+        self.DB.constants.get('fog_los').set_value(False)
+        board = self.game.board
+        unit = FakeUnit('unit', 'player', (3, 3), 0)
+        self.units.append(unit)
+        board.update_fow(unit.position, unit, 2)
+        boundary = self.BoundaryInterface(WIDTH, HEIGHT)
+        self._draw(boundary)
+        self.assertEqual(board.pop_vision_changes(), set())
+
+        board.update_fow((4, 3), unit, 2)
+        self.assertEqual(board.vision_changes, {(1, 3), (2, 2), (2, 4), (3, 1), (3, 5),
+                                                (4, 1), (4, 5), (5, 2), (5, 4), (6, 3)})
+        surf = boundary.fog_of_war_surf
+        self.assertEqual(self._draw(boundary), self._full_rebuild())
+        self.assertIs(boundary.fog_of_war_surf, surf)
+
+    def test_full_rebuild_triggers(self):
+        board = self.game.board
+        boundary = self.BoundaryInterface(WIDTH, HEIGHT)
+        self._draw(boundary)
+        surf = boundary.fog_of_war_surf
+        # Opacity changes can change line of sight anywhere
+        board.reset_pos(self.tilemap, (2, 2))
+        self.assertIsNone(board.vision_changes)
+        self._draw(boundary)
+        self.assertIsNot(boundary.fog_of_war_surf, surf)
+        # So can changes to the fog of war config
+        surf = boundary.fog_of_war_surf
+        self.fog_info = FogOfWarLevelConfig(True, FogOfWarType.THRACIA, 2, 2, 2)
+        self._draw(boundary)
+        self.assertIsNot(boundary.fog_of_war_surf, surf)
+        surf = boundary.fog_of_war_surf
+        self._draw(boundary)
+        self.assertIs(boundary.fog_of_war_surf, surf)
+
+if __name__ == '__main__':
+    unittest.main()
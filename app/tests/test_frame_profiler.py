@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.engine import state_machine
+from app.engine.frame_profiler import FrameProfiler
+
+class FrameProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.profiler = FrameProfiler(max_frames=3)
+
+    def run_frame(self, phases=('update', 'draw')):
+        self.profiler.begin_frame()
+        for phase in phases:
+            self.profiler.record('free', phase, self.profiler.mark())
+        self.profiler.end_frame()
+
+    def test_disabled(self):
+        self.assertEqual(self.profiler.mark(), 0)
+        self.run_frame()
+        self.assertEqual(len(self.profiler.frames), 0)
+
+    def test_ring_buffer(self):
+        self.profiler.set_enabled(True)
+        for _ in range(5):
+            self.run_frame()
+        self.assertEqual(len(self.profiler.frames), 3)
+        self.assertEqual([span.label for span in self.profiler.frames[-1].spans], ['free.update', 'free.draw'])
+        self.assertEqual({label for label, ms in self.profiler.get_breakdown()}, {'free.update', 'free.draw'})
+        avg_frame, max_frame = self.profiler.get_frame_times()
+        self.assertLessEqual(avg_frame, max_frame)
+
+    def test_chrome_trace(self):
+        self.profiler.set_enabled(True)
+        self.run_frame()
+        events = self.profiler.to_chrome_trace()['traceEvents']
+        self.assertEqual([event['name'] for event in events], ['frame', 'free.update', 'free.draw'])
+        frame = events[0]
+        for event in events[1:]:
+            self.assertEqual(event['ph'], 'X')
+            self.assertGreaterEqual(event['ts'], frame['ts'])
+            self.assertLessEqual(event['ts'] + event['dur'], frame['ts'] + frame['dur'])
+
+    def test_state_machine_phases(self):
+        self.profiler.set_enabled(True)
+        state = MagicMock(started=False, processed=False, transparent=False)
+        state.name = 'free'
+        for phase in ('start', 'begin', 'take_input', 'update'):
+            getattr(state, phase).return_value = None
+        machine = state_machine.StateMachine()
+        machine.state.append(state)
+        machine.process_temp_state = lambda: None
+        with patch.object(state_machine, 'PROFILER', self.profiler):
+            self.profiler.begin_frame()
+            machine.update([], None)
+            self.profiler.end_frame()
+        self.assertEqual([span.label for span in self.profiler.frames[0].spans],
+                         ['free.start', 'free.begin', 'free.take_input', 'free.update', 'free.draw'])
+
+if __name__ == '__main__':
+    unittest.main()
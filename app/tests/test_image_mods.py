@@ -0,0 +1,133 @@
+import os
+import random
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+from app.constants import COLORKEY
+from app.engine import image_mods
+
+ANIM_GREEN = (128, 160, 128)
+PALETTE = [(0, 0, 0), (248, 248, 248), (56, 56, 144), (56, 80, 224), (40, 160, 248)]
+
+class Surface24(pygame.Surface):
+    """
+    color_convert converts to the display format first, which is 32 bit
+    under the dummy video driver. This keeps a 24 bit surface 24 bit,
+    as on a 24 bit display
+    """
+    def convert(self, *args):
+        return self
+
+class FlickerTintTests(unittest.TestCase):
+    def test_flicker_tint_unquantized(self):
+        tints = [image_mods.FlickerTint((200, 100, 50), 1000, 500, True)]
+        colors = {image_mods.get_flicker_tint_colors(time, tints)[0][0] for time in range(1000)}
+        # Every millisecond of the wave gets its own color
+        self.assertGreater(len(colors), 100)
+
+    def test_flicker_tint_steps(self):
+        tints = [image_mods.FlickerTint((200, 100, 50), 1000, 500, True),
+                 image_mods.FlickerTint((0, 255, 0), 300, 300, False)]
+        for idx in range(len(tints)):
+            colors = {image_mods.get_flicker_tint_colors(time, tints, 16)[idx][0] for time in range(1000)}
+            self.assertLessEqual(len(colors), 17)
+            self.assertIn((0, 0, 0), colors)
+            self.assertIn(tints[idx].color, colors)
+        self.assertEqual(image_mods.get_flicker_tint_colors(0, tints, 16)[1][1], False)
+
+    def test_quantize_effect(self):
+        from app.engine.unit_sprite import EFFECT_STEPS, quantize_effect, _translucent_key
+        keys = {_translucent_key(quantize_effect(t / 1000)) for t in range(-10, 1011)}
+        self.assertEqual(len(keys), EFFECT_STEPS + 1)
+        self.assertEqual(quantize_effect(0), 0)
+        self.assertEqual(quantize_effect(1), 1)
+        self.assertEqual(quantize_effect(2), 1)
+
+class VectorizedPixelTests(unittest.TestCase):
+    """
+    Each per pixel operation must give exactly the same pixels with NumPy
+    as with the per pixel fallback, whatever the format of the surface
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        pygame.display.init()
+        pygame.display.set_mode((1, 1))
+
+    @classmethod
+    def tearDownClass(cls):
+        pygame.display.quit()
+
+    def setUp(self):
+        if image_mods.numpy is None:
+            self.skipTest('NumPy is not installed')
+
+    def _make_image(self, fmt: str, seed: int) -> pygame.Surface:
+        rng = random.Random(seed)
+        width, height = 17, 11
+        if fmt == '24':
+            image = Surface24((width, height), 0, 24)
+        elif fmt == '32':
+            image = pygame.Surface((width, height), 0, 32)
+        else:
+            image = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+        special = [COLORKEY, ANIM_GREEN] + PALETTE
+        for x in range(width):
+            for y in range(height):
+                if rng.random() < 0.5:
+                    color = rng.choice(special)
+                else:
+                    color = tuple(rng.randrange(256) for _ in range(3))
+                alpha = rng.choice((0, 128, 255, 255)) if fmt == 'alpha' else 255
+                image.set_at((x, y), color + (alpha,))
+        return image
+
+    def _copy(self, image: pygame.Surface) -> pygame.Surface:
+        new_image = image.__class__(image.get_size(), image.get_flags(), image.get_bitsize())
+        new_image.blit(image, (0, 0), special_flags=pygame.BLEND_RGBA_ADD if image.get_flags() & pygame.SRCALPHA else 0)
+        return new_image
+
+    def _pixels(self, image: pygame.Surface) -> list:
+        return [tuple(image.get_at((x, y))) for x in range(image.get_width()) for y in range(image.get_height())]
+
+    def _compare(self, func):
+        for fmt in ('24', '32', 'alpha'):
+            for seed in range(3):
+                image = self._make_image(fmt, seed)
+                fast_image = self._copy(image)
+                slow_image = self._copy(image)
+                self.assertEqual(self._pixels(fast_image), self._pixels(image))
+                self.assertEqual(fast_image.get_bitsize(), int(fmt) if fmt != 'alpha' else 32)
+                fast = func(fast_image)
+                with patch.object(image_mods, 'numpy', None):
+                    slow = func(slow_image)
+                self.assertEqual(self._pixels(fast), self._pixels(slow),
+                                 '%s differs on %s surface (seed %d)' % (func.__name__, fmt, seed))
+
+    def test_make_gray(self):
+        self._compare(image_mods.make_gray)
+
+    def test_make_anim_gray(self):
+        self._compare(image_mods.make_anim_gray)
+
+    def test_make_gray_colorkey(self):
+        self._compare(image_mods.make_gray_colorkey)
+
+    def test_invert_surface(self):
+        def invert(image):
+            image_mods.invert_surface(image)
+            return image
+        self._compare(invert)
+
+    def test_color_convert(self):
+        conversion_dict = {old: new for old, new in zip(PALETTE, reversed(PALETTE))}
+        conversion_dict[COLORKEY] = (1, 2, 3)
+        def color_convert(image):
+            return image_mods.color_convert(image, conversion_dict)
+        self._compare(color_convert)
+
+if __name__ == '__main__':
+    unittest.main()
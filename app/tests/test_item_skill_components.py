@@ -133,6 +133,58 @@ class ItemSkillComponentTests(unittest.TestCase):
         self._test_skill_hook_with_components([DamageMultiplier(3.0), DamageMultiplier(1.5)], lambda unit: skill_system.damage_multiplier(unit, mock_item, mock_target, mock_item, mock_mode, mock_info, 0), 4.5)
         self._test_skill_hook_with_components([DamageMultiplier(-2), DamageMultiplier(1.5)], lambda unit: skill_system.damage_multiplier(unit, mock_item, mock_target, mock_item, mock_mode, mock_info, 0), -3)
 
+    def test_skill_hook_index(self):
+        from app.engine import skill_system
+        from app.engine.component_system.utils import invalidate_hook_indices
+        mock_item = MagicMock()
+        mock_info = MagicMock()
+        skill = SkillObject("test", "Test", "Test", None, (0, 0), Data([DamageMultiplier(2.0)]))
+        mock_unit = MagicMock()
+        mock_unit.skills = [skill]
+        damage_multiplier = lambda: skill_system.damage_multiplier(mock_unit, mock_item, mock_unit, mock_item, 'attack', mock_info, 0)
+        self.assertEqual(2.0, damage_multiplier())
+        # Changing a skill's components invalidates the index
+        skill.components.append(Vantage(True))
+        skill.components.remove_key('damage_multiplier')
+        invalidate_hook_indices()
+        self.assertEqual(1, damage_multiplier())
+        self.assertTrue(skill_system.vantage(mock_unit))
+        # So does changing which skills the unit has
+        mock_unit.skills = [skill, SkillObject("test2", "Test2", "Test2", None, (0, 0), Data([DamageMultiplier(3.0)]))]
+        self.assertEqual(3.0, damage_multiplier())
+
+    def test_skill_hook_custom_component_not_cached(self):
+        from app.engine import skill_system
+        from app.engine.utils import ltcache
+        ltcache.init()
+
+        class CustomMovementType(SkillComponent):
+            nid = 'custom_movement_type'
+            calls = 0
+
+            def movement_type(self, unit):
+                CustomMovementType.calls += 1
+                return unit.movement_group
+
+        mock_unit = MagicMock()
+        mock_unit.movement_group = 'Flier'
+        mock_unit.skills = [SkillObject("custom", "Custom", "Custom", None, (0, 0), Data([CustomMovementType()]))]
+        self.assertEqual('Flier', skill_system.movement_type(mock_unit))
+        # Custom components could depend on anything, so an unrelated change still throws out the result
+        mock_unit.movement_group = 'Armor'
+        ltcache.alter_state((ltcache.STATS,))
+        self.assertEqual('Armor', skill_system.movement_type(mock_unit))
+        self.assertEqual(2, CustomMovementType.calls)
+
+        # Builtin components keep their cached result across unrelated changes
+        builtin_unit = MagicMock()
+        builtin_unit.skills = [SkillObject("vantage", "Vantage", "Vantage", None, (0, 0), Data([Vantage(True)]))]
+        with patch.object(Vantage, 'vantage', autospec=True, return_value=True) as vantage_mock:
+            self.assertTrue(skill_system.vantage(builtin_unit))
+            ltcache.alter_state((ltcache.STATS,))
+            self.assertTrue(skill_system.vantage(builtin_unit))
+            self.assertEqual(1, vantage_mock.call_count)
+
     def test_skill_hooks_unique_default_target(self):
         from app.engine import skill_system
         mock_target = MagicMock()
@@ -0,0 +1,31 @@
+import unittest
+
+from app.engine import line_of_sight
+from app.engine.bresenham_line_algorithm import get_line
+from app.utilities import utils
+
+class LineOfSightTests(unittest.TestCase):
+    def setUp(self):
+        self.width, self.height = 12, 10
+        self.opaque = {(4, 2), (4, 3), (4, 4), (4, 5), (7, 7), (8, 7), (2, 8)}
+        self.get_opacity = lambda pos: pos in self.opaque
+
+    def test_build_visibility(self):
+        for source in [(1, 1), (5, 3), (6, 8), (11, 9)]:
+            for max_range in [0, 3, 8]:
+                visible = line_of_sight.build_visibility(source, max_range, self.width, self.height, self.get_opacity)
+                self.assertIn(source, visible)
+                for x in range(self.width):
+                    for y in range(self.height):
+                        pos = (x, y)
+                        expected = utils.calculate_distance(source, pos) <= max_range and \
+                            get_line(source, pos, self.get_opacity)
+                        self.assertEqual(pos in visible, expected, f'{source} -> {pos}, range {max_range}')
+
+    def test_wall_blocks(self):
+        visible = line_of_sight.build_visibility((2, 3), 6, self.width, self.height, self.get_opacity)
+        self.assertIn((4, 3), visible, 'Should be able to see the wall itself')
+        self.assertNotIn((6, 3), visible, 'Should not be able to see past the wall')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+from app.engine.utils import ltcache
+
+class LTCacheTests(unittest.TestCase):
+    def setUp(self):
+        ltcache.init()
+        self.calls = 0
+
+    def test_untagged(self):
+        @ltcache.ltcached
+        def double(x):
+            self.calls += 1
+            return x * 2
+
+        self.assertEqual(double(2), 4)
+        self.assertEqual(double(2), 4)
+        self.assertEqual(self.calls, 1)
+        # Any change to the game state throws out the result
+        ltcache.alter_state((ltcache.STATS,))
+        self.assertEqual(double(2), 4)
+        self.assertEqual(self.calls, 2)
+
+    def test_tagged(self):
+        @ltcache.ltcached(depends_on=(ltcache.SKILLS,))
+        def triple(x):
+            self.calls += 1
+            return x * 3
+
+        self.assertEqual(triple(2), 6)
+        ltcache.alter_state((ltcache.BOARD, ltcache.STATS))
+        self.assertEqual(triple(2), 6)
+        self.assertEqual(self.calls, 1, 'Unrelated change threw out the result')
+        ltcache.alter_state((ltcache.SKILLS,))
+        self.assertEqual(triple(2), 6)
+        self.assertEqual(self.calls, 2)
+        # An untagged change could have changed anything
+        ltcache.alter_state()
+        self.assertEqual(triple(2), 6)
+        self.assertEqual(self.calls, 3)
+
+    def test_depends_on_game_state(self):
+        @ltcache.ltcached(depends_on=(ltcache.SKILLS,))
+        def inner(x):
+            self.calls += 1
+            if x > 0:
+                ltcache.depends_on_game_state()
+            return x
+
+        @ltcache.ltcached(depends_on=(ltcache.SKILLS,))
+        def outer(x):
+            return inner(x) + 1
+
+        self.assertEqual(outer(0), 1)
+        self.assertEqual(outer(1), 2)
+        self.assertEqual(self.calls, 2)
+        ltcache.alter_state((ltcache.BOARD,))
+        self.assertEqual(outer(0), 1)
+        self.assertEqual(self.calls, 2)
+        # Relied on the whole game state, so it has to be recomputed
+        self.assertEqual(outer(1), 2)
+        self.assertEqual(self.calls, 3)
+        # Hitting the volatile inner result makes the new outer result volatile too
+        outer.cache_clear()
+        self.assertEqual(outer(1), 2)
+        self.assertEqual(self.calls, 3)
+        ltcache.alter_state((ltcache.BOARD,))
+        self.assertEqual(outer(1), 2)
+        self.assertEqual(self.calls, 4)
+
+    def test_evaluate_depends_on_game_state(self):
+        from app.engine import evaluate
+        from app.tests.mocks.mock_game import get_mock_game
+        game = get_mock_game()
+
+        @ltcache.ltcached(depends_on=(ltcache.SKILLS,))
+        def expression(string):
+            self.calls += 1
+            return evaluate.evaluate(string, game=game)
+
+        self.assertEqual(expression('1 + 1'), 2)
+        self.assertEqual(expression('1 + 1'), 2)
+        self.assertEqual(self.calls, 1)
+        # An expression could read anything, so any change throws out the result
+        ltcache.alter_state((ltcache.STATS,))
+        self.assertEqual(expression('1 + 1'), 2)
+        self.assertEqual(self.calls, 2)
+
+    def test_cache_stats(self):
+        @ltcache.ltcached
+        def stats_test_func(x):
+            return x
+
+        stats_test_func(1)
+        stats_test_func(1)
+        stats_test_func(2)
+        stats = {stats.name: stats for stats in ltcache.get_cache_stats()}
+        func_stats = next(s for name, s in stats.items() if name.endswith('stats_test_func'))
+        self.assertEqual(func_stats.hits, 1)
+        self.assertEqual(func_stats.misses, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,9 +6,7 @@ from app.engine.game_board import GameBoard
 from app.engine.target_system import TargetSystem
 from app.engine.objects.unit import UnitObject
 from app.engine.pathfinding.path_system import PathSystem
-from app.engine.pathfinding.node import Node
-
-from app.utilities.grid import Grid
+from app.engine.pathfinding.cost_grid import CostGrid
 
 from app.tests.mocks.mock_game import get_mock_game
 
@@ -40,10 +38,10 @@ class PathSystemTests(unittest.TestCase):
 
         # Set up a simple grid for use in travel algorithm tests
         width, height = 9, 9
-        self.simple_grid = Grid((width, height))
+        self.simple_grid = CostGrid((width, height))
         for x in range(width):
             for y in range(height):
-                self.simple_grid.append(Node(x, y, True, 1))
+                self.simple_grid.set_cost((x, y), 1)
 
     def test_valid_moves(self):
         with patch('app.engine.equations.parser.movement') as movement_mock, \
@@ -56,6 +54,52 @@ class PathSystemTests(unittest.TestCase):
             self.assertGreater(len(valid_moves), 0, 'get_valid_moves did not return a valid move')
             self.assertIn((1, 1), valid_moves, 'current position is not valid_moves')
 
+    def test_valid_moves_cache(self):
+        with patch('app.engine.equations.parser.movement') as movement_mock, \
+             patch('app.engine.objects.unit.UnitObject.movement_left', new_callable=PropertyMock) as movement_left_mock:
+            movement_instance = movement_mock.return_value
+            movement_instance.method.return_value = 5
+            movement_left_mock.return_value = 5
+
+            valid_moves = self.path_system.get_valid_moves(self.player_unit)
+            self.assertEqual(self.path_system.cache_misses, 1)
+            valid_moves.discard((1, 1))  # Callers are free to modify what they get back
+            self.assertEqual(self.path_system.get_valid_moves(self.player_unit), valid_moves | {(1, 1)})
+            self.assertEqual(self.path_system.cache_hits, 1)
+
+            # Putting an enemy in the way should invalidate the cache
+            enemy_unit = UnitObject('enemy')
+            enemy_unit.team = 'enemy'
+            self.game.board.set_unit((2, 1), enemy_unit)
+            with patch.object(self.game.board, 'in_vision', return_value=True):
+                blocked_moves = self.path_system.get_valid_moves(self.player_unit)
+            self.assertEqual(self.path_system.cache_misses, 2)
+            self.assertNotIn((2, 1), blocked_moves)
+
+    def test_valid_moves_cache_new_board(self):
+        with patch('app.engine.equations.parser.movement') as movement_mock, \
+             patch('app.engine.objects.unit.UnitObject.movement_left', new_callable=PropertyMock) as movement_left_mock:
+            movement_instance = movement_mock.return_value
+            movement_instance.method.return_value = 5
+            movement_left_mock.return_value = 5
+
+            self.path_system.get_valid_moves(self.player_unit)
+            self.assertEqual(self.path_system.cache_misses, 1)
+
+            # Replacing the board (as change_tilemap does) should invalidate the cache
+            # even though the new board starts back at the same version number
+            old_version = self.game.board.version
+            tilemap = MagicMock(name='tilemap')
+            tilemap.width = 3
+            tilemap.height = 3
+            self.game.board = GameBoard(tilemap)
+            self.game.board.bounds = (0, 0, 2, 2)
+            self.assertEqual(self.game.board.version, old_version)
+
+            small_moves = self.path_system.get_valid_moves(self.player_unit)
+            self.assertEqual(self.path_system.cache_misses, 2)
+            self.assertTrue(all(x <= 2 and y <= 2 for x, y in small_moves))
+
     def test_get_path(self):
         goal = (28, 14)
 
@@ -2,6 +2,7 @@ import unittest
 
 from app.utilities.grid import BoundedGrid
 from app.engine.pathfinding import node, pathfinding
+from app.engine.pathfinding.cost_grid import CostGrid
 
 class PathfindingTests(unittest.TestCase):
     """
@@ -98,6 +99,53 @@ x   x   x   x   x   x   x   x   x
         path = pathfinder.process(can_move_through, adj_good_enough=True)
         self.assertEqual(path[0], (7, 8), f'Did not find the best end: {path}')
 
+    def test_distance_field(self):
+        can_move_through = lambda x: True
+        field = pathfinding.DistanceField((1, 7), self.complex_grid, can_move_through)
+        self.assertEqual(field.get_distance((1, 7)), 0)
+        self.assertEqual(field.get_distance((3, 6)), float('inf'), 'Ignored wall')
+        self.assertEqual(field.get_distance((0, 7)), float('inf'), 'Ignored bounds')
+
+        # Same answers as AStar, for every goal, from the one field
+        pathfinder = pathfinding.AStar((1, 7), None, self.complex_grid)
+        for goal in [(7, 7), (5, 5), (8, 10), (1, 3)]:
+            pathfinder.set_goal_pos(goal)
+            for adj_good_enough in (False, True):
+                for limit in (None, 7):
+                    astar_path = pathfinder.process(can_move_through, adj_good_enough=adj_good_enough, limit=limit)
+                    path = field.get_path(goal, adj_good_enough=adj_good_enough, limit=limit)
+                    self.assertEqual(len(path), len(astar_path), f'{goal} {adj_good_enough} {limit}: {path}')
+                    if path:
+                        self.assertEqual(path[0], astar_path[0], 'Did not find the best end')
+                        self.assertEqual(path[-1], (1, 7), 'Did not start at the beginning')
+
+        # Fields only reach as far as they were asked to
+        field = pathfinding.DistanceField((1, 7), self.complex_grid, can_move_through, max_distance=5)
+        self.assertEqual(field.get_distance((4, 7)), float('inf'), 'Ignored terrain cost')
+        self.assertEqual(field.get_path((7, 7)), [])
+
+    def test_distance_field_cache(self):
+        can_move_through = lambda x: True
+        cache = pathfinding.DistanceFieldCache()
+        field = cache.get(0, 'foot', (1, 7), self.complex_grid, can_move_through, max_distance=5)
+        self.assertIs(cache.get(0, 'foot', (1, 7), self.complex_grid, can_move_through, max_distance=3), field)
+        # Does not reach far enough
+        wider = cache.get(0, 'foot', (1, 7), self.complex_grid, can_move_through, max_distance=10)
+        self.assertIsNot(wider, field)
+        self.assertIs(cache.get(0, 'foot', (1, 7), self.complex_grid, can_move_through, max_distance=5), wider)
+        self.assertIsNot(cache.get(0, 'flying', (1, 7), self.complex_grid, can_move_through, max_distance=5), wider)
+        # The board changed
+        self.assertIsNot(cache.get(1, 'foot', (1, 7), self.complex_grid, can_move_through, max_distance=5), wider)
+
+    def test_distance_field_cache_new_board(self):
+        # A new level's board can have the same version the last board had
+        can_move_through = lambda x: True
+        cache = pathfinding.DistanceFieldCache()
+        old_board, new_board = object(), object()
+        field = cache.get((old_board, 3), 'foot', (1, 7), self.complex_grid, can_move_through, max_distance=5)
+        self.assertIs(cache.get((old_board, 3), 'foot', (1, 7), self.complex_grid, can_move_through, max_distance=5), field)
+        self.assertIsNot(cache.get((new_board, 3), 'foot', (1, 7), self.complex_grid, can_move_through, max_distance=5), field)
+
     def test_thetastar(self):
         # Test the simple grid
         pathfinder = pathfinding.ThetaStar((5, 5), (1, 1), self.simple_grid)
@@ -114,5 +162,35 @@ x   x   x   x   x   x   x   x   x
         self.assertEqual(path[-1], (1, 7), 'Did not start at the beginning')
         self.assertEqual(len(path), 5, f'Longer path than necessary {path}')
 
+    def test_shared_grid(self):
+        # Pathfinders share their scratch search state between searches
+        # Make sure one search does not leak into the next
+        can_move_through = lambda x: True
+        first = pathfinding.Djikstra((1, 7), self.complex_grid).process(can_move_through, 5)
+        pathfinder = pathfinding.AStar((1, 7), (7, 7), self.complex_grid)
+        path = pathfinder.process(can_move_through)
+        self.assertEqual(len(path), 13, f'Longer path than necessary {path}')
+        second = pathfinding.Djikstra((1, 7), self.complex_grid).process(can_move_through, 5)
+        self.assertEqual(first, second, 'Djikstra was affected by a previous search')
+        path = pathfinder.process(can_move_through)
+        self.assertEqual(len(path), 13, 'AStar was affected by a previous search')
+
+    def test_cost_grid(self):
+        # A grid of Nodes and the equivalent CostGrid should give the same answers
+        can_move_through = lambda x: True
+        cost_grid = CostGrid.from_nodes(self.complex_grid)
+        self.assertFalse(cost_grid.reachable((3, 3)))
+        self.assertEqual(cost_grid.get_cost((2, 6)), 2)
+        self.assertEqual(pathfinding.Djikstra((1, 7), self.complex_grid).process(can_move_through, 5),
+                         pathfinding.Djikstra((1, 7), cost_grid).process(can_move_through, 5))
+        self.assertEqual(pathfinding.AStar((1, 7), (7, 7), self.complex_grid).process(can_move_through),
+                         pathfinding.AStar((1, 7), (7, 7), cost_grid).process(can_move_through))
+
+        # Bounded views share the cost buffer
+        bounded = cost_grid.apply_bounds((1, 3, 4, 10))
+        cost_grid.set_cost((2, 6), 1)
+        self.assertEqual(bounded.get_cost((2, 6)), 1)
+        self.assertFalse(bounded.check_bounds((5, 5)))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from app.engine import save_container
+
+class SaveContainerTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.save_loc = os.path.join(self.dir, 'test-0.p')
+        self.s_dict = {'units': [{'nid': 'Eirika', 'level': 1}],
+                       'level': None,
+                       'action_log': (list(range(1000)), 0, 0, 0),
+                       'talk_hidden': {('Eirika', 'Seth')}}
+        self.meta = {'level_nid': '0', 'kind': 'start'}
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_round_trip(self):
+        save_container.write_save(self.save_loc, self.s_dict, self.meta)
+        s_dict = save_container.read_save(self.save_loc)
+        self.assertEqual(dict(s_dict), self.s_dict)
+        self.assertEqual(s_dict.meta, self.meta)
+        self.assertFalse(os.path.exists(self.save_loc + '.tmp'))
+
+    def test_lazy_sections(self):
+        save_container.write_save(self.save_loc, self.s_dict, self.meta)
+        s_dict = save_container.read_save(self.save_loc)
+        self.assertEqual(s_dict['units'], self.s_dict['units'])
+        self.assertTrue(s_dict.is_loaded('units'))
+        self.assertFalse(s_dict.is_loaded('action_log'))
+        self.assertIsNone(s_dict.get('missing'))
+
+    def test_checksum(self):
+        save_container.write_save(self.save_loc, self.s_dict, self.meta)
+        with open(self.save_loc, 'r+b') as fp:
+            fp.seek(-5, os.SEEK_END)
+            byte = fp.read(1)
+            fp.seek(-5, os.SEEK_END)
+            fp.write(bytes([byte[0] ^ 0xFF]))
+        s_dict = save_container.read_save(self.save_loc)
+        corrupted = [name for name in s_dict if not self._loads(s_dict, name)]
+        self.assertEqual(corrupted, ['talk_hidden'])
+
+    def _loads(self, s_dict, name) -> bool:
+        try:
+            s_dict[name]
+            return True
+        except save_container.CorruptSaveError:
+            return False
+
+    def test_old_saves(self):
+        with open(self.save_loc, 'wb') as fp:
+            pickle.dump(self.s_dict, fp)
+        self.assertEqual(save_container.read_save(self.save_loc), self.s_dict)
+
+    def test_share_save(self):
+        restart_loc = os.path.join(self.dir, 'test-restart0.p')
+        save_container.write_save(self.save_loc, self.s_dict, self.meta)
+        save_container.share_save(self.save_loc, restart_loc)
+        # Overwriting the save must leave the shared copy alone
+        save_container.write_save(self.save_loc, {'units': []}, self.meta)
+        self.assertEqual(dict(save_container.read_save(restart_loc)), self.s_dict)
+        self.assertEqual(dict(save_container.read_save(self.save_loc)), {'units': []})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
+from unittest.mock import MagicMock, patch
 
 from app.engine import action
-from app.engine.turnwheel import ActionLog
+from app.engine.turnwheel import ActionLog, LIVE_PHASES
 
 class TurnwheelTests(unittest.TestCase):
     def setUp(self):
@@ -93,3 +94,100 @@ class TurnwheelTests(unittest.TestCase):
         self.assertTrue(type(action_groups[0]) == ActionLog.Move)
         self.assertEqual(6, action_groups[0].begin)
         self.assertEqual(9, action_groups[0].end)
+
+    def test_compact(self):
+        action_log = ActionLog()
+        for act in [action.MarkPhase('enemy'), action.LockTurnwheel(True), action.Action(),
+                    action.MarkPhase('player'), action.LockTurnwheel(False)]:
+            action_log.append(act)
+        action_log.set_first_free_action()
+        last_action = action.Action()
+        action_log.append(last_action)
+        action_log.compact()
+        self.assertEqual([last_action], action_log.actions)
+        self.assertEqual(0, action_log.action_index)
+        self.assertFalse(action_log.at_far_past())
+        self.assertFalse(action_log.get_last_lock())
+        self.assertEqual('player', action_log.get_current_phase())
+        # The compacted lock and phase survive a save
+        restored = ActionLog.restore(([], -1, 0, True, 'enemy'))
+        self.assertTrue(restored.get_last_lock())
+        self.assertEqual('enemy', restored.get_current_phase())
+
+    def test_compact_many_turns(self):
+        action_log = ActionLog()
+        action_log.set_first_free_action()
+        num_phases = 40
+        for turn in range(num_phases // 2):
+            for phase_name in ('player', 'enemy'):
+                action_log.append(action.MarkPhase(phase_name))
+                action_log.append(action.LockTurnwheel(phase_name == 'enemy'))
+                for _ in range(10):
+                    action_log.append(action.Action())
+                action_log.compact()
+        # Everything the turnwheel can reach is kept
+        self.assertEqual(num_phases * 12, len(action_log.actions))
+        self.assertEqual(len(action_log.actions) - 1, action_log.action_index)
+
+        # But older phases are packed in the save
+        serial = action_log.save()
+        self.assertEqual(LIVE_PHASES * 12, len(serial[0]))
+        self.assertEqual(num_phases - LIVE_PHASES, len(serial[5]))
+
+        # And come back in front of the rest
+        action_log = ActionLog.restore(serial)
+        self.assertEqual(num_phases * 12, len(action_log.actions))
+        self.assertEqual(len(action_log.actions) - 1, action_log.action_index)
+        phases = [act.phase_name for act in action_log.actions if isinstance(act, action.MarkPhase)]
+        self.assertEqual(['player', 'enemy'] * (num_phases // 2), phases)
+        self.assertFalse(action_log.at_far_past())
+        self.assertEqual('enemy', action_log.get_current_phase())
+        self.assertTrue(action_log.get_last_lock())
+
+        # Actions before a new first free action can't be reached, so they are thrown out
+        action_log.set_first_free_action()
+        action_log.compact()
+        self.assertEqual([], action_log.actions)
+        self.assertTrue(action_log.get_last_lock())
+        self.assertEqual('enemy', action_log.get_current_phase())
+        self.assertEqual([], action_log.save()[5])
+
+    def test_rename_unit_after_many_phases(self):
+        from app.engine.objects.unit import UnitObject
+        unit = UnitObject('101')
+        unit.generic = True
+        unit.name = 'Soldier'
+        unit.position = None
+        mock_game = MagicMock()
+        mock_game.unit_registry = {unit.nid: unit}
+        mock_game.get_unit.side_effect = lambda nid: mock_game.unit_registry.get(nid)
+        mock_game.register_unit.side_effect = lambda unit: mock_game.unit_registry.__setitem__(unit.nid, unit)
+        mock_game.initiative = None
+
+        with patch('app.engine.action.game', mock_game):
+            action_log = ActionLog()
+            set_name = action.SetName(unit, 'Captain')
+            set_name.do()
+            action_log.append(set_name)
+            for turn in range(LIVE_PHASES + 2):
+                action_log.append(action.MarkPhase('player' if turn % 2 else 'enemy'))
+                action_log.compact()
+            # Long after the name change, an event gives the generic a unique nid
+            set_nid = action.SetNid(unit, 'Captain')
+            set_nid.do()
+            action_log.append(set_nid)
+            self.assertEqual('Captain', unit.nid)
+
+            # Turning back past the rename and the name change
+            while not action_log.at_far_past():
+                action_log.run_action_backward()
+            self.assertEqual('101', unit.nid)
+            self.assertEqual('Soldier', unit.name)
+
+            # A save made after the rename still finds the unit once loaded
+            while not action_log.at_far_future():
+                action_log.run_action_forward()
+            action_log = ActionLog.restore(action_log.save())
+            while not action_log.at_far_past():
+                action_log.run_action_backward()
+            self.assertEqual('Soldier', unit.name)
@@ -1,15 +1,10 @@
 import sys
-try:
-    import cPickle as pickle
-except ImportError:
-    import pickle
 
-from app.engine import records
+from app.engine import records, save_container
 
 def display_record(save_fn):
-    with open(save_fn, 'rb') as fp:
-        s_dict = pickle.load(fp)
-        print(s_dict)
+    s_dict = save_container.read_save(save_fn)
+    print(dict(s_dict))
 
     record_book = records.Recordkeeper.restore(s_dict['records'])
 